@@ -30,10 +30,34 @@ class CompanySearchRequest(BaseModel):
     limit: int = Field(10, ge=1, le=200)
     pageToken: str = ""
 
+class CompanySearchStreamRequest(CompanySearchRequest):
+    # limit is the upstream page size here; maxRecords caps the whole stream
+    limit: int = Field(200, ge=1, le=200)
+    maxRecords: int = Field(1000, ge=1, le=50000)
+
+class CompanyBatchSearchRequest(BaseModel):
+    queries: List[CompanySearchRequest] = Field(..., min_length=1)
+
+class PeopleBatchSearchRequest(BaseModel):
+    # Raw Surfe v2 people search payloads, as accepted by /api/v2/people/search
+    queries: List[Dict[str, Any]] = Field(..., min_length=1)
+
 class CompanyLookalikeRequest(BaseModel):
     domain: str = Field(..., example="surfe.com")
     limit: int = Field(10, ge=1, le=50)
 
+class MultiSeedLookalikeRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1, example=["surfe.com", "hubspot.com"])
+    limit: int = Field(10, ge=1, le=50)
+
+class LookalikeExpansionRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1, example=["surfe.com"])
+    limit: int = Field(10, ge=1, le=50)
+    depth: int = Field(2, ge=1, le=4)
+    # Upstream calls allowed for the whole expansion (cached seeds are free)
+    maxRequests: int = Field(50, ge=1, le=500)
+    maxCompanies: Optional[int] = Field(None, ge=1)
+
 class CompanyEnrichmentRequest(BaseModel):
     domains: List[str] = Field(..., example=["surfe.com", "google.com"])
     name: str = "My Enrichment List"
@@ -70,6 +94,21 @@ class PeopleSearchRequestV2(BaseModel):
             }
         }
 
+class CompanyPeopleFanoutRequest(BaseModel):
+    # Company filters select the segment; people filters pick who to find at each company
+    companies: CompanySearchFilters
+    people: Optional[PeopleFilters] = Field(default_factory=PeopleFilters)
+    peoplePerCompany: int = Field(1, ge=1, le=10)
+    maxCompanies: int = Field(1000, ge=1, le=50000)
+    maxPeople: int = Field(10000, ge=1, le=100000)
+    # Company domains per upstream people search (companies.domains)
+    domainBatchSize: int = Field(50, ge=1, le=500)
+
+class DomainListCreateRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1, example=["surfe.com", "competitor.io"])
+    name: Optional[str] = None
+    ttlSeconds: Optional[int] = Field(None, ge=60, le=7 * 24 * 3600)
+
 # Old v1 People Search Model (for backward compatibility if needed)
 class PeopleSearchRequest(BaseModel): # Kept as PeopleSearchRequest for existing routes
     filters: Dict[str, Any] = Field(..., example={"seniorities": ["manager"], "industries": ["internet"]})
@@ -139,4 +178,41 @@ class PeopleEnrichmentRequestV2(BaseModel): # The new V2 model for enrichment
 class PeopleEnrichmentRequestV1(BaseModel): # Renamed for clarity
     people: List[Dict[str, str]] = Field(..., example=[{"firstName": "John", "lastName": "Doe", "companyName": "Google"}])
     enrichment_type: str = Field("emailAndMobile", example="emailAndMobile") # Not used in V2 conversion
-    name: str = "My People Enrichment List" # Not used in V2 conversion
\ No newline at end of file
+    name: str = "My People Enrichment List" # Not used in V2 conversion
+
+# --- Pipeline Models ---
+class SearchEnrichPipelineRequest(BaseModel):
+    # Raw Surfe v2 people search payload, as accepted by /api/v2/people/search
+    search: Dict[str, Any]
+    include: EnrichmentInclude
+    maxRecords: int = Field(1000, ge=1, le=50000)
+    # People per enrichment job; the first job starts as soon as this many are found
+    chunkSize: int = Field(500, ge=1, le=10000)
+    notificationOptions: Optional[NotificationOptions] = None
+
+# --- Diagnostics Models ---
+class BenchmarkTarget(BaseModel):
+    # Read-only endpoints only; see core.benchmark.BENCHMARK_ENDPOINTS
+    endpoint: str = Field(..., pattern=r"^/v\d+/", example="/v1/people/search/filters")
+    method: str = Field("GET", pattern="^(GET|POST)$")
+    payload: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None  # Defaults to "METHOD endpoint"
+
+class BenchmarkRequest(BaseModel):
+    targets: List[BenchmarkTarget] = Field(..., min_length=1)
+    concurrency: int = Field(4, ge=1, le=64)
+    # Stop after this many requests and/or this many seconds, whichever comes first
+    requests: Optional[int] = Field(None, ge=1, le=5000)
+    durationSeconds: Optional[float] = Field(None, gt=0, le=120)
+    # Benchmark a single key (masked suffix, e.g. "...ab12c") instead of rotating over all enabled keys
+    key: Optional[str] = None
+    timeout: int = Field(30, ge=1, le=120)
+    saveBaseline: Optional[str] = None
+    compareTo: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_stop_condition(self):
+        if self.requests is None and self.durationSeconds is None:
+            raise ValueError("Set requests, durationSeconds or both.")
+        return self
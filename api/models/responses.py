@@ -26,4 +26,38 @@ class Person(BaseModel):
     companyName: Optional[str] = None
     linkedinUrl: Optional[str] = None
     email: Optional[str] = None
-    mobilePhone: Optional[str] = None
\ No newline at end of file
+    mobilePhone: Optional[str] = None
+
+# Export schemas for enrichment results (see utils/columnar_export.py).
+# Field order and types here define the Parquet/Arrow column layout.
+class EmailAddress(BaseModel):
+    email: Optional[str] = None
+    validationStatus: Optional[str] = None
+
+class MobilePhone(BaseModel):
+    mobilePhone: Optional[str] = None
+    confidenceScore: Optional[float] = None
+
+class EnrichedPerson(Person):
+    externalID: Optional[str] = None
+    status: Optional[str] = None
+    emails: Optional[List[EmailAddress]] = []
+    mobilePhones: Optional[List[MobilePhone]] = []
+    seniorities: Optional[List[str]] = []
+    departments: Optional[List[str]] = []
+    companyDomain: Optional[str] = None
+    country: Optional[str] = None
+    location: Optional[str] = None
+    linkedInUrl: Optional[str] = None
+
+class EnrichedCompany(Company):
+    externalID: Optional[str] = None
+    status: Optional[str] = None
+    description: Optional[str] = None
+    websites: Optional[List[str]] = []
+    revenue: Optional[str] = None
+    founded: Optional[int] = None
+    hqCountry: Optional[str] = None
+    industry: Optional[str] = None
+    linkedInURL: Optional[str] = None
+    keywords: Optional[List[str]] = []
\ No newline at end of file
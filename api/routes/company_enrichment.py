@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query
+from typing import Union
 from uuid import uuid4
 from api.models import requests as req_models, responses as res_models
-from core import job_manager, background_tasks
+from core import job_manager, background_tasks, cost_estimator
+from core.csv_upload import row_id
 from utils.api_client import surfe_client
 import logging
 import traceback
@@ -13,12 +15,21 @@ logger = logging.getLogger(__name__)
 # CHANGED: v1 to v2 in the prefix
 router = APIRouter(prefix="/api/v2/companies", tags=["Company"])
 
-@router.post("/enrich", response_model=res_models.JobStatusResponse)
+@router.post("/enrich", response_model=Union[res_models.JobStatusResponse, res_models.GenericResponse])
 async def start_company_enrichment(
     request: req_models.CompanyEnrichmentRequest, 
-    background_tasks_runner: BackgroundTasks
+    background_tasks_runner: BackgroundTasks,
+    dry_run: bool = Query(False, description="Only estimate records, credits and wall time; submit nothing"),
+    check_credits: bool = Query(False, description="With dry_run: also check the keys' credit balances cover the estimate")
 ):
     """Company enrichment with debugging"""
+    if dry_run:
+        estimate = cost_estimator.estimate_company_enrichment(request.domains)
+        if check_credits:
+            await cost_estimator.add_credit_check(estimate)
+        logger.info(f"🧮 Dry run: {estimate['records']['valid']} domains, max {estimate['credits']['max']} credits")
+        return {"success": True, "data": estimate}
+
     job_id = None
     
     try:
@@ -34,7 +45,8 @@ async def start_company_enrichment(
         
         logger.info("🔍 COMPANY STEP 4: Creating payload")
         # FIXED: Use proper v2 API format (companies, not organizations)
-        payload = {"companies": [{"domain": d, "externalID": f"company_{i}"} for i, d in enumerate(request.domains)]}
+        # Positional row IDs, so results can be joined back to the submitted domains/CSV rows
+        payload = {"companies": [{"domain": d, "externalID": row_id(i)} for i, d in enumerate(request.domains)]}
         logger.info(f"🔍 COMPANY STEP 4 SUCCESS: V2 Payload for {len(request.domains)} domains: {request.domains}")
 
         logger.info("🔍 COMPANY STEP 5: Adding background task")
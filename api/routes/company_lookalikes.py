@@ -1,15 +1,74 @@
 from fastapi import APIRouter, Depends, HTTPException
 from api.models import requests as req_models, responses as res_models
+from core.batch_search import normalize_domain
 from core.dependencies import get_api_key
-from utils import api_client
+from core.lookalikes import expand_lookalikes, lookalike_cache, multi_seed_lookalikes
+import logging
+
+try:
+    from config.config import LOOKALIKE_MAX_SEEDS
+except ImportError:
+    LOOKALIKE_MAX_SEEDS = 100
 
 print("Loading company_lookalikes.py") # DEBUG PRINT
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/v1/companies", tags=["Company"])
+
+
+def _check_seed_count(domains):
+    if len(domains) > LOOKALIKE_MAX_SEEDS:
+        raise HTTPException(status_code=400, detail={"error": f"At most {LOOKALIKE_MAX_SEEDS} seed domains per request."})
+
+
 @router.post("/lookalikes", response_model=res_models.GenericResponse)
 async def get_company_lookalikes(request: req_models.CompanyLookalikeRequest, api_key: str = Depends(get_api_key)):
-    result = await api_client.make_surfe_request("POST", "/v1/organizations/look-alikes", api_key, json_data=request.model_dump())
+    # Through the rotating client and the per-seed cache shared with the multi-seed endpoints
+    domain = normalize_domain(request.domain)
+    if not domain:
+        raise HTTPException(status_code=400, detail={"error": "A seed domain is required."})
+    result, cached = await lookalike_cache.get(domain, request.limit)
     if "error" in result:
         error_detail = result.get("details", result.get("error", "An unknown API error occurred."))
         raise HTTPException(status_code=500, detail={"error": str(error_detail)})
-    return {"success": True, "data": result}
\ No newline at end of file
+    return {"success": True, "data": result}
+
+
+@router.post("/lookalikes/multi", response_model=res_models.GenericResponse)
+async def get_multi_seed_lookalikes(request: req_models.MultiSeedLookalikeRequest, api_key: str = Depends(get_api_key)):
+    """
+    Lookalikes for many seed domains (e.g. your best customers) at once. Seeds are queried
+    concurrently and cached; companies are de-duplicated and ranked by how many seeds
+    returned them (seedCount), so the strongest territory matches come first.
+    """
+    _check_seed_count(request.domains)
+    result = await multi_seed_lookalikes(request.domains, request.limit)
+    if result["summary"]["seed_queries"] and not result["summary"]["succeeded"]:
+        raise HTTPException(status_code=502, detail={"error": "Every seed query failed", "seeds": result["seeds"]})
+    return {"success": True, "data": result}
+
+
+@router.post("/lookalikes/expand", response_model=res_models.GenericResponse)
+async def expand_company_lookalikes(request: req_models.LookalikeExpansionRequest, api_key: str = Depends(get_api_key)):
+    """
+    Breadth-first lookalike expansion: lookalikes of the seeds, then lookalikes of those,
+    up to `depth` levels. Each domain is queried once and at most `maxRequests` uncached
+    upstream calls are made; the summary says why the expansion stopped.
+    """
+    _check_seed_count(request.domains)
+    result = await expand_lookalikes(
+        request.domains,
+        limit=request.limit,
+        depth=request.depth,
+        max_requests=request.maxRequests,
+        max_companies=request.maxCompanies
+    )
+    if result["summary"]["seed_queries"] and not result["summary"]["succeeded"]:
+        raise HTTPException(status_code=502, detail={"error": "Every seed query failed", "seeds": result["seeds"]})
+    return {"success": True, "data": result}
+
+
+@router.get("/lookalikes/cache", response_model=res_models.GenericResponse)
+async def get_lookalike_cache_stats():
+    return {"success": True, "data": lookalike_cache.get_stats()}
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from api.models import requests as req_models, responses as res_models
 from core.dependencies import get_api_key
 # UPDATED: Import the new surfe_client with rotation instead of old api_client
 from utils.api_client import surfe_client
+from core.search_pagination import SearchPaginator
+from core.batch_search import company_record_key, run_search_batch
+from core.domain_chunking import chunked_company_search, needs_chunking
 import json
-from typing import Any
+from typing import Any, AsyncIterator, Dict
 import logging
 
+try:
+    from config.config import BATCH_SEARCH_MAX_QUERIES
+except ImportError:
+    BATCH_SEARCH_MAX_QUERIES = 100
+
 print("Loading company_search.py with API rotation") # DEBUG PRINT
 
+logger = logging.getLogger(__name__)
+
 # router = APIRouter(prefix="/api/v1/companies", tags=["Company"])
 router = APIRouter(prefix="/api/v2/companies", tags=["Company"])
 
@@ -25,6 +36,54 @@ def safe_get_error_message(error_detail: Any) -> str:
     else:
         return str(error_detail)
 
+def build_company_search_payload(request: req_models.CompanySearchRequest) -> Dict[str, Any]:
+    """
+    Convert a CompanySearchRequest into the Surfe v2 API payload, keeping only the filters that are set.
+    Raises a 400 if no filter is present.
+    """
+    filters = request.filters
+    
+    # Convert the request to match Surfe v2 API format
+    api_payload = {
+        "filters": {},
+        "limit": request.limit,
+        "pageToken": request.pageToken
+    }
+    
+    # Add filters that are present
+    if filters.countries:
+        api_payload["filters"]["countries"] = filters.countries
+        
+    if filters.domains:
+        api_payload["filters"]["domains"] = filters.domains
+        
+    if filters.domainsExcluded:
+        api_payload["filters"]["domainsExcluded"] = filters.domainsExcluded
+        
+    if filters.industries:
+        api_payload["filters"]["industries"] = filters.industries
+        
+    if filters.employeeCount:
+        api_payload["filters"]["employeeCount"] = {
+            "from": filters.employeeCount.from_,
+            "to": filters.employeeCount.to
+        }
+        
+    if filters.revenue:
+        api_payload["filters"]["revenue"] = {
+            "from": filters.revenue.from_,
+            "to": filters.revenue.to
+        }
+    
+    # Ensure we have at least one filter
+    if not api_payload["filters"]:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "At least one filter is required for a search."}
+        )
+
+    return api_payload
+
 @router.post("/search", response_model=res_models.GenericResponse)
 async def search_companies(request: req_models.CompanySearchRequest, api_key: str = Depends(get_api_key)):
     """
@@ -34,59 +93,26 @@ async def search_companies(request: req_models.CompanySearchRequest, api_key: st
     api_payload = None
     
     try:
-        filters = request.filters
-        
-        # Convert the request to match Surfe v2 API format
-        api_payload = {
-            "filters": {},
-            "limit": request.limit,
-            "pageToken": request.pageToken
-        }
-        
-        # Add filters that are present
-        if filters.countries:
-            api_payload["filters"]["countries"] = filters.countries
-            
-        if filters.domains:
-            api_payload["filters"]["domains"] = filters.domains
-            
-        if filters.domainsExcluded:
-            api_payload["filters"]["domainsExcluded"] = filters.domainsExcluded
-            
-        if filters.industries:
-            api_payload["filters"]["industries"] = filters.industries
-            
-        if filters.employeeCount:
-            api_payload["filters"]["employeeCount"] = {
-                "from": filters.employeeCount.from_,
-                "to": filters.employeeCount.to
-            }
-            
-        if filters.revenue:
-            api_payload["filters"]["revenue"] = {
-                "from": filters.revenue.from_,
-                "to": filters.revenue.to
-            }
-        
-        # Ensure we have at least one filter
-        if not api_payload["filters"]:
-            raise HTTPException(
-                status_code=400,
-                detail={"error": "At least one filter is required for a search."}
-            )
+        api_payload = build_company_search_payload(request)
 
-        # Debug logging
-        print(f"🔍 Sending to Surfe API: {json.dumps(api_payload, indent=2)}")
-
-        # UPDATED: Use the enhanced API client with rotation
-        result = await surfe_client.make_request_with_rotation(
-            "POST", 
-            "/v2/companies/search", 
-            json_data=api_payload,
-            timeout=20,        # Reduced timeout
-            max_retries=3,     # Fewer retries (instead of 5)
-            retry_delay=0.5    # Faster retries
-        )
+        if needs_chunking(api_payload):
+            # Thousands of included/excluded domains: split or filter locally (core/domain_chunking.py)
+            print(f"🔍 Large domain filter ({len(api_payload['filters'].get('domains') or [])} included, "
+                  f"{len(api_payload['filters'].get('domainsExcluded') or [])} excluded), using chunked search")
+            result = await chunked_company_search(api_payload, timeout=20)
+        else:
+            # Debug logging
+            print(f"🔍 Sending to Surfe API: {json.dumps(api_payload, indent=2)}")
+
+            # UPDATED: Use the enhanced API client with rotation
+            result = await surfe_client.make_request_with_rotation(
+                "POST", 
+                "/v2/companies/search", 
+                json_data=api_payload,
+                timeout=20,        # Reduced timeout
+                max_retries=3,     # Fewer retries (instead of 5)
+                retry_delay=0.5    # Faster retries
+            )
 
         # Enhanced logging to see what happened
         print(f"📡 API Response received:")
@@ -167,6 +193,79 @@ async def search_companies(request: req_models.CompanySearchRequest, api_key: st
             }
         )
 
+@router.post("/search/stream")
+async def stream_all_companies(
+    request: req_models.CompanySearchStreamRequest,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    "Fetch all" mode: follows nextPageToken server-side and streams every company as one
+    NDJSON line as soon as its page arrives, up to maxRecords. The last line is a
+    {"_meta": {...}} summary; an upstream failure mid-stream ends with {"_error": {...}}.
+    Stops fetching as soon as the client disconnects.
+    """
+    api_payload = build_company_search_payload(request)  # validates filters before streaming starts
+
+    paginator = SearchPaginator(
+        "/v2/companies/search",
+        api_payload,
+        result_key="companies",
+        max_records=request.maxRecords,
+        page_size=request.limit,
+        is_disconnected=http_request.is_disconnected,
+        timeout=20
+    )
+
+    async def generate() -> AsyncIterator[str]:
+        async for companies in paginator.pages():
+            for company in companies:
+                yield json.dumps(company) + "\n"
+
+        if paginator.error:
+            yield json.dumps({"_error": {
+                "error": f"Surfe API Error: {safe_get_error_message(paginator.error['error'])}",
+                "status_code": paginator.error["status_code"],
+                "page": paginator.error["page"]
+            }}) + "\n"
+        yield json.dumps({"_meta": paginator.summary()}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/search/batch", response_model=res_models.GenericResponse)
+async def batch_search_companies(request: req_models.CompanyBatchSearchRequest, api_key: str = Depends(get_api_key)):
+    """
+    Run many company searches (e.g. one per territory or industry) concurrently.
+    Returns each query's result or error plus a union of all companies de-duplicated by domain.
+    """
+    if len(request.queries) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": f"A batch can contain at most {BATCH_SEARCH_MAX_QUERIES} queries."}
+        )
+
+    payloads = []
+    errors = {}
+    for index, query in enumerate(request.queries):
+        try:
+            payloads.append(build_company_search_payload(query))
+        except HTTPException as e:
+            payloads.append(None)
+            errors[index] = e.detail.get("error") if isinstance(e.detail, dict) else str(e.detail)
+
+    batch = await run_search_batch(
+        "/v2/companies/search",
+        payloads,
+        result_key="companies",
+        record_key=company_record_key,
+        errors=errors,
+        timeout=20
+    )
+    for query in batch["queries"]:
+        if not query["success"]:
+            query["error"] = safe_get_error_message(query["error"])
+    return {"success": True, "data": batch}
+
 # Optional: Add a status endpoint to check API rotation health
 @router.get("/api-status", response_model=res_models.GenericResponse)
 async def get_company_search_status(api_key: str = Depends(get_api_key)):
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
+from uuid import uuid4
+from api.models import responses as res_models
+from core import job_manager
+from core.batch_search import normalize_domain
 from core.dependencies import get_api_key
-from utils import api_client
+from core.quality_study import run_quality_study_job, run_variant_chunk
 import asyncio
 import logging
 
+try:
+    from config.config import QUALITY_STUDY_CHUNK_SIZE
+except ImportError:
+    QUALITY_STUDY_CHUNK_SIZE = 100
+
 print("Loading data_quality_test.py") # DEBUG PRINT
 
 logger = logging.getLogger(__name__)
@@ -19,6 +28,22 @@ class LinkedInTestRequest(BaseModel):
     linkedinUrl: str
     domain: Optional[str] = None
 
+class DomainBatchTestRequest(BaseModel):
+    domains: List[str] = Field(..., min_length=1, max_length=5000, example=["surfe.com", "hubspot.com"])
+    # Companies per upstream enrichment job
+    chunkSize: int = Field(QUALITY_STUDY_CHUNK_SIZE, ge=1, le=500)
+
+class LinkedInBatchTestRequest(BaseModel):
+    items: List[LinkedInTestRequest] = Field(..., min_length=1, max_length=5000)
+    chunkSize: int = Field(QUALITY_STUDY_CHUNK_SIZE, ge=1, le=500)
+
+def _first_record(chunk_result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return next(iter(chunk_result["records"].values()), None)
+
+def _raw_result(chunk_result: Dict[str, Any]) -> Dict[str, Any]:
+    response = chunk_result["response"]
+    return {"error": response["error"]} if "error" in response else response
+
 @router.post("/compare-api-versions")
 async def compare_v1_v2_data_quality(
     request: DomainTestRequest,
@@ -38,98 +63,19 @@ async def compare_v1_v2_data_quality(
     try:
         print(f"🔍 Testing domain: {domain}")
         
-        # Test V1 API (deprecated but maybe better data?)
-        try:
-            print("📊 Testing V1 API...")
-            v1_payload = {
-                "domains": [domain],
-                "organizations": [{"domain": domain, "externalID": "test_v1"}],
-                "name": "Data Quality Test V1"
-            }
-            
-            v1_start_response = await api_client.make_surfe_request(
-                "POST", 
-                "/v1/organizations/enrichments/bulk", 
-                api_key, 
-                json_data=v1_payload
-            )
-            print(f"V1 Start Response: {v1_start_response}")
-            
-            if v1_start_response and "id" in v1_start_response:
-                # Poll V1 status
-                v1_job_id = v1_start_response["id"]
-                print(f"V1 Job ID: {v1_job_id}")
-                
-                for attempt in range(10):  # Shorter polling for test
-                    await asyncio.sleep(2)
-                    v1_status = await api_client.make_surfe_request(
-                        "GET", 
-                        f"/v1/organizations/enrichments/bulk/{v1_job_id}", 
-                        api_key
-                    )
-                    print(f"V1 Attempt {attempt + 1}: {v1_status}")
-                    
-                    if v1_status and "organizations" in v1_status:
-                        results["v1_result"] = v1_status
-                        break
-                        
-        except Exception as e:
-            print(f"V1 API Error: {e}")
-            results["v1_result"] = {"error": str(e)}
-        
-        # Test V2 API (current)
-        try:
-            print("📊 Testing V2 API...")
-            v2_payload = {
-                "companies": [{"domain": domain, "externalID": "test_v2"}]
-            }
-            
-            v2_start_response = await api_client.make_surfe_request(
-                "POST", 
-                "/v2/companies/enrich", 
-                api_key, 
-                json_data=v2_payload
-            )
-            print(f"V2 Start Response: {v2_start_response}")
-            
-            if v2_start_response and "enrichmentID" in v2_start_response:
-                # Poll V2 status
-                v2_job_id = v2_start_response["enrichmentID"]
-                print(f"V2 Job ID: {v2_job_id}")
-                
-                for attempt in range(10):  # Shorter polling for test
-                    await asyncio.sleep(2)
-                    v2_status = await api_client.make_surfe_request(
-                        "GET", 
-                        f"/v2/companies/enrich/{v2_job_id}", 
-                        api_key
-                    )
-                    print(f"V2 Attempt {attempt + 1}: {v2_status}")
-                    
-                    if v2_status and "companies" in v2_status:
-                        results["v2_result"] = v2_status
-                        break
-                        
-        except Exception as e:
-            print(f"V2 API Error: {e}")
-            results["v2_result"] = {"error": str(e)}
+        # Both API versions run at the same time (deprecated V1 bulk vs. current V2)
+        v1_run, v2_run = await asyncio.gather(
+            run_variant_chunk("v1", [(0, domain)]),
+            run_variant_chunk("v2", [(0, domain)])
+        )
+        results["v1_result"] = _raw_result(v1_run)
+        results["v2_result"] = _raw_result(v2_run)
+        print(f"📊 V1 finished in {v1_run['latency_ms']}ms, V2 in {v2_run['latency_ms']}ms")
         
         # Compare results
         comparison = {}
-        
-        # Extract V1 data
-        v1_company = None
-        if results["v1_result"] and "organizations" in results["v1_result"]:
-            orgs = results["v1_result"]["organizations"]
-            if orgs and len(orgs) > 0:
-                v1_company = orgs[0]
-        
-        # Extract V2 data  
-        v2_company = None
-        if results["v2_result"] and "companies" in results["v2_result"]:
-            companies = results["v2_result"]["companies"]
-            if companies and len(companies) > 0:
-                v2_company = companies[0]
+        v1_company = _first_record(v1_run)
+        v2_company = _first_record(v2_run)
         
         if v1_company and v2_company:
             comparison = {
@@ -195,109 +141,24 @@ async def test_linkedin_enrichment(
     try:
         print(f"🔍 Testing LinkedIn URL: {request.linkedinUrl}")
         
-        # Test LinkedIn URL enrichment
-        try:
-            print("🔗 Testing LinkedIn URL enrichment...")
-            linkedin_payload = {
-                "companies": [
-                    {
-                        "linkedinUrl": request.linkedinUrl,
-                        "externalID": "test_linkedin"
-                    }
-                ]
-            }
-            
-            linkedin_start_response = await api_client.make_surfe_request(
-                "POST", 
-                "/v2/companies/enrich", 
-                api_key, 
-                json_data=linkedin_payload
-            )
-            print(f"LinkedIn Start Response: {linkedin_start_response}")
-            
-            if linkedin_start_response and "enrichmentID" in linkedin_start_response:
-                linkedin_job_id = linkedin_start_response["enrichmentID"]
-                print(f"LinkedIn Job ID: {linkedin_job_id}")
-                
-                # Poll for results
-                for attempt in range(10):
-                    await asyncio.sleep(3)
-                    linkedin_status = await api_client.make_surfe_request(
-                        "GET", 
-                        f"/v2/companies/enrich/{linkedin_job_id}", 
-                        api_key
-                    )
-                    print(f"LinkedIn Attempt {attempt + 1}: {linkedin_status}")
-                    
-                    if linkedin_status and "companies" in linkedin_status:
-                        results["linkedin_result"] = linkedin_status
-                        print("✅ LinkedIn enrichment completed")
-                        break
-                        
-        except Exception as e:
-            print(f"LinkedIn enrichment error: {e}")
-            results["linkedin_result"] = {"error": str(e)}
-        
-        # Test Domain enrichment (if domain provided)
+        # LinkedIn URL and domain enrichment run at the same time
+        runs = [run_variant_chunk("linkedin", [(0, request.linkedinUrl)])]
         if request.domain:
-            try:
-                print(f"🌐 Testing domain enrichment for: {request.domain}")
-                domain_payload = {
-                    "companies": [
-                        {
-                            "domain": request.domain,
-                            "externalID": "test_domain"
-                        }
-                    ]
-                }
-                
-                domain_start_response = await api_client.make_surfe_request(
-                    "POST", 
-                    "/v2/companies/enrich", 
-                    api_key, 
-                    json_data=domain_payload
-                )
-                print(f"Domain Start Response: {domain_start_response}")
-                
-                if domain_start_response and "enrichmentID" in domain_start_response:
-                    domain_job_id = domain_start_response["enrichmentID"]
-                    print(f"Domain Job ID: {domain_job_id}")
-                    
-                    # Poll for results
-                    for attempt in range(10):
-                        await asyncio.sleep(3)
-                        domain_status = await api_client.make_surfe_request(
-                            "GET", 
-                            f"/v2/companies/enrich/{domain_job_id}", 
-                            api_key
-                        )
-                        print(f"Domain Attempt {attempt + 1}: {domain_status}")
-                        
-                        if domain_status and "companies" in domain_status:
-                            results["domain_result"] = domain_status
-                            print("✅ Domain enrichment completed")
-                            break
-                            
-            except Exception as e:
-                print(f"Domain enrichment error: {e}")
-                results["domain_result"] = {"error": str(e)}
+            runs.append(run_variant_chunk("domain", [(0, request.domain)]))
+        linkedin_run, *domain_runs = await asyncio.gather(*runs)
+        domain_run = domain_runs[0] if domain_runs else None
         
-        # Compare results
-        comparison = {}
+        results["linkedin_result"] = _raw_result(linkedin_run)
+        linkedin_company = _first_record(linkedin_run)
+        print(f"🔗 LinkedIn enrichment finished in {linkedin_run['latency_ms']}ms")
         
-        # Extract LinkedIn result
-        linkedin_company = None
-        if results["linkedin_result"] and "companies" in results["linkedin_result"]:
-            companies = results["linkedin_result"]["companies"]
-            if companies and len(companies) > 0:
-                linkedin_company = companies[0]
-        
-        # Extract Domain result
         domain_company = None
-        if results["domain_result"] and "companies" in results["domain_result"]:
-            companies = results["domain_result"]["companies"]
-            if companies and len(companies) > 0:
-                domain_company = companies[0]
+        if domain_run:
+            results["domain_result"] = _raw_result(domain_run)
+            domain_company = _first_record(domain_run)
+            print(f"🌐 Domain enrichment finished in {domain_run['latency_ms']}ms")
+        
+        comparison = {}
         
         # Build comparison
         if linkedin_company:
@@ -347,6 +208,56 @@ async def test_linkedin_enrichment(
         print(f"🚨 Error in LinkedIn test: {e}")
         raise HTTPException(status_code=500, detail={"error": str(e), "results": results})
 
+@router.post("/compare-api-versions/batch", response_model=res_models.JobStatusResponse)
+async def start_api_version_quality_study(
+    request: DomainBatchTestRequest,
+    background_tasks_runner: BackgroundTasks,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    V1 vs. V2 company enrichment over many domains as one background job. Both versions
+    run as concurrent bulk jobs; poll GET /api/test/quality-study/{job_id} for per-field
+    fill rates, V1/V2 agreement rates, job latency and a per-domain verdict.
+    """
+    domains = list(dict.fromkeys(d for d in (normalize_domain(d) for d in request.domains) if d))
+    if not domains:
+        raise HTTPException(status_code=400, detail={"error": "No valid domains provided."})
+    job_id = str(uuid4())
+    job_manager.create_job(job_id)
+    background_tasks_runner.add_task(
+        run_quality_study_job, job_id, [{"domain": d} for d in domains], ("v1", "v2"), request.chunkSize
+    )
+    logger.info(f"🔬 V1 vs V2 quality study {job_id} queued ({len(domains)} domains)")
+    return {"job_id": job_id, "status": "pending"}
+
+@router.post("/linkedin-enrichment/batch", response_model=res_models.JobStatusResponse)
+async def start_linkedin_quality_study(
+    request: LinkedInBatchTestRequest,
+    background_tasks_runner: BackgroundTasks,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    LinkedIn URL vs. domain enrichment over many companies as one background job
+    (items without a domain only run the LinkedIn variant).
+    """
+    items = [
+        {"linkedinUrl": item.linkedinUrl, "domain": normalize_domain(item.domain) if item.domain else None}
+        for item in request.items
+    ]
+    job_id = str(uuid4())
+    job_manager.create_job(job_id)
+    background_tasks_runner.add_task(run_quality_study_job, job_id, items, ("linkedin", "domain"), request.chunkSize)
+    logger.info(f"🔬 LinkedIn vs domain quality study {job_id} queued ({len(items)} companies)")
+    return {"job_id": job_id, "status": "pending"}
+
+@router.get("/quality-study/{job_id}", response_model=res_models.JobStatusResponse)
+async def get_quality_study_status(job_id: str):
+    """Study progress while running (result.progress); the aggregated report once done."""
+    job = job_manager.get_job(job_id)
+    if job["status"] == "not_found":
+        raise HTTPException(status_code=404, detail={"error": "Job not found"})
+    return {"job_id": job_id, **job}
+
 def determine_better_quality(v1_data: Optional[Dict[str, Any]], v2_data: Optional[Dict[str, Any]]) -> str:
     """Determine which API version has better data quality"""
     if not v1_data and not v2_data:
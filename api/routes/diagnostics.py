@@ -1,7 +1,14 @@
 # api/routes/diagnostics.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from utils.api_client import surfe_client, SURFE_API_KEYS, SURFE_API_BASE_URL
+from core.filter_catalog import filter_catalog
+from core.probes import iter_probes, run_probes
+from core.key_prober import key_prober
+from core.benchmark import run_benchmark, compare_runs, benchmark_baselines
+from core.dependencies import require_admin_token
+from api.models import requests as req_models
 from api.models import responses as res_models
+from fastapi.responses import StreamingResponse
 import logging
 import aiohttp
 import asyncio
@@ -10,7 +17,7 @@ import ssl
 import time
 import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 
 print("Loading enhanced diagnostics.py") # DEBUG PRINT
 
@@ -18,34 +25,36 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/diagnostics", tags=["Diagnostics"])
 
-async def quick_connectivity_test():
-    """Quick connectivity test for network issues"""
-    results = {
-        "dns_test": {},
-        "http_test": {},
-        "ssl_test": {},
-        "timestamp": datetime.now().isoformat()
-    }
-    
-    # DNS Test
+async def _dns_test(host: str = "api.surfe.com") -> Dict[str, Any]:
+    """Resolve through the event loop's resolver (thread pool) so DNS never blocks the loop"""
     try:
         start_time = time.time()
-        ip_addresses = socket.gethostbyname_ex("api.surfe.com")[2]
+        loop = asyncio.get_running_loop()
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(host, 443, family=socket.AF_INET, type=socket.SOCK_STREAM),
+            timeout=5
+        )
         dns_time = (time.time() - start_time) * 1000
-        results["dns_test"] = {
+        return {
             "success": True,
-            "ip_addresses": ip_addresses,
+            "ip_addresses": list(dict.fromkeys(info[4][0] for info in infos)),
             "resolution_time_ms": round(dns_time, 2),
             "error": None
         }
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "error": f"DNS resolution of {host} timed out after 5s",
+            "error_type": "TimeoutError"
+        }
     except Exception as e:
-        results["dns_test"] = {
+        return {
             "success": False,
             "error": str(e),
             "error_type": type(e).__name__
         }
-    
-    # HTTP Test
+
+async def _http_test() -> Dict[str, Any]:
     try:
         start_time = time.time()
         timeout = aiohttp.ClientTimeout(total=10, connect=5)
@@ -53,7 +62,7 @@ async def quick_connectivity_test():
         async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.get("https://api.surfe.com") as response:
                 http_time = (time.time() - start_time) * 1000
-                results["http_test"] = {
+                return {
                     "success": True,
                     "status_code": response.status,
                     "response_time_ms": round(http_time, 2),
@@ -61,11 +70,22 @@ async def quick_connectivity_test():
                     "error": None
                 }
     except Exception as e:
-        results["http_test"] = {
+        return {
             "success": False,
             "error": str(e),
             "error_type": type(e).__name__
         }
+
+async def quick_connectivity_test():
+    """Quick connectivity test for network issues (DNS and HTTP checks run concurrently)"""
+    results = {
+        "dns_test": {},
+        "http_test": {},
+        "ssl_test": {},
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    results["dns_test"], results["http_test"] = await asyncio.gather(_dns_test(), _http_test())
     
     # SSL Test
     try:
@@ -81,10 +101,21 @@ async def quick_connectivity_test():
     
     return results
 
+def _endpoint_probe(method: str, endpoint: str, payload: Any):
+    """Probe factory for one upstream endpoint (short timeout/retries to fit the diagnosis deadline)"""
+    return lambda: surfe_client.make_request_with_rotation(
+        method, endpoint, json_data=payload if method != "GET" else None, timeout=10, max_retries=2
+    )
+
 @router.get("/filters", response_model=res_models.GenericResponse)
 async def get_available_filters():
     """Get available search filters from Surfe API with enhanced error handling"""
     try:
+        # Served from the filter catalog cache (refreshed in the background); the
+        # connectivity test below only runs when the catalog can't be loaded
+        if await filter_catalog.ensure_loaded():
+            return {"success": True, "data": filter_catalog.raw}
+
         logger.info("🔍 Getting available filters from Surfe API with rotation")
         
         # Test connectivity first
@@ -438,40 +469,39 @@ async def test_different_endpoints():
         
         base_results = {}
 
-        for endpoint, method, payload in endpoints:
-            try:
-                # Use rotation system for all tests
-                if method == "GET":
-                    result = await surfe_client.make_request_with_rotation("GET", endpoint)
-                else:
-                    result = await surfe_client.make_request_with_rotation("POST", endpoint, json_data=payload)
-                
-                success = "error" not in result
-                
-                base_results[f"{method} {endpoint}"] = {
-                    "status_code": 200 if success else 400,
-                    "success": success,
-                    "response_time_ms": 50,  # Approximate
-                    "response_preview": str(result)[:150] if success else result.get("error", "Unknown error"),
-                    "error": None if success else result.get("error", "Request failed")
-                }
-                
-                if success:
-                    working_combinations.append({
-                        "base_url": SURFE_API_BASE_URL,
-                        "endpoint": endpoint,
-                        "method": method,
-                        "full_url": f"{SURFE_API_BASE_URL}{endpoint}",
-                        "status_code": 200
-                    })
-                        
-            except Exception as e:
-                base_results[f"{method} {endpoint}"] = {
+        # All endpoints are probed concurrently (core/probes.py)
+        probes = [(f"{method} {endpoint}", _endpoint_probe(method, endpoint, payload)) for endpoint, method, payload in endpoints]
+        for probe in await run_probes(probes):
+            method, endpoint = probe["name"].split(" ", 1)
+            if not probe["ok"]:
+                base_results[probe["name"]] = {
                     "status_code": None,
                     "success": False,
-                    "error": str(e),
-                    "error_type": type(e).__name__
+                    "response_time_ms": probe["elapsed_ms"],
+                    "error": probe["error"],
+                    "error_type": probe["error_type"]
                 }
+                continue
+
+            result = probe["result"]
+            success = "error" not in result
+            
+            base_results[probe["name"]] = {
+                "status_code": 200 if success else result.get("status_code", 400),
+                "success": success,
+                "response_time_ms": probe["elapsed_ms"],
+                "response_preview": str(result)[:150] if success else result.get("error", "Unknown error"),
+                "error": None if success else result.get("error", "Request failed")
+            }
+            
+            if success:
+                working_combinations.append({
+                    "base_url": SURFE_API_BASE_URL,
+                    "endpoint": endpoint,
+                    "method": method,
+                    "full_url": f"{SURFE_API_BASE_URL}{endpoint}",
+                    "status_code": 200
+                })
 
         results[SURFE_API_BASE_URL] = base_results
         
@@ -503,6 +533,83 @@ async def test_different_endpoints():
             "error": f"Endpoint testing failed: {str(e)}"
         }
 
+@router.get("/key-health", response_model=res_models.GenericResponse)
+async def check_key_health():
+    """Probe every API key with a lightweight request (all keys concurrently)"""
+    started = time.time()
+    result = await surfe_client.health_check()
+    result["wall_time_ms"] = round((time.time() - started) * 1000, 2)
+    return {"success": True, "data": result}
+
+@router.get("/key-prober", response_model=res_models.GenericResponse)
+async def get_key_prober_status():
+    """Background key prober state: per-key last probe outcome and next scheduled probe"""
+    return {"success": True, "data": key_prober.get_stats()}
+
+@router.post("/key-prober/run", response_model=res_models.GenericResponse)
+async def run_key_prober_now():
+    """Probe every API key now and apply the results to the key rotation"""
+    started = time.time()
+    outcomes = await key_prober.probe_all()
+    return {
+        "success": True,
+        "data": {
+            "outcomes": outcomes,
+            "wall_time_ms": round((time.time() - started) * 1000, 2),
+            "key_stats": surfe_client.get_stats()
+        }
+    }
+
+@router.post("/benchmark", response_model=res_models.GenericResponse)
+async def run_latency_benchmark(request: req_models.BenchmarkRequest, _admin: None = Depends(require_admin_token)):
+    """
+    Sustained-load latency benchmark (p50/p90/p99/max, throughput, errors) per endpoint and per key.
+    Targets are limited to read-only lookups and searches (core.benchmark.BENCHMARK_ENDPOINTS).
+    Admin only: needs the X-Admin-Token header (see ADMIN_API_TOKEN).
+    """
+    baseline = None
+    if request.compareTo:
+        baseline = benchmark_baselines.get(request.compareTo)
+        if baseline is None:
+            raise HTTPException(status_code=404, detail={"error": f"Benchmark baseline '{request.compareTo}' not found."})
+
+    targets = [
+        {
+            "name": target.name or f"{target.method} {target.endpoint}",
+            "method": target.method,
+            "endpoint": target.endpoint,
+            "json": target.payload,
+            "params": target.params
+        }
+        for target in request.targets
+    ]
+    try:
+        run = await run_benchmark(
+            targets, request.concurrency, request.requests, request.durationSeconds,
+            key_suffix=request.key, timeout=request.timeout
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e)})
+
+    data = {"run": run}
+    if baseline is not None:
+        data["comparison"] = compare_runs(run, baseline)
+    if request.saveBaseline:
+        benchmark_baselines.save(request.saveBaseline, run)
+        data["saved_as"] = request.saveBaseline
+    return {"success": True, "data": data}
+
+@router.get("/benchmark/baselines", response_model=res_models.GenericResponse)
+async def list_benchmark_baselines():
+    """Saved benchmark baselines with their headline numbers"""
+    return {"success": True, "data": {"baselines": benchmark_baselines.list()}}
+
+@router.delete("/benchmark/baselines/{name}", response_model=res_models.GenericResponse)
+async def delete_benchmark_baseline(name: str, _admin: None = Depends(require_admin_token)):
+    if not benchmark_baselines.delete(name):
+        raise HTTPException(status_code=404, detail={"error": f"Benchmark baseline '{name}' not found."})
+    return {"success": True, "data": {"deleted": name}}
+
 @router.post("/reset-keys", response_model=res_models.GenericResponse)
 async def reset_api_keys():
     """Reset all API key cooldowns (emergency use)"""
@@ -531,11 +638,8 @@ async def run_full_diagnosis():
     try:
         logger.info("🔍 Running full system diagnosis")
         
-        # Run all diagnostic tests
-        connectivity = await quick_connectivity_test()
-        
-        # Test API key
-        api_test_result = await test_api_key()
+        # Run the connectivity and API key tests concurrently
+        connectivity, api_test_result = await asyncio.gather(quick_connectivity_test(), test_api_key())
         
         # Get statistics
         stats = surfe_client.get_stats()
@@ -588,9 +692,95 @@ async def run_full_diagnosis():
         }
 
 # diagnostics.py - Categorized endpoint testing
+COMPREHENSIVE_ENDPOINTS = {
+    "info_endpoints": [
+        ("/v1/people/search/filters", "GET", None, "Get people search filters"),
+        ("/v1/credits", "GET", None, "Check credit balance")
+    ],
+    
+    "search_endpoints": [
+        ("/v2/people/search", "POST", {
+            "companies": {"countries": ["US"], "industries": ["Software"]},
+            "limit": 1,
+            "people": {"departments": ["Management"]},
+            "peoplePerCompany": 1
+        }, "Search for people"),
+        
+        ("/v2/companies/search", "POST", {
+            "filters": {
+                "countries": ["US"],
+                "industries": ["Software"],
+                "employeeCount": {"from": 1, "to": 100}
+            },
+            "limit": 1
+        }, "Search for companies")
+    ],
+    
+    "enrichment_endpoints": [
+        ("/v2/people/enrich", "POST", {
+            "include": {"email": True, "mobile": False},
+            "people": [{
+                "firstName": "Test",
+                "lastName": "User",
+                "companyName": "Test Company"
+            }]
+        }, "Enrich people data"),
+        
+        ("/v2/companies/enrich", "POST", {
+            "companies": [{"domain": "example.com"}]
+        }, "Enrich company data")
+    ],
+    
+    "advanced_endpoints": [
+        ("/v1/organizations/lookalikes", "POST", {
+            "domains": ["microsoft.com"],
+            "filters": {"industries": ["Software"]},
+            "maxResults": 1
+        }, "Find lookalike companies")
+    ]
+}
+
+def _comprehensive_probes():
+    """(category, endpoint, method, description) per probe, plus the probes themselves"""
+    specs = []
+    probes = []
+    for category, endpoints in COMPREHENSIVE_ENDPOINTS.items():
+        for endpoint, method, payload, description in endpoints:
+            specs.append((category, endpoint, method, description))
+            probes.append((f"{method} {endpoint}", _endpoint_probe(method, endpoint, payload)))
+    return specs, probes
+
+def _format_endpoint_probe(spec, probe: Dict[str, Any]) -> Dict[str, Any]:
+    category, endpoint, method, description = spec
+    if not probe["ok"]:
+        return {
+            "description": description,
+            "success": False,
+            "response_time_ms": probe["elapsed_ms"],
+            "error": probe["error"],
+            "error_type": probe["error_type"]
+        }
+    result = probe["result"]
+    success = "error" not in result
+    return {
+        "description": description,
+        "success": success,
+        "status_code": 200 if success else result.get("status_code", 400),
+        "response_time_ms": probe["elapsed_ms"],
+        "response_preview": str(result)[:100] if success else result.get("error", "Unknown error"),
+        "error": None if success else result.get("error", "Request failed")
+    }
+
+def _endpoint_recommendations(working: int, total_tests: int):
+    if working == 0:
+        return ["No endpoints working - check API keys and network connectivity"]
+    if working < total_tests / 2:
+        return ["Some endpoints failing - check API key permissions"]
+    return [f"System healthy - {working}/{total_tests} endpoints working"]
+
 @router.post("/test-endpoints-comprehensive", response_model=res_models.GenericResponse)
 async def test_comprehensive_endpoints():
-    """Test all major Surfe API endpoints by category"""
+    """Test all major Surfe API endpoints by category (all probes run concurrently)"""
     try:
         logger.info("🧪 Running comprehensive endpoint testing")
         
@@ -601,107 +791,24 @@ async def test_comprehensive_endpoints():
                 "error": "No API keys available for testing"
             }
         
-        # Categorized endpoint testing
-        endpoint_categories = {
-            "info_endpoints": [
-                ("/v1/people/search/filters", "GET", None, "Get people search filters"),
-                ("/v1/credits", "GET", None, "Check credit balance")
-            ],
-            
-            "search_endpoints": [
-                ("/v2/people/search", "POST", {
-                    "companies": {"countries": ["US"], "industries": ["Software"]},
-                    "limit": 1,
-                    "people": {"departments": ["Management"]},
-                    "peoplePerCompany": 1
-                }, "Search for people"),
-                
-                ("/v2/companies/search", "POST", {
-                    "filters": {
-                        "countries": ["US"],
-                        "industries": ["Software"],
-                        "employeeCount": {"from": 1, "to": 100}
-                    },
-                    "limit": 1
-                }, "Search for companies")
-            ],
-            
-            "enrichment_endpoints": [
-                ("/v2/people/enrich", "POST", {
-                    "include": {"email": True, "mobile": False},
-                    "people": [{
-                        "firstName": "Test",
-                        "lastName": "User",
-                        "companyName": "Test Company"
-                    }]
-                }, "Enrich people data"),
-                
-                ("/v2/companies/enrich", "POST", {
-                    "companies": [{"domain": "example.com"}]
-                }, "Enrich company data")
-            ],
-            
-            "advanced_endpoints": [
-                ("/v1/organizations/lookalikes", "POST", {
-                    "domains": ["microsoft.com"],
-                    "filters": {"industries": ["Software"]},
-                    "maxResults": 1
-                }, "Find lookalike companies")
-            ]
-        }
-        
-        results_by_category = {}
+        specs, probes = _comprehensive_probes()
+        started = time.time()
+        results_by_category = {category: {} for category in COMPREHENSIVE_ENDPOINTS}
         working_endpoints = []
-        total_tests = 0
-        
-        for category, endpoints in endpoint_categories.items():
-            category_results = {}
-            
-            for endpoint, method, payload, description in endpoints:
-                total_tests += 1
-                
-                try:
-                    if method == "GET":
-                        result = await surfe_client.make_request_with_rotation("GET", endpoint)
-                    else:
-                        result = await surfe_client.make_request_with_rotation("POST", endpoint, json_data=payload)
-                    
-                    success = "error" not in result
-                    
-                    category_results[f"{method} {endpoint}"] = {
-                        "description": description,
-                        "success": success,
-                        "status_code": 200 if success else result.get("status_code", 400),
-                        "response_preview": str(result)[:100] if success else result.get("error", "Unknown error"),
-                        "error": None if success else result.get("error", "Request failed")
-                    }
-                    
-                    if success:
-                        working_endpoints.append({
-                            "category": category,
-                            "endpoint": endpoint,
-                            "method": method,
-                            "description": description
-                        })
-                        
-                except Exception as e:
-                    category_results[f"{method} {endpoint}"] = {
-                        "description": description,
-                        "success": False,
-                        "error": str(e),
-                        "error_type": type(e).__name__
-                    }
-            
-            results_by_category[category] = category_results
-        
-        # Generate recommendations
-        recommendations = []
-        if len(working_endpoints) == 0:
-            recommendations.append("No endpoints working - check API keys and network connectivity")
-        elif len(working_endpoints) < total_tests / 2:
-            recommendations.append("Some endpoints failing - check API key permissions")
-        else:
-            recommendations.append(f"System healthy - {len(working_endpoints)}/{total_tests} endpoints working")
+        total_tests = len(probes)
+        
+        for probe in await run_probes(probes):
+            spec = specs[probe["index"]]
+            category, endpoint, method, description = spec
+            entry = _format_endpoint_probe(spec, probe)
+            results_by_category[category][f"{method} {endpoint}"] = entry
+            if entry["success"]:
+                working_endpoints.append({
+                    "category": category,
+                    "endpoint": endpoint,
+                    "method": method,
+                    "description": description
+                })
         
         return {
             "success": True,
@@ -712,9 +819,10 @@ async def test_comprehensive_endpoints():
                     "total_tests": total_tests,
                     "working_endpoints": len(working_endpoints),
                     "success_rate": round((len(working_endpoints) / total_tests) * 100) if total_tests > 0 else 0,
-                    "categories_tested": len(endpoint_categories)
+                    "categories_tested": len(COMPREHENSIVE_ENDPOINTS),
+                    "wall_time_ms": round((time.time() - started) * 1000, 2)
                 },
-                "recommendations": recommendations,
+                "recommendations": _endpoint_recommendations(len(working_endpoints), total_tests),
                 "api_key_used": surfe_client.get_last_api_key_masked()
             }
         }
@@ -724,4 +832,33 @@ async def test_comprehensive_endpoints():
         return {
             "success": False,
             "error": f"Comprehensive endpoint testing failed: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+@router.post("/test-endpoints-comprehensive/stream")
+async def stream_comprehensive_endpoints():
+    """
+    Same probes as /test-endpoints-comprehensive, streamed as NDJSON: one line per endpoint
+    as soon as its probe finishes, then a {"_meta": {...}} summary line.
+    """
+    specs, probes = _comprehensive_probes()
+
+    async def generate() -> AsyncIterator[str]:
+        if surfe_client.get_stats()["available_keys"] == 0:
+            yield json.dumps({"_error": {"error": "No API keys available for testing"}}) + "\n"
+            return
+        started = time.time()
+        working = 0
+        async for probe in iter_probes(probes):
+            category, endpoint, method, _ = specs[probe["index"]]
+            entry = _format_endpoint_probe(specs[probe["index"]], probe)
+            working += entry["success"]
+            yield json.dumps({"category": category, "endpoint": endpoint, "method": method, **entry}, default=str) + "\n"
+        yield json.dumps({"_meta": {
+            "total_tests": len(probes),
+            "working_endpoints": working,
+            "wall_time_ms": round((time.time() - started) * 1000, 2),
+            "recommendations": _endpoint_recommendations(working, len(probes)),
+            "api_key_used": surfe_client.get_last_api_key_masked()
+        }}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,207 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from api.models import requests as req_models, responses as res_models
+from api.routes.company_search import build_company_search_payload
+from core import job_manager
+from core.csv_merge import build_result_index, iter_merged_csv, merge_sources
+from core.dependencies import get_api_key
+from core.search_pagination import SearchPaginator
+from utils.csv_export import gzip_chunks, iter_csv, resolve_columns
+from utils import columnar_export
+from utils.quality_report import quality_report
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import logging
+import time
+
+print("Loading export.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+PEOPLE_PAGE_SIZE = 100
+MAX_EXPORT_RECORDS = 50000
+
+
+def _resolve_columns_or_400(columns: Optional[str], preset: Optional[str]):
+    try:
+        return resolve_columns(columns, preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"error": str(e)})
+
+
+def _csv_response(records, columns, filename_prefix: str, gzip: bool) -> StreamingResponse:
+    """Wrap a record iterator in a streaming CSV (optionally gzip) download."""
+    chunks: AsyncIterator[bytes] = iter_csv(records, columns)
+    filename = f"{filename_prefix}-{datetime.now().strftime('%Y-%m-%d')}.csv"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="text/csv; charset=utf-8", headers=headers)
+
+
+async def _paginated_records(paginator: SearchPaginator) -> AsyncIterator[Dict[str, Any]]:
+    async for record in paginator.records():
+        yield record
+    if paginator.error:
+        # Headers are already sent, so the CSV simply ends early; log why.
+        logger.warning(f"❌ Export stopped on upstream error: {paginator.error}")
+    logger.info(f"📤 Export finished: {paginator.summary()}")
+
+
+@router.post("/companies/search")
+async def export_company_search(
+    request: req_models.CompanySearchStreamRequest,
+    http_request: Request,
+    preset: Optional[str] = Query("companies"),
+    columns: Optional[str] = Query(None, description='Comma-separated "Header=path" entries'),
+    gzip: bool = Query(False),
+    api_key: str = Depends(get_api_key)
+):
+    """Export every company matching the search (up to maxRecords) as a streamed CSV."""
+    column_spec = _resolve_columns_or_400(columns, preset)
+    api_payload = build_company_search_payload(request)
+
+    paginator = SearchPaginator(
+        "/v2/companies/search",
+        api_payload,
+        result_key="companies",
+        max_records=request.maxRecords,
+        page_size=request.limit,
+        is_disconnected=http_request.is_disconnected,
+        timeout=20
+    )
+    return _csv_response(_paginated_records(paginator), column_spec, "company-search", gzip)
+
+
+@router.post("/people/search")
+async def export_people_search(
+    payload: Dict[str, Any],
+    http_request: Request,
+    max_records: int = Query(1000, ge=1, le=MAX_EXPORT_RECORDS),
+    preset: Optional[str] = Query("peoples_hotel"),
+    columns: Optional[str] = Query(None, description='Comma-separated "Header=path" entries'),
+    gzip: bool = Query(False),
+    api_key: str = Depends(get_api_key)
+):
+    """Export every person matching a Surfe v2 people search payload as a streamed CSV."""
+    column_spec = _resolve_columns_or_400(columns, preset)
+
+    page_size = min(int(payload.get("limit") or PEOPLE_PAGE_SIZE), PEOPLE_PAGE_SIZE)
+    paginator = SearchPaginator(
+        "/v2/people/search",
+        payload,
+        result_key="people",
+        max_records=max_records,
+        page_size=page_size,
+        is_disconnected=http_request.is_disconnected
+    )
+    return _csv_response(_paginated_records(paginator), column_spec, "people-search", gzip)
+
+
+def _completed_job_records(job_id: str) -> Tuple[List[Dict[str, Any]], str]:
+    """(result records, "people" | "companies") of a finished job; 404/409 otherwise."""
+    job = job_manager.get_job(job_id)
+    if job["status"] == "not_found":
+        raise HTTPException(status_code=404, detail={"error": "Job not found"})
+    if job["status"] not in ("completed", "partially_completed"):
+        raise HTTPException(status_code=409, detail={"error": f"Job is not completed (status: {job['status']})"})
+
+    result = job.get("result") or {}
+    for key in ("people", "companies", "organizations"):
+        if isinstance(result.get(key), list):
+            return result[key], "people" if key == "people" else "companies"
+    return [], "people"
+
+
+@router.get("/jobs/{job_id}/quality", response_model=res_models.GenericResponse)
+async def job_quality_report(job_id: str, api_key: str = Depends(get_api_key)):
+    """
+    Field-completeness report for a finished enrichment job: fill rate per field,
+    email/phone presence (people), completeness score distribution, employee count
+    bands and top industries.
+    """
+    records, kind = _completed_job_records(job_id)
+    started = time.monotonic()
+    report = quality_report(records, kind)
+    report["elapsed_ms"] = round((time.monotonic() - started) * 1000, 2)
+    logger.info(f"📊 Quality report for job {job_id}: {len(records)} {kind} in {report['elapsed_ms']}ms ({report['engine']})")
+    return {"success": True, "data": report}
+
+
+@router.get("/jobs/{job_id}")
+async def export_job_results(
+    job_id: str,
+    format: str = Query("csv", description="csv, parquet or arrow (Arrow IPC stream)"),
+    preset: Optional[str] = Query(None),
+    columns: Optional[str] = Query(None, description='Comma-separated "Header=path" entries'),
+    gzip: bool = Query(False),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Export the results of a completed enrichment job. CSV honours preset/columns;
+    parquet and arrow use the fixed EnrichedPerson / EnrichedCompany schema.
+    """
+    if format != "csv" and format not in columnar_export.COLUMNAR_FORMATS:
+        raise HTTPException(status_code=400, detail={"error": f"Unknown format '{format}'. Use csv, parquet or arrow."})
+    if format != "csv" and not columnar_export.is_available():
+        raise HTTPException(status_code=501, detail={"error": "Parquet/Arrow export requires pyarrow (pip install pyarrow)"})
+    column_spec = _resolve_columns_or_400(columns, preset) if format == "csv" else None
+
+    records, kind = _completed_job_records(job_id)
+    model = res_models.EnrichedPerson if kind == "people" else res_models.EnrichedCompany
+
+    if format == "csv":
+        return _csv_response(records, column_spec, f"enrichment-{job_id}", gzip)
+
+    media_type, extension = columnar_export.COLUMNAR_FORMATS[format]
+    writer = columnar_export.iter_parquet if format == "parquet" else columnar_export.iter_arrow_stream
+    logger.info(f"📤 Exporting {len(records)} records from job {job_id} as {format}")
+    return StreamingResponse(
+        writer(records, model),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="enrichment-{job_id}.{extension}"'}
+    )
+
+
+@router.get("/uploads/{upload_id}/merged")
+async def export_merged_upload(
+    upload_id: str,
+    columns: Optional[str] = Query(None, description='Enrichment columns to append, comma-separated "Header=path" entries'),
+    gzip: bool = Query(False),
+    api_key: str = Depends(get_api_key)
+):
+    """
+    The uploaded CSV with enrichment columns appended: every non-blank original row, in order,
+    joined to its result by the row ID sent as externalID, plus an Enrichment Status column.
+    Blank lines are dropped on upload and never get a row ID, so they are not in the output.
+    """
+    column_spec = _resolve_columns_or_400(columns, None)
+    source = merge_sources.get(upload_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail={"error": "Upload not found or expired"})
+
+    records: List[Dict[str, Any]] = []
+    for job_id in source.job_ids:
+        job = job_manager.get_job(job_id)
+        if job["status"] in ("pending", "running"):
+            raise HTTPException(
+                status_code=409,
+                detail={"error": f"Job {job_id} is not finished (status: {job['status']})", **source.info()}
+            )
+        people = (job.get("result") or {}).get("people")
+        if isinstance(people, list):
+            records.extend(people)
+    # Failed jobs contribute no results; their rows come out as not_found
+
+    index = build_result_index(records)
+    logger.info(f"📎 Merging {len(index)} results into upload {upload_id} ({source.size} bytes)")
+    name = (source.filename or "upload.csv").rsplit(".", 1)[0]
+    headers = {"Content-Disposition": f'attachment; filename="{name}-enriched.csv"'}
+    chunks: AsyncIterator[bytes] = iter_merged_csv(source, index, column_spec)
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="text/csv; charset=utf-8", headers=headers)
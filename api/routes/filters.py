@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Query
+from api.models import responses as res_models
+from core.filter_catalog import filter_catalog
+import logging
+
+print("Loading filters.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/filters", tags=["Filters"])
+
+
+@router.get("", response_model=res_models.GenericResponse)
+async def get_filter_catalog():
+    """The cached upstream filter catalog plus cache status."""
+    await filter_catalog.ensure_loaded()
+    return {"success": True, "data": {"filters": filter_catalog.raw, "status": filter_catalog.get_status()}}
+
+
+@router.get("/suggest", response_model=res_models.GenericResponse)
+async def suggest_filter_values(
+    facet: str = Query(..., description="industries, countries, departments, seniorities, ..."),
+    q: str = Query("", description="Prefix typed by the user"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Autocomplete: top values of a facet starting with q (or with a word starting with q)."""
+    matches = await filter_catalog.suggest(facet, q, limit)
+    if matches is None:
+        available = sorted(filter_catalog.indexes)
+        raise HTTPException(
+            status_code=404,
+            detail={"error": f"Unknown facet '{facet}'", "available_facets": available, "catalog_loaded": filter_catalog.loaded_at is not None}
+        )
+    return {"success": True, "data": matches}
@@ -1,8 +1,16 @@
 # api/routes/people_enrichment.py - Cleaned up imports
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from typing import Optional, Union
 from uuid import uuid4
 from api.models import requests as req_models, responses as res_models
 from core import job_manager, background_tasks
+from core import cost_estimator
+from core.bulk_validation import MAX_PEOPLE_PER_JOB, build_enrichment_payloads, validate_people_columns, validate_people_rows
+from core.csv_upload import PeopleCSVUpload
+from core.csv_merge import merge_sources
+import asyncio
 import logging
 import traceback
 
@@ -11,14 +19,51 @@ print("Loading people_enrichment.py") # DEBUG PRINT
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["People Enrichment"])
 
+# Enrichment tasks started mid-upload (strong references until they finish)
+_upload_tasks = set()
+
 # api/routes/people_enrichment.py - Replace V2 endpoint with rotation
-@router.post("/v2/people/enrich", response_model=res_models.JobStatusResponse)
+@router.post(
+    "/v2/people/enrich",
+    response_model=Union[res_models.JobStatusResponse, res_models.GenericResponse],
+    # The body is parsed in the handler (dry runs accept invalid rows), so document it here
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {
+        "schema": req_models.PeopleEnrichmentRequestV2.model_json_schema()
+    }}}}
+)
 async def start_people_enrichment_v2(
-    request: req_models.PeopleEnrichmentRequestV2,
-    background_tasks_runner: BackgroundTasks
+    http_request: Request,
+    background_tasks_runner: BackgroundTasks,
+    dry_run: bool = Query(False, description="Only estimate records, credits and wall time; submit nothing"),
+    check_credits: bool = Query(False, description="With dry_run: also check the keys' credit balances cover the estimate")
 ):
     """V2 People Enrichment with rotation - no individual API key needed"""
     
+    try:
+        body = await http_request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"error": "Request body must be JSON"})
+
+    if dry_run:
+        # Lenient: invalid rows are counted and reported by index instead of failing the estimate
+        if not isinstance(body, dict) or not isinstance(body.get("people"), list):
+            raise HTTPException(status_code=422, detail={"error": "Body must contain a 'people' list"})
+        try:
+            include = req_models.EnrichmentInclude(**(body.get("include") or {})).model_dump()
+        except (ValidationError, TypeError) as e:
+            raise HTTPException(status_code=422, detail={"error": f"Invalid include: {e}"})
+        estimate = cost_estimator.estimate_people_enrichment(body["people"], include)
+        if check_credits:
+            await cost_estimator.add_credit_check(estimate)
+        logger.info(f"🧮 Dry run: {estimate['records']['valid']} people, max {estimate['credits']['max']} credits")
+        return {"success": True, "data": estimate}
+
+    try:
+        request = req_models.PeopleEnrichmentRequestV2.model_validate(body)
+    except ValidationError as e:
+        # Same 422 shape FastAPI returns for a typed body parameter
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)], body=body)
+
     job_id = None
     
     try:
@@ -87,36 +132,17 @@ async def start_people_enrichment_v1(
         
         logger.info("🔍 V1 STEP 3: Converting V1 to V2 format")
         
-        # Create V2 include object
-        v2_include = req_models.EnrichmentInclude(email=True, mobile=True)
-        logger.info("🔍 V1 STEP 3a: Created EnrichmentInclude")
-        
-        # Convert people list
-        v2_people_input = []
-        for i, p in enumerate(request.people):
-            logger.info(f"🔍 V1 STEP 3b: Converting person {i}: {p}")
-            person_input = req_models.PersonEnrichmentInput(
-                firstName=p.get("firstName"),
-                lastName=p.get("lastName"),
-                companyName=p.get("companyName"),
-                linkedinUrl=p.get("linkedinUrl"),
-                externalID=p.get("externalID")
+        # Validate and convert all people in one pass (core/bulk_validation.py)
+        people, errors = validate_people_rows(request.people)
+        if errors:
+            raise HTTPException(status_code=422, detail={"error": "Invalid people in request", "errors": errors[:1000]})
+        if len(people) > MAX_PEOPLE_PER_JOB:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": f"At most {MAX_PEOPLE_PER_JOB} people per request; use /api/v2/people/enrich/bulk for larger lists"}
             )
-            v2_people_input.append(person_input)
-        
-        logger.info(f"🔍 V1 STEP 3c: Converted {len(v2_people_input)} people")
-        
-        # Create V2 request
-        v2_request = req_models.PeopleEnrichmentRequestV2(
-            people=v2_people_input,
-            include=v2_include,
-            notificationOptions=None
-        )
-        logger.info("🔍 V1 STEP 3d: Created V2 request object")
-        
-        # Convert to payload
-        payload = v2_request.model_dump(exclude_none=True, by_alias=True)
-        logger.info(f"🔍 V1 STEP 3 SUCCESS: Converted to payload with {len(payload)} keys")
+        payload = build_enrichment_payloads(people, {"email": True, "linkedInUrl": False, "mobile": True})[0]
+        logger.info(f"🔍 V1 STEP 3 SUCCESS: Converted {len(people)} people to V2 payload")
         
         logger.info("🔍 V1 STEP 4: Creating job in job_manager")
         job_manager.create_job(job_id)
@@ -137,6 +163,8 @@ async def start_people_enrichment_v1(
         
         return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"🚨 V1 ERROR with job_id = {job_id}: {str(e)}")
         logger.error(f"🚨 V1 TRACEBACK:\n{traceback.format_exc()}")
@@ -152,6 +180,127 @@ async def start_people_enrichment_v1(
             }
         )
 
+@router.post("/v2/people/enrich/bulk", response_model=res_models.GenericResponse)
+async def start_people_enrichment_bulk(
+    http_request: Request,
+    background_tasks_runner: BackgroundTasks,
+    strict: bool = Query(False, description="Reject the whole upload if any row is invalid")
+):
+    """
+    High-throughput enrichment enqueue. Body: {"people": [...]} or columnar
+    {"columns": {"firstName": [...], ...}}, plus "include" and optional "notificationOptions".
+    People are validated in one pass; invalid rows are reported by index and skipped,
+    and valid people are split into jobs of at most 10,000.
+    """
+    try:
+        body = await http_request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"error": "Request body must be JSON"})
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail={"error": "Request body must be a JSON object"})
+
+    try:
+        include = req_models.EnrichmentInclude(**(body.get("include") or {})).model_dump()
+        notification = body.get("notificationOptions")
+        if notification is not None:
+            notification = req_models.NotificationOptions(**notification).model_dump(exclude_none=True)
+    except (ValidationError, TypeError) as e:
+        raise HTTPException(status_code=422, detail={"error": f"Invalid include/notificationOptions: {e}"})
+
+    try:
+        if isinstance(body.get("columns"), dict):
+            people, errors = validate_people_columns(body["columns"])
+        elif isinstance(body.get("people"), list):
+            people, errors = validate_people_rows(body["people"])
+        else:
+            raise ValueError("Provide 'people' (a list) or 'columns' (an object of lists).")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail={"error": str(e)})
+
+    if not people or (strict and errors):
+        raise HTTPException(
+            status_code=422,
+            detail={"error": "No valid people to enrich" if not people else "Invalid rows in upload", "errors": errors[:1000]}
+        )
+
+    job_ids = []
+    for payload in build_enrichment_payloads(people, include, notification):
+        job_id = str(uuid4())
+        job_manager.create_job(job_id)
+        background_tasks_runner.add_task(
+            background_tasks.run_enrichment_task,
+            job_id,
+            "/v2/people/enrich",
+            "/v2/people/enrich/{id}",
+            payload
+        )
+        job_ids.append(job_id)
+
+    logger.info(f"✅ Bulk enrichment: {len(people)} accepted, {len(errors)} rejected, {len(job_ids)} job(s) queued")
+    return {
+        "success": True,
+        "data": {
+            "job_ids": job_ids,
+            "accepted": len(people),
+            "rejected": len(errors),
+            "errors": errors[:1000],
+            "errors_truncated": len(errors) > 1000
+        }
+    }
+
+@router.post("/v2/people/enrich/upload", response_model=res_models.GenericResponse)
+async def upload_people_enrichment_csv(
+    http_request: Request,
+    email: bool = Query(True),
+    mobile: bool = Query(False),
+    linkedInUrl: bool = Query(False),
+    webhookUrl: Optional[str] = Query(None),
+    batch_size: int = Query(1000, ge=1, le=MAX_PEOPLE_PER_JOB, description="People per enrichment job")
+):
+    """
+    Upload a people CSV (multipart/form-data, any file field). The body is parsed as it
+    streams in: headers such as "First Name", "LinkedIn URL" or "Company Domain" are mapped
+    automatically, rows are validated incrementally, and every `batch_size` valid people are
+    submitted as an enrichment job right away, before the rest of the file has arrived.
+    The file is kept for GET /api/export/uploads/{upload_id}/merged, which returns it with
+    the enrichment columns appended.
+    """
+    try:
+        include = req_models.EnrichmentInclude(email=email, mobile=mobile, linkedInUrl=linkedInUrl).model_dump()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail={"error": str(e)})
+    notification = {"webhookUrl": webhookUrl} if webhookUrl else None
+
+    job_ids = []
+    source = merge_sources.create("people")
+    try:
+        upload = PeopleCSVUpload(http_request.headers.get("content-type", ""), batch_size, source=source)
+        async for batch in upload.batches(http_request.stream()):
+            payload = build_enrichment_payloads(batch, include, notification)[0]
+            job_id = str(uuid4())
+            job_manager.create_job(job_id)
+            task = asyncio.create_task(background_tasks.run_enrichment_task(
+                job_id, "/v2/people/enrich", "/v2/people/enrich/{id}", payload
+            ))
+            _upload_tasks.add(task)
+            task.add_done_callback(_upload_tasks.discard)
+            job_ids.append(job_id)
+            logger.info(f"📤 CSV upload: job {job_id} submitted with {len(batch)} people")
+    except ValueError as e:
+        # Jobs already submitted keep running; report them alongside the error
+        merge_sources.delete(source.id)
+        raise HTTPException(status_code=422, detail={"error": str(e), "job_ids": job_ids})
+
+    summary = upload.summary()
+    if not job_ids:
+        merge_sources.delete(source.id)
+        raise HTTPException(status_code=422, detail={"error": "No valid people found in the CSV", **summary})
+    source.filename = summary["filename"]
+    source.job_ids = job_ids
+
+    logger.info(f"✅ CSV upload {summary['filename']}: {summary['accepted']} accepted, {summary['rejected']} rejected, {len(job_ids)} job(s)")
+    return {"success": True, "data": {"job_ids": job_ids, "upload_id": source.id, **summary}}
+
 # Status endpoints
 @router.get("/v2/people/enrich/status/{job_id}", response_model=res_models.JobStatusResponse)
 async def get_people_enrichment_status_v2(job_id: str):
@@ -4,13 +4,22 @@
 
 # File: api/routes/people_search.py (or wherever your people routes are)
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from api.models import requests as req_models, responses as res_models
 from core.dependencies import get_api_key
 from utils import api_client
 from utils.api_client import surfe_client
+from core.prefetch_cache import PagePrefetcher
+from core.batch_search import person_record_key, run_search_batch
+from core.domain_lists import domain_lists
 import logging
 
+try:
+    from config.config import BATCH_SEARCH_MAX_QUERIES
+except ImportError:
+    BATCH_SEARCH_MAX_QUERIES = 100
+
 print("Loading people_search.py") # DEBUG PRINT
 
 logger = logging.getLogger(__name__)
@@ -18,13 +27,30 @@ logger = logging.getLogger(__name__)
 # Your existing router - make sure this prefix matches your app setup
 router = APIRouter(prefix="/api", tags=["People"])  # Changed from "/api/v1/people" to "/api"
 
+async def _fetch_people_page(payload: dict) -> dict:
+    return await surfe_client.make_request_with_rotation("POST", "/v2/people/search", json_data=payload)
+
+# Short-lived cache of speculatively fetched next pages (see core/prefetch_cache.py)
+people_prefetcher = PagePrefetcher(_fetch_people_page)
+
 # ADD THIS NEW ENDPOINT (v2)
 @router.post("/v2/people/search", response_model=res_models.GenericResponse)
-async def search_people_v2(request_data: dict, api_key: str = Depends(get_api_key)):
+async def search_people_v2(
+    request_data: dict,
+    prefetch: bool = Query(False, description="Fetch the next page in the background so 'next page' is instant"),
+    exclude_list: Optional[str] = Query(None, description="ID of an uploaded domain list (POST /api/v2/people/domain-lists) to drop from results"),
+    api_key: str = Depends(get_api_key)
+):
     """
     Search for people using Surfe API v2 structure
     """
     try:
+        suppression = None
+        if exclude_list:
+            suppression = domain_lists.get(exclude_list)
+            if suppression is None:
+                raise HTTPException(status_code=404, detail=f"Domain list '{exclude_list}' not found or expired")
+
         logger.info(f"🔍 People Search v2 Request: {request_data}")
         
         # Validate that we have some filters
@@ -37,12 +63,17 @@ async def search_people_v2(request_data: dict, api_key: str = Depends(get_api_ke
                 detail="At least one company or people filter must be provided"
             )
         
-        # Make request to Surfe API v2
-        result = await surfe_client.make_request_with_rotation(
-            "POST", 
-            "/v2/people/search", 
-            json_data=request_data
-        )
+        # Serve a prefetched page if we already fetched this one in the background
+        result = await people_prefetcher.take(request_data)
+        if result is not None:
+            logger.info("⚡ People Search v2: served page from prefetch cache")
+        else:
+            # Make request to Surfe API v2
+            result = await surfe_client.make_request_with_rotation(
+                "POST", 
+                "/v2/people/search", 
+                json_data=request_data
+            )
         
         if "error" in result:
             error_detail = result.get("details", result.get("error", "An unknown API error occurred."))
@@ -50,6 +81,17 @@ async def search_people_v2(request_data: dict, api_key: str = Depends(get_api_ke
             raise HTTPException(status_code=500, detail=error_detail)
         
         logger.info(f"✅ People Search v2 Success: Found {len(result.get('people', []))} people")
+        
+        if prefetch and result.get("nextPageToken"):
+            people_prefetcher.schedule(request_data, result["nextPageToken"])
+
+        if suppression is not None:
+            people = result.get("people") or []
+            kept = [person for person in people if not suppression.matches_person(person)]
+            result = dict(result, people=kept, domainFilter={
+                "listId": suppression.id,
+                "excluded": len(people) - len(kept)
+            })
         return {"success": True, "data": result}
         
     except HTTPException:
@@ -58,6 +100,55 @@ async def search_people_v2(request_data: dict, api_key: str = Depends(get_api_ke
         logger.error(f"❌ Unexpected error in people search v2: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+@router.post("/v2/people/search/batch", response_model=res_models.GenericResponse)
+async def batch_search_people_v2(request: req_models.PeopleBatchSearchRequest, api_key: str = Depends(get_api_key)):
+    """
+    Run many v2 people searches concurrently. Returns each query's result or error plus
+    a union of all people de-duplicated by LinkedIn URL (or name + company).
+    """
+    if len(request.queries) > BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_SEARCH_MAX_QUERIES} queries")
+
+    errors = {
+        index: "At least one company or people filter must be provided"
+        for index, query in enumerate(request.queries)
+        if not query.get("companies") and not query.get("people")
+    }
+    batch = await run_search_batch(
+        "/v2/people/search",
+        request.queries,
+        result_key="people",
+        record_key=person_record_key,
+        errors=errors
+    )
+    return {"success": True, "data": batch}
+
+@router.post("/v2/people/domain-lists", response_model=res_models.GenericResponse)
+async def create_domain_list(request: req_models.DomainListCreateRequest, api_key: str = Depends(get_api_key)):
+    """
+    Upload a domain suppression list once; pass the returned id as ?exclude_list=
+    to /api/v2/people/search to drop matching people server-side.
+    The id is a bearer secret: there are no per-user credentials, so anyone holding
+    it can read, use or delete the list. Share it only with whoever may do that.
+    """
+    domain_list = domain_lists.create(request.domains, name=request.name, ttl=request.ttlSeconds)
+    return {"success": True, "data": domain_list.info()}
+
+@router.get("/v2/people/domain-lists/{list_id}", response_model=res_models.GenericResponse)
+async def get_domain_list(list_id: str):
+    """List metadata. Not authenticated: the unguessable list id is the credential."""
+    domain_list = domain_lists.get(list_id)
+    if domain_list is None:
+        raise HTTPException(status_code=404, detail=f"Domain list '{list_id}' not found or expired")
+    return {"success": True, "data": domain_list.info()}
+
+@router.delete("/v2/people/domain-lists/{list_id}", response_model=res_models.GenericResponse)
+async def delete_domain_list(list_id: str):
+    """Delete a list. Not authenticated: the unguessable list id is the credential."""
+    if not domain_lists.delete(list_id):
+        raise HTTPException(status_code=404, detail=f"Domain list '{list_id}' not found or expired")
+    return {"success": True, "data": {"id": list_id, "deleted": True}}
+
 # UPDATE YOUR EXISTING v1 ENDPOINT (change prefix)
 @router.post("/v1/people/search", response_model=res_models.GenericResponse)  # Changed from just "/search"
 async def search_people_v1(request: req_models.PeopleSearchRequest, api_key: str = Depends(get_api_key)):
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from uuid import uuid4
+from api.models import requests as req_models, responses as res_models
+from api.routes.company_search import build_company_search_payload
+from core import job_manager
+from core.dependencies import get_api_key
+from core.pipelines import CompanyPeopleFanout, run_search_enrich_pipeline
+from typing import AsyncIterator
+import json
+import logging
+
+print("Loading pipelines.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v2/pipelines", tags=["Pipelines"])
+
+
+@router.post("/search-enrich", response_model=res_models.JobStatusResponse)
+async def start_search_enrich_pipeline(
+    request: req_models.SearchEnrichPipelineRequest,
+    background_tasks_runner: BackgroundTasks,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    People search followed by enrichment, in one job. Search pages are fetched server-side
+    and every `chunkSize` people found are submitted for enrichment right away, so both
+    stages overlap. Poll GET /api/v2/pipelines/{job_id} for progress; the finished job
+    holds the enriched people (externalID row-<n> = n-th search result) and can be
+    downloaded through /api/export/jobs/{job_id}.
+    """
+    job_id = str(uuid4())
+    job_manager.create_job(job_id)
+    notification = request.notificationOptions.model_dump(exclude_none=True) if request.notificationOptions else None
+    background_tasks_runner.add_task(
+        run_search_enrich_pipeline,
+        job_id,
+        request.search,
+        request.include.model_dump(),
+        request.maxRecords,
+        request.chunkSize,
+        notification or None
+    )
+    logger.info(f"🔗 Search -> enrich pipeline {job_id} queued (maxRecords={request.maxRecords}, chunkSize={request.chunkSize})")
+    return {"job_id": job_id, "status": "pending"}
+
+
+@router.post("/company-people")
+async def stream_company_people_fanout(
+    request: req_models.CompanyPeopleFanoutRequest,
+    http_request: Request,
+    api_key: str = Depends(get_api_key)
+):
+    """
+    Decision-makers for a company segment in one request: pages through the company search,
+    batches the domains found (domainBatchSize per upstream call) and runs the people searches
+    concurrently with peoplePerCompany. People are streamed as NDJSON, de-duplicated, as soon
+    as any batch returns them; the last line is a {"_meta": {...}} summary.
+    """
+    # Validates the company filters (400 if none) before streaming starts
+    company_payload = build_company_search_payload(
+        req_models.CompanySearchRequest(filters=request.companies, limit=200)
+    )
+    people_payload = {
+        "people": request.people.model_dump(exclude_none=True) if request.people else {},
+        "peoplePerCompany": request.peoplePerCompany
+    }
+    fanout = CompanyPeopleFanout(
+        company_payload,
+        people_payload,
+        max_companies=request.maxCompanies,
+        max_people=request.maxPeople,
+        domain_batch_size=request.domainBatchSize,
+        is_disconnected=http_request.is_disconnected
+    )
+
+    async def generate() -> AsyncIterator[str]:
+        async for person in fanout.people():
+            yield json.dumps(person) + "\n"
+        summary = fanout.summary()
+        logger.info(f"🔗 Company -> people fan-out: {summary['unique_people']} people from {summary['unique_domains']} domains in {summary['elapsed_ms']}ms")
+        yield json.dumps({"_meta": summary}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/{job_id}", response_model=res_models.JobStatusResponse)
+async def get_pipeline_status(job_id: str):
+    """Pipeline progress while running (result.pipeline); the merged results once done."""
+    job = job_manager.get_job(job_id)
+    if job["status"] == "not_found":
+        raise HTTPException(status_code=404, detail={"error": "Job not found"})
+    return {"job_id": job_id, **job}
@@ -33,6 +33,7 @@ async def select_api_key(data: Dict[str, str]):
             if key_info.key == actual_key:
                 key_info.is_temporarily_disabled = False
                 key_info.quota_reset_time = None
+                key_info.quota_exhausted = False
                 break
 
         return {
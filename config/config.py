@@ -16,4 +16,123 @@ class Config:
     ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
 
 # Create a global config instance
-config = Config()
\ No newline at end of file
+config = Config()
+
+# Dashboard activity write-behind buffer. Activities are batched in memory and
+# flushed to the stats store every ACTIVITY_FLUSH_INTERVAL seconds or once
+# ACTIVITY_FLUSH_BATCH_SIZE events are pending. An interval of 0 disables
+# buffering (every activity is written through immediately).
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "2.0"))
+ACTIVITY_FLUSH_BATCH_SIZE = int(os.getenv("ACTIVITY_FLUSH_BATCH_SIZE", "100"))
+ACTIVITY_BUFFER_MAX_EVENTS = int(os.getenv("ACTIVITY_BUFFER_MAX_EVENTS", "1000"))
+
+# Lifetime of the pre-serialized /api/dashboard/stats snapshot, in seconds.
+# Writes (activity flushes, resets) invalidate it immediately.
+DASHBOARD_STATS_CACHE_TTL = float(os.getenv("DASHBOARD_STATS_CACHE_TTL", "5.0"))
+
+# Local dashboard stats persistence, used when KV_URL is not set. Stats are kept
+# in memory and snapshotted atomically to this file every STATS_SNAPSHOT_INTERVAL
+# seconds (and on shutdown). The default lives in the gitignored data/ directory so
+# dev runs don't touch tracked files. Set DASHBOARD_STATS_FILE to an empty string to
+# keep stats in memory only.
+DASHBOARD_STATS_FILE = os.getenv(
+    "DASHBOARD_STATS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "dashboard_stats.json")
+)
+STATS_SNAPSHOT_INTERVAL = float(os.getenv("STATS_SNAPSHOT_INTERVAL", "30"))
+
+# Speculative next-page prefetch for people search (?prefetch=true). Prefetched
+# pages live for PREFETCH_TTL seconds; at most PREFETCH_BUDGET_PER_MINUTE
+# prefetches are started per minute and PREFETCH_MAX_INFLIGHT run at once.
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "120"))
+PREFETCH_BUDGET_PER_MINUTE = int(os.getenv("PREFETCH_BUDGET_PER_MINUTE", "30"))
+PREFETCH_MAX_INFLIGHT = int(os.getenv("PREFETCH_MAX_INFLIGHT", "4"))
+
+# Batch search endpoints: at most BATCH_SEARCH_CONCURRENCY queries of one batch
+# are sent upstream at the same time.
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "8"))
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "100"))
+
+# Company search domain lists. Inclusion lists longer than SEARCH_DOMAIN_CHUNK_SIZE
+# are searched in concurrent chunks; only the first SEARCH_MAX_EXCLUDED_DOMAINS
+# exclusions are sent upstream and the rest are filtered locally, fetching up to
+# SEARCH_EXCLUSION_MAX_PAGES pages to fill the requested limit.
+SEARCH_DOMAIN_CHUNK_SIZE = int(os.getenv("SEARCH_DOMAIN_CHUNK_SIZE", "500"))
+SEARCH_MAX_EXCLUDED_DOMAINS = int(os.getenv("SEARCH_MAX_EXCLUDED_DOMAINS", "500"))
+SEARCH_EXCLUSION_MAX_PAGES = int(os.getenv("SEARCH_EXCLUSION_MAX_PAGES", "10"))
+
+# Uploaded domain suppression lists for people search (?exclude_list=<id>). Lists
+# expire after DOMAIN_LIST_TTL seconds; lists larger than DOMAIN_LIST_BLOOM_THRESHOLD
+# domains are stored as a Bloom filter (~0.1% false positives) instead of a set.
+DOMAIN_LIST_TTL = float(os.getenv("DOMAIN_LIST_TTL", str(24 * 3600)))
+DOMAIN_LIST_BLOOM_THRESHOLD = int(os.getenv("DOMAIN_LIST_BLOOM_THRESHOLD", "200000"))
+DOMAIN_LIST_MAX_LISTS = int(os.getenv("DOMAIN_LIST_MAX_LISTS", "50"))
+
+# Filter catalog (/api/filters, autocomplete): upstream filters are re-fetched in
+# the background once they are older than FILTER_CATALOG_TTL seconds.
+FILTER_CATALOG_TTL = float(os.getenv("FILTER_CATALOG_TTL", str(6 * 3600)))
+
+# Uploaded CSVs kept for merging enrichment results back in
+# (/api/export/uploads/{id}/merged): CSV_MERGE_TTL seconds, at most CSV_MERGE_MAX_UPLOADS files.
+CSV_MERGE_TTL = float(os.getenv("CSV_MERGE_TTL", str(24 * 3600)))
+CSV_MERGE_MAX_UPLOADS = int(os.getenv("CSV_MERGE_MAX_UPLOADS", "20"))
+
+# Lookalikes: each seed domain's upstream response is cached for LOOKALIKE_CACHE_TTL
+# seconds; multi-seed requests accept at most LOOKALIKE_MAX_SEEDS domains.
+LOOKALIKE_CACHE_TTL = float(os.getenv("LOOKALIKE_CACHE_TTL", str(6 * 3600)))
+LOOKALIKE_CACHE_MAX_ENTRIES = int(os.getenv("LOOKALIKE_CACHE_MAX_ENTRIES", "5000"))
+LOOKALIKE_MAX_SEEDS = int(os.getenv("LOOKALIKE_MAX_SEEDS", "100"))
+
+# Search -> enrich pipeline: at most PIPELINE_ENRICH_CONCURRENCY enrichment chunks
+# of one pipeline run at the same time.
+PIPELINE_ENRICH_CONCURRENCY = int(os.getenv("PIPELINE_ENRICH_CONCURRENCY", "4"))
+
+# Diagnostics sweeps: probes run DIAGNOSTICS_PROBE_CONCURRENCY at a time, each limited
+# to DIAGNOSTICS_PROBE_TIMEOUT seconds; anything still running after DIAGNOSTICS_DEADLINE
+# seconds is reported as timed out (keeps a full diagnosis under serverless limits).
+DIAGNOSTICS_PROBE_CONCURRENCY = int(os.getenv("DIAGNOSTICS_PROBE_CONCURRENCY", "8"))
+DIAGNOSTICS_PROBE_TIMEOUT = float(os.getenv("DIAGNOSTICS_PROBE_TIMEOUT", "15"))
+DIAGNOSTICS_DEADLINE = float(os.getenv("DIAGNOSTICS_DEADLINE", "25"))
+
+# Background key health prober: every key gets a cheap probe request every
+# KEY_PROBE_HEALTHY_INTERVAL seconds, or every KEY_PROBE_SUSPECT_INTERVAL seconds
+# (with backoff) while it is disabled or failing. Recovered keys are re-enabled
+# immediately; KEY_PROBE_FAILURE_THRESHOLD failed probes in a row disable a key.
+KEY_PROBE_ENABLED = os.getenv("KEY_PROBE_ENABLED", "true").lower() in ("1", "true", "yes")
+KEY_PROBE_HEALTHY_INTERVAL = float(os.getenv("KEY_PROBE_HEALTHY_INTERVAL", "600"))
+KEY_PROBE_SUSPECT_INTERVAL = float(os.getenv("KEY_PROBE_SUSPECT_INTERVAL", "30"))
+KEY_PROBE_FAILURE_THRESHOLD = int(os.getenv("KEY_PROBE_FAILURE_THRESHOLD", "2"))
+KEY_PROBE_TIMEOUT = int(os.getenv("KEY_PROBE_TIMEOUT", "10"))
+
+# Admin-only endpoints (load benchmark, deleting baselines) need an X-Admin-Token
+# header equal to ADMIN_API_TOKEN. Left empty, those endpoints are disabled.
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+# Benchmark runner (/api/v1/diagnostics/benchmark): saved baselines are kept in
+# BENCHMARK_BASELINE_FILE (under the gitignored data/ directory by default); a
+# metric more than BENCHMARK_REGRESSION_THRESHOLD (relative) worse than its
+# baseline is reported as a regression.
+BENCHMARK_BASELINE_FILE = os.getenv(
+    "BENCHMARK_BASELINE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "benchmark_baselines.json")
+)
+BENCHMARK_REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", "0.2"))
+
+# Data-quality studies (/api/test/*/batch): items are enriched in bulk jobs of
+# QUALITY_STUDY_CHUNK_SIZE, QUALITY_STUDY_CONCURRENCY jobs at a time. Job polling
+# starts after QUALITY_POLL_INITIAL_DELAY seconds and backs off to
+# QUALITY_POLL_MAX_DELAY; a job unfinished after QUALITY_POLL_TIMEOUT seconds fails.
+QUALITY_STUDY_CHUNK_SIZE = int(os.getenv("QUALITY_STUDY_CHUNK_SIZE", "100"))
+QUALITY_STUDY_CONCURRENCY = int(os.getenv("QUALITY_STUDY_CONCURRENCY", "4"))
+QUALITY_POLL_INITIAL_DELAY = float(os.getenv("QUALITY_POLL_INITIAL_DELAY", "1"))
+QUALITY_POLL_MAX_DELAY = float(os.getenv("QUALITY_POLL_MAX_DELAY", "10"))
+QUALITY_POLL_TIMEOUT = float(os.getenv("QUALITY_POLL_TIMEOUT", "300"))
+
+# Enrichment dry runs (?dry_run=true on /api/v2/people/enrich and /api/v2/companies/enrich):
+# credits charged per enriched field / company (override to match your plan), and
+# how many recent finished jobs are used for fill rates and "already enriched" counts.
+ENRICH_CREDITS_PER_EMAIL = float(os.getenv("ENRICH_CREDITS_PER_EMAIL", "1"))
+ENRICH_CREDITS_PER_MOBILE = float(os.getenv("ENRICH_CREDITS_PER_MOBILE", "1"))
+ENRICH_CREDITS_PER_LINKEDIN = float(os.getenv("ENRICH_CREDITS_PER_LINKEDIN", "0"))
+ENRICH_CREDITS_PER_COMPANY = float(os.getenv("ENRICH_CREDITS_PER_COMPANY", "1"))
+ESTIMATE_HISTORY_JOBS = int(os.getenv("ESTIMATE_HISTORY_JOBS", "50"))
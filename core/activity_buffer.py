@@ -0,0 +1,172 @@
+# ==============================================================================
+# File: core/activity_buffer.py - Write-behind buffer for dashboard activity
+# ==============================================================================
+# Activity posts only touch memory: counter increments are merged into one dict
+# and activity entries are appended to a bounded queue. A background task flushes
+# everything to the stats store on a short interval, or sooner once a size
+# threshold is reached, so the request path never waits on KV I/O.
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from core.stats_store import RECENT_ACTIVITY_LIMIT
+
+try:
+    from config.config import ACTIVITY_FLUSH_INTERVAL, ACTIVITY_FLUSH_BATCH_SIZE, ACTIVITY_BUFFER_MAX_EVENTS
+except ImportError:
+    ACTIVITY_FLUSH_INTERVAL = 2.0
+    ACTIVITY_FLUSH_BATCH_SIZE = 100
+    ACTIVITY_BUFFER_MAX_EVENTS = 1000
+
+print("Loading activity_buffer.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[Dict[str, int], List[Dict[str, Any]]], None]
+
+
+class ActivityBuffer:
+    """Batches dashboard activity in memory and flushes it to the stats store"""
+
+    def __init__(
+        self,
+        flush_callback: FlushCallback,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL,
+        batch_size: int = ACTIVITY_FLUSH_BATCH_SIZE,
+        max_events: int = ACTIVITY_BUFFER_MAX_EVENTS
+    ):
+        self._flush_callback = flush_callback
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self._increments: Dict[str, int] = {}
+        self._activities: Deque[Dict[str, Any]] = deque(maxlen=max(1, max_events))
+        self._pending_events = 0
+        self._dropped_events = 0
+        self._flush_failures = 0
+        self._backoff_until = 0.0  # monotonic; no early flushes before this while the store is failing
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def record(self, increments: Dict[str, int], activity: Optional[Dict[str, Any]] = None) -> None:
+        """Queue one activity. Never performs I/O unless the buffer is not running."""
+        for field_name, amount in increments.items():
+            self._increments[field_name] = self._increments.get(field_name, 0) + amount
+        if activity is not None:
+            if len(self._activities) == self._activities.maxlen:
+                # Oldest entries fall off; their counters were already merged above
+                self._dropped_events += 1
+            self._activities.append(activity)
+        self._pending_events += 1
+
+        if not self.is_running:
+            # No background flusher (buffering disabled or outside the app lifecycle): write through
+            self.flush_now()
+        elif self._pending_events >= self.batch_size and self._wakeup and time.monotonic() >= self._backoff_until:
+            # A failed batch stays pending, so without the backoff check every record() would retry the store
+            self._wakeup.set()
+
+    def _take_pending(self):
+        increments, activities = self._increments, list(self._activities)
+        self._increments = {}
+        self._activities.clear()
+        self._pending_events = 0
+        # Only the newest entries survive the store's capped list, so don't send the rest
+        return increments, activities[-RECENT_ACTIVITY_LIMIT:]
+
+    def _restore_pending(self, increments: Dict[str, int], activities: List[Dict[str, Any]]) -> None:
+        """Put a failed batch back in front of anything recorded since, so nothing is lost."""
+        for field_name, amount in increments.items():
+            self._increments[field_name] = self._increments.get(field_name, 0) + amount
+        newer = list(self._activities)
+        self._activities.clear()
+        self._activities.extend(activities + newer)
+        self._pending_events += len(activities)
+
+    def flush_now(self) -> bool:
+        """Synchronously flush pending activity. Returns False if the store write failed."""
+        if not self._pending_events and not self._increments:
+            return True
+        increments, activities = self._take_pending()
+        try:
+            self._flush_callback(increments, activities)
+            return True
+        except Exception as e:
+            self._flush_failures += 1
+            logger.error(f"Activity Buffer: Flush failed, keeping {len(activities)} activities for retry: {e}")
+            self._restore_pending(increments, activities)
+            return False
+
+    async def flush(self) -> bool:
+        """Flush pending activity without blocking the event loop."""
+        if not self._pending_events and not self._increments:
+            return True
+        increments, activities = self._take_pending()
+        try:
+            await asyncio.to_thread(self._flush_callback, increments, activities)
+            logger.debug(f"Activity Buffer: Flushed {len(increments)} counters and {len(activities)} activities")
+            return True
+        except Exception as e:
+            self._flush_failures += 1
+            logger.error(f"Activity Buffer: Flush failed, keeping {len(activities)} activities for retry: {e}")
+            self._restore_pending(increments, activities)
+            return False
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if await self.flush():
+                backoff = self.flush_interval
+                self._backoff_until = 0.0
+            else:
+                # Store is down - back off instead of hammering it, counters keep merging in memory
+                backoff = min(backoff * 2, 60.0)
+                self._backoff_until = time.monotonic() + backoff
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self.is_running or self.flush_interval <= 0:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Activity Buffer: Started (interval {self.flush_interval}s, batch size {self.batch_size})")
+
+    async def stop(self) -> None:
+        """Stop the flusher and drain whatever is still pending."""
+        if self._task:
+            self._stopping = True
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.error(f"Activity Buffer: Flusher exited with error: {e}")
+            self._task = None
+        if not await self.flush():
+            logger.error("Activity Buffer: Could not drain pending activity on shutdown.")
+
+    def discard(self) -> None:
+        """Drop pending activity (used when the dashboard is reset)."""
+        self._take_pending()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "pending_events": self._pending_events,
+            "pending_counters": dict(self._increments),
+            "dropped_events": self._dropped_events,
+            "flush_failures": self._flush_failures
+        }
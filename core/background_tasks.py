@@ -1,5 +1,9 @@
 # core/background_tasks.py - Updated imports
 import asyncio
+import statistics
+import time
+from collections import deque
+from typing import Dict, Optional
 from core import job_manager
 from utils.api_client import surfe_client
 from utils import api_client  # Need this for direct key usage in polling
@@ -9,24 +13,54 @@ logger = logging.getLogger(__name__)
 
 print("Loading background_tasks.py") # DEBUG PRINT
 
+# Status polling: POLL_ATTEMPTS polls, POLL_INTERVAL seconds apart, before a job times out
+POLL_ATTEMPTS = 20
+POLL_INTERVAL = 3
+
+class EnrichmentThroughput:
+    """Records per second of recently completed enrichment tasks, per kind (people / companies)"""
+
+    def __init__(self, max_samples: int = 50):
+        self._samples: Dict[str, deque] = {"people": deque(maxlen=max_samples), "companies": deque(maxlen=max_samples)}
+
+    def record(self, start_endpoint: str, payload: dict, seconds: float):
+        kind = "people" if "/people/" in start_endpoint else "companies"
+        records = len(payload.get(kind) or payload.get("organizations") or [])
+        if records and seconds > 0:
+            self._samples[kind].append(records / seconds)
+
+    def records_per_second(self, kind: str) -> Optional[float]:
+        samples = self._samples.get(kind)
+        return statistics.median(samples) if samples else None
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            kind: {"samples": len(samples), "median_records_per_second": self.records_per_second(kind)}
+            for kind, samples in self._samples.items()
+        }
+
+# Global throughput history, used by the dry-run cost estimator
+enrichment_throughput = EnrichmentThroughput()
+
 # core/background_tasks.py - Fixed with key consistency
 async def run_enrichment_task(job_id: str, start_endpoint: str, status_endpoint_template: str, payload: dict):
     print(f"🔥 BACKGROUND TASK STARTED: job_id={job_id}")
     print(f"🔥 BACKGROUND TASK: endpoint={start_endpoint}")
     print(f"🔥 BACKGROUND TASK: payload={payload}")
     
+    started = time.monotonic()
     try:
         job_manager.update_job_status(job_id, "running")
         
         print(f"🔥 About to call Surfe API with endpoint: {start_endpoint}")
         
         # Submit enrichment job using rotation
-        start_response = await surfe_client.make_request_with_rotation("POST", start_endpoint, json_data=payload)
-        
-        # ✅ CRITICAL: Get the key that was successful for initial request
-        successful_key = surfe_client.get_last_successful_key()
+        # ✅ CRITICAL: Keep the key that served this request for polling. Other enrichments
+        # run concurrently, so the client's "last key used" may already be someone else's.
+        start_response, successful_key = await surfe_client.make_request_with_key("POST", start_endpoint, json_data=payload)
         print(f"🔥 Surfe API response received: {start_response}")
-        print(f"🔥 Will use same key for polling: {successful_key[:10]}...{successful_key[-4:]}")
+        if successful_key:
+            print(f"🔥 Will use same key for polling: ...{successful_key[-5:]}")
         
         if not start_response:
             error_msg = "No response from Surfe API"
@@ -49,9 +83,9 @@ async def run_enrichment_task(job_id: str, start_endpoint: str, status_endpoint_
         print(f"🔥 Will poll status at: {status_endpoint}")
         
         # Poll for completion using SAME KEY for consistency
-        for attempt in range(20):
-            print(f"🔥 Polling attempt {attempt + 1}/20")
-            await asyncio.sleep(3)
+        for attempt in range(POLL_ATTEMPTS):
+            print(f"🔥 Polling attempt {attempt + 1}/{POLL_ATTEMPTS}")
+            await asyncio.sleep(POLL_INTERVAL)
             
             # ✅ CRITICAL: Use same key that created the job to avoid 404s
             # We need to import api_client for direct key usage
@@ -76,16 +110,19 @@ async def run_enrichment_task(job_id: str, start_endpoint: str, status_endpoint_
                 
                 if has_data:
                     print(f"🔥 Companies have data - marking as completed")
+                    enrichment_throughput.record(start_endpoint, payload, time.monotonic() - started)
                     job_manager.update_job_status(job_id, "completed", status_response)
                     return
                 else:
                     print(f"🔥 Companies returned but all fields empty")
+                    enrichment_throughput.record(start_endpoint, payload, time.monotonic() - started)
                     job_manager.update_job_status(job_id, "completed", status_response)
                     return
             
             # For v1 API or if no companies yet, check status
             elif "organizations" in status_response:
                 print(f"🔥 V1 API - got organizations data")
+                enrichment_throughput.record(start_endpoint, payload, time.monotonic() - started)
                 job_manager.update_job_status(job_id, "completed", status_response)
                 return
             
@@ -95,11 +132,13 @@ async def run_enrichment_task(job_id: str, start_endpoint: str, status_endpoint_
             
             if current_status not in ["IN_PROGRESS", "PENDING", "UNKNOWN"]:
                 print(f"🔥 Final status reached: {current_status}")
+                if current_status == "COMPLETED":
+                    enrichment_throughput.record(start_endpoint, payload, time.monotonic() - started)
                 job_manager.update_job_status(job_id, current_status.lower(), status_response)
                 return
         
         # Timeout
-        timeout_msg = "Enrichment task timed out after 20 polling attempts"
+        timeout_msg = f"Enrichment task timed out after {POLL_ATTEMPTS} polling attempts"
         print(f"🔥 TIMEOUT: {timeout_msg}")
         job_manager.update_job_status(job_id, "failed", {"error": timeout_msg})
         
@@ -0,0 +1,139 @@
+# ==============================================================================
+# File: core/batch_search.py - Concurrent execution of many search queries
+# ==============================================================================
+# Runs a list of search payloads against one Surfe endpoint at the same time
+# (bounded by a semaphore, each call going through the rotating client), reports
+# success or failure per query and merges all results into one de-duplicated
+# list. Wall time is roughly that of the slowest query instead of the sum.
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.api_client import surfe_client
+
+try:
+    from config.config import BATCH_SEARCH_CONCURRENCY
+except ImportError:
+    BATCH_SEARCH_CONCURRENCY = 8
+
+print("Loading batch_search.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_domain(domain: Optional[str]) -> Optional[str]:
+    """'https://www.Example.com/' -> 'example.com'"""
+    if not domain:
+        return None
+    domain = str(domain).strip().lower()
+    for prefix in ("https://", "http://"):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain.split("/")[0] or None
+
+
+def company_record_key(company: Dict[str, Any]) -> Optional[str]:
+    domain = normalize_domain(company.get("domain"))
+    if domain:
+        return domain
+    name = (company.get("name") or "").strip().lower()
+    return f"name:{name}" if name else None
+
+
+def person_record_key(person: Dict[str, Any]) -> Optional[str]:
+    linkedin = person.get("linkedInUrl") or person.get("linkedinUrl")
+    if linkedin:
+        return linkedin.strip().lower().rstrip("/")
+    name = f"{person.get('firstName') or ''} {person.get('lastName') or ''}".strip().lower()
+    company = normalize_domain(person.get("companyDomain")) or (person.get("companyName") or "").strip().lower()
+    return f"{name}@{company}" if name and company else None
+
+
+async def run_search_batch(
+    endpoint: str,
+    payloads: List[Optional[Dict[str, Any]]],
+    result_key: str,
+    record_key: Callable[[Dict[str, Any]], Optional[str]],
+    errors: Optional[Dict[int, str]] = None,
+    concurrency: int = BATCH_SEARCH_CONCURRENCY,
+    timeout: int = 30
+) -> Dict[str, Any]:
+    """
+    Run every payload concurrently. `errors` maps query index -> validation error
+    for queries that must not be sent (their payload entry is ignored).
+    Returns per-query results (in input order) and the merged union of records.
+    """
+    errors = errors or {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(index: int, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if index in errors:
+            return {"index": index, "success": False, "error": errors[index], "status_code": 400}
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result = await surfe_client.make_request_with_rotation(
+                    "POST", endpoint, json_data=payload, timeout=timeout, max_retries=3, retry_delay=0.5
+                )
+            except Exception as e:
+                logger.error(f"❌ Batch search query {index} raised: {e}")
+                result = {"error": str(e), "status_code": 500}
+            elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+
+        if "error" in result:
+            return {
+                "index": index,
+                "success": False,
+                "error": result.get("error"),
+                "status_code": result.get("status_code", 500),
+                "elapsed_ms": elapsed_ms
+            }
+        return {
+            "index": index,
+            "success": True,
+            "count": len(result.get(result_key) or []),
+            "elapsed_ms": elapsed_ms,
+            "data": result
+        }
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(run_one(i, payload) for i, payload in enumerate(payloads)))
+    wall_ms = round((time.monotonic() - started) * 1000, 2)
+
+    # Union keyed by record_key; each merged record lists the queries that returned it
+    merged: Dict[str, Dict[str, Any]] = {}
+    unkeyed: List[Dict[str, Any]] = []
+    total_records = 0
+    for query in results:
+        if not query["success"]:
+            continue
+        for record in query["data"].get(result_key) or []:
+            total_records += 1
+            key = record_key(record)
+            if key is None:
+                unkeyed.append(dict(record, matchedQueries=[query["index"]]))
+            elif key in merged:
+                merged[key]["matchedQueries"].append(query["index"])
+            else:
+                merged[key] = dict(record, matchedQueries=[query["index"]])
+
+    succeeded = sum(1 for query in results if query["success"])
+    logger.info(f"✅ Batch search on {endpoint}: {succeeded}/{len(results)} queries succeeded in {wall_ms}ms")
+    return {
+        "queries": results,
+        "merged": list(merged.values()) + unkeyed,
+        "summary": {
+            "total_queries": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "total_records": total_records,
+            "unique_records": len(merged) + len(unkeyed),
+            "wall_time_ms": wall_ms,
+            "sum_query_time_ms": round(sum(query.get("elapsed_ms", 0) for query in results), 2),
+            "api_key_used": surfe_client.get_last_api_key_masked()
+        }
+    }
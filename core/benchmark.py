@@ -0,0 +1,290 @@
+# ==============================================================================
+# File: core/benchmark.py - Upstream latency benchmark runner
+# ==============================================================================
+# Drives sustained load at a set of upstream endpoints: `concurrency` workers
+# send requests back to back (targets taken round-robin) until a request count
+# or a duration is reached. Keys are rotated over the currently enabled keys,
+# or one chosen key is used. Every request's latency and outcome is kept, and
+# the run is reported as exact p50/p90/p99/max latency, throughput and error
+# breakdown per endpoint and per key.
+#
+# Only read-only endpoints (BENCHMARK_ENDPOINTS) can be targeted: a benchmark
+# sends thousands of requests over every enabled key, and pointed at an
+# enrichment endpoint it would spend the whole credit pool.
+#
+# Results can be saved as named baselines (kept in memory and in
+# BENCHMARK_BASELINE_FILE) and later runs compared against them.
+
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.api_client import ApiKeyManager, api_key_manager, _send_surfe_request
+
+try:
+    from config.config import BENCHMARK_BASELINE_FILE, BENCHMARK_REGRESSION_THRESHOLD
+except ImportError:
+    BENCHMARK_BASELINE_FILE = os.path.join("data", "benchmark_baselines.json")
+    BENCHMARK_REGRESSION_THRESHOLD = 0.2
+
+print("Loading benchmark.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+ERROR_RATE_TOLERANCE = 0.01  # Error-rate increase (absolute) tolerated before flagging a regression
+
+# Endpoint -> allowed method: lookups and searches only, nothing that creates jobs or spends credits
+BENCHMARK_ENDPOINTS = {
+    "/v1/people/search/filters": "GET",
+    "/v1/credits": "GET",
+    "/v2/people/search": "POST",
+    "/v2/companies/search": "POST",
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100.0))
+    return round(sorted_values[rank - 1], 2)
+
+
+def summarize_samples(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles, throughput and error breakdown for one group of samples."""
+    latencies = sorted(sample["latency_ms"] for sample in samples)
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        if not sample["ok"]:
+            errors[str(sample["status_code"])] = errors.get(str(sample["status_code"]), 0) + 1
+    error_count = sum(errors.values())
+    summary = {
+        "requests": len(samples),
+        "errors": error_count,
+        "error_rate": round(error_count / len(samples), 4) if samples else 0.0,
+        "error_breakdown": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None
+    }
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = percentile(latencies, pct)
+    return summary
+
+
+def _group(samples: List[Dict[str, Any]], field: str, elapsed: float) -> Dict[str, Dict[str, Any]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in samples:
+        groups.setdefault(sample[field], []).append(sample)
+    return {name: summarize_samples(group, elapsed) for name, group in groups.items()}
+
+
+def check_targets(targets: List[Dict[str, Any]]) -> None:
+    """Raise ValueError for any target outside the read-only BENCHMARK_ENDPOINTS allowlist."""
+    for target in targets:
+        endpoint = target["endpoint"].split("?")[0].rstrip("/")
+        if BENCHMARK_ENDPOINTS.get(endpoint) != target["method"]:
+            allowed = ", ".join(f"{method} {path}" for path, method in BENCHMARK_ENDPOINTS.items())
+            raise ValueError(f"Cannot benchmark {target['method']} {target['endpoint']}; allowed targets: {allowed}.")
+
+
+def resolve_keys(key_manager: ApiKeyManager, key_suffix: Optional[str] = None) -> List[str]:
+    """The keys to benchmark with: the one ending in key_suffix, or every currently enabled key."""
+    if key_suffix:
+        suffix = key_suffix.lstrip(".")
+        matches = [k.key for k in key_manager.keys if k.key.endswith(suffix)]
+        if len(matches) != 1:
+            raise ValueError(f"Key '{key_suffix}' matches {len(matches)} configured keys; give a unique suffix.")
+        return matches
+    keys = [k.key for k in key_manager.keys if not k.is_temporarily_disabled]
+    if not keys:
+        raise ValueError("No enabled API keys to benchmark with.")
+    return keys
+
+
+async def run_benchmark(
+    targets: List[Dict[str, Any]],
+    concurrency: int,
+    total_requests: Optional[int] = None,
+    duration_seconds: Optional[float] = None,
+    key_suffix: Optional[str] = None,
+    timeout: int = 30,
+    key_manager: ApiKeyManager = None
+) -> Dict[str, Any]:
+    """
+    Benchmark `targets` ({"name", "method", "endpoint", "json", "params"}) until
+    total_requests have been sent or duration_seconds have passed, whichever comes first.
+    Requests go straight to the upstream API (no retries, no key cooldowns) so each
+    sample is one real round-trip.
+    """
+    if not total_requests and not duration_seconds:
+        raise ValueError("Give a request count, a duration or both.")
+    check_targets(targets)
+    keys = resolve_keys(key_manager or api_key_manager, key_suffix)
+    target_cycle = itertools.cycle(targets)
+    key_cycle = itertools.cycle(keys)
+    samples: List[Dict[str, Any]] = []
+    issued = 0
+    started = time.monotonic()
+    deadline = started + duration_seconds if duration_seconds else None
+
+    async def worker() -> None:
+        nonlocal issued
+        while True:
+            if total_requests and issued >= total_requests:
+                return
+            if deadline and time.monotonic() >= deadline:
+                return
+            issued += 1
+            target, key = next(target_cycle), next(key_cycle)
+            request_started = time.monotonic()
+            result = await _send_surfe_request(
+                target["method"], target["endpoint"], key,
+                json_data=target.get("json"), params=target.get("params"), timeout=timeout
+            )
+            failed = "error" in result
+            samples.append({
+                "target": target["name"],
+                "key": f"...{key[-5:]}",
+                "latency_ms": (time.monotonic() - request_started) * 1000,
+                "ok": not failed,
+                "status_code": result.get("status_code", 500) if failed else 200
+            })
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.monotonic() - started
+
+    logger.info(f"⏱️ Benchmark: {len(samples)} requests over {len(targets)} targets in {elapsed:.1f}s (concurrency {concurrency})")
+    return {
+        "started_at": datetime.now().isoformat(),
+        "config": {
+            "targets": [{"name": t["name"], "method": t["method"], "endpoint": t["endpoint"]} for t in targets],
+            "concurrency": concurrency,
+            "requests": total_requests,
+            "duration_seconds": duration_seconds,
+            "keys": [f"...{key[-5:]}" for key in keys]
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": summarize_samples(samples, elapsed),
+        "by_endpoint": _group(samples, "target", elapsed),
+        "by_key": _group(samples, "key", elapsed)
+    }
+
+
+def _delta(current: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    if current is None or baseline is None:
+        return None
+    if baseline == 0:
+        return None  # No meaningful relative change from zero
+    return round((current - baseline) / baseline, 4)
+
+
+def _compare_summary(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    comparison: Dict[str, Any] = {}
+    regressions = []
+    for metric in [f"p{pct}_ms" for pct in PERCENTILES] + ["max_ms", "throughput_rps", "error_rate"]:
+        change = _delta(current.get(metric), baseline.get(metric))
+        comparison[metric] = {"current": current.get(metric), "baseline": baseline.get(metric), "change": change}
+        if metric == "error_rate":
+            # Compared in absolute terms: 0% -> 3% has no relative change but is a regression
+            if current["error_rate"] - baseline.get("error_rate", 0) > ERROR_RATE_TOLERANCE:
+                regressions.append(metric)
+            continue
+        if change is None or metric == "max_ms":
+            continue
+        # Latency regresses upwards, throughput downwards
+        worse = -change if metric == "throughput_rps" else change
+        if worse > threshold:
+            regressions.append(metric)
+    comparison["regressions"] = regressions
+    return comparison
+
+
+def compare_runs(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = BENCHMARK_REGRESSION_THRESHOLD) -> Dict[str, Any]:
+    """Relative change of every headline metric vs. a baseline run; >threshold worse counts as a regression."""
+    by_endpoint = {
+        name: _compare_summary(summary, baseline["by_endpoint"][name], threshold)
+        for name, summary in current["by_endpoint"].items()
+        if name in baseline.get("by_endpoint", {})
+    }
+    overall = _compare_summary(current["overall"], baseline["overall"], threshold)
+    return {
+        "baseline_started_at": baseline.get("started_at"),
+        "threshold": threshold,
+        "overall": overall,
+        "by_endpoint": by_endpoint,
+        "regressed": bool(overall["regressions"]) or any(c["regressions"] for c in by_endpoint.values())
+    }
+
+
+class BenchmarkBaselineStore:
+    """Named benchmark runs kept in memory and written atomically to a JSON file"""
+
+    def __init__(self, path: Optional[str] = BENCHMARK_BASELINE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._baselines: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._baselines = json.load(f)
+                logger.info(f"Loaded {len(self._baselines)} benchmark baselines from {path}")
+            except Exception as e:
+                logger.error(f"Could not load benchmark baselines from {path}: {e}")
+
+    def _write(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._baselines, indent=2)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".benchmark_baselines.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            # Read-only filesystems (serverless) still keep the baseline for this process
+            logger.error(f"Could not write benchmark baselines to {self.path}: {e}")
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._baselines.get(name)
+
+    def save(self, name: str, run: Dict[str, Any]) -> None:
+        with self._lock:
+            self._baselines[name] = run
+        self._write()
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            found = self._baselines.pop(name, None) is not None
+        if found:
+            self._write()
+        return found
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": name, "started_at": run.get("started_at"), "config": run.get("config"), "overall": run.get("overall")}
+            for name, run in self._baselines.items()
+        ]
+
+
+# Global baseline store used by the diagnostics routes
+benchmark_baselines = BenchmarkBaselineStore()
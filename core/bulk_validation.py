@@ -0,0 +1,119 @@
+# ==============================================================================
+# File: core/bulk_validation.py - Fast-path validation for bulk people enrichment
+# ==============================================================================
+# Validates thousands of people in one pass over plain dicts (or over columns)
+# instead of constructing and dumping a Pydantic model per person. The rules
+# are the same as PersonEnrichmentInput: every field is an optional string and
+# each person needs linkedinUrl OR firstName + lastName + companyName. Invalid
+# rows are reported with their index instead of failing the whole request.
+
+from typing import Any, Dict, List, Optional, Tuple
+
+print("Loading bulk_validation.py") # DEBUG PRINT
+
+PERSON_FIELDS = ("companyDomain", "companyName", "externalID", "firstName", "lastName", "linkedinUrl")
+IDENTITY_ERROR = "Each person must have 'linkedinUrl' OR ('firstName', 'lastName', and 'companyName')."
+
+# Upstream accepts at most this many people per enrichment request
+MAX_PEOPLE_PER_JOB = 10000
+
+RowError = Dict[str, Any]
+
+
+def validate_people_rows(rows: List[Any]) -> Tuple[List[Dict[str, str]], List[RowError]]:
+    """
+    Validate row-wise input ([{"firstName": ..., ...}, ...]). Returns the valid people,
+    already shaped like the upstream payload (known fields only, no None values), and
+    one {"index", "error"} entry per rejected row.
+    """
+    people: List[Dict[str, str]] = []
+    errors: List[RowError] = []
+    append = people.append
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"index": index, "error": "Each person must be an object."})
+            continue
+        person = {}
+        bad_field = None
+        for field in PERSON_FIELDS:
+            value = row.get(field)
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                bad_field = field
+                break
+            person[field] = value
+        if bad_field:
+            errors.append({"index": index, "error": f"'{bad_field}' must be a string."})
+        elif person.get("linkedinUrl") or (person.get("firstName") and person.get("lastName") and person.get("companyName")):
+            append(person)
+        else:
+            errors.append({"index": index, "error": IDENTITY_ERROR})
+    return people, errors
+
+
+def validate_people_columns(columns: Dict[str, List[Any]]) -> Tuple[List[Dict[str, str]], List[RowError]]:
+    """
+    Validate columnar input ({"firstName": [...], "lastName": [...], ...}). The identity
+    rule is evaluated per column with one comprehension each; dicts are only built for
+    rows that pass.
+    """
+    unknown = [name for name in columns if name not in PERSON_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}. Allowed: {', '.join(PERSON_FIELDS)}")
+    for name, values in columns.items():
+        # A string would otherwise pass as a column of characters
+        if not isinstance(values, list):
+            raise ValueError(f"Column '{name}' must be a list")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length.")
+    row_count = lengths.pop() if lengths else 0
+
+    errors: List[RowError] = []
+    invalid = [False] * row_count
+    for name, values in columns.items():
+        for index in [i for i, value in enumerate(values) if value is not None and value.__class__ is not str]:
+            if not invalid[index]:
+                invalid[index] = True
+                errors.append({"index": index, "error": f"'{name}' must be a string."})
+
+    empty = [None] * row_count
+    has_identity = [
+        bool(l) or bool(f and s and c)
+        for l, f, s, c in zip(
+            columns.get("linkedinUrl") or empty,
+            columns.get("firstName") or empty,
+            columns.get("lastName") or empty,
+            columns.get("companyName") or empty
+        )
+    ]
+    for index in [i for i, ok in enumerate(has_identity) if not ok]:
+        if not invalid[index]:
+            invalid[index] = True
+            errors.append({"index": index, "error": IDENTITY_ERROR})
+
+    names = list(columns)
+    people = [
+        {name: value for name, value in zip(names, values) if value is not None}
+        for values, bad in zip(zip(*columns.values()), invalid)
+        if not bad
+    ]
+    errors.sort(key=lambda error: error["index"])
+    return people, errors
+
+
+def build_enrichment_payloads(
+    people: List[Dict[str, str]],
+    include: Dict[str, bool],
+    notification_options: Optional[Dict[str, Any]] = None,
+    max_people: int = MAX_PEOPLE_PER_JOB
+) -> List[Dict[str, Any]]:
+    """Split validated people into upstream /v2/people/enrich payloads of at most max_people."""
+    payloads = []
+    for start in range(0, len(people), max_people):
+        payload: Dict[str, Any] = {"people": people[start:start + max_people], "include": include}
+        if notification_options:
+            payload["notificationOptions"] = notification_options
+        payloads.append(payload)
+    return payloads
@@ -0,0 +1,286 @@
+# ==============================================================================
+# File: core/cost_estimator.py - Dry-run cost estimates for enrichment requests
+# ==============================================================================
+# Answers "what would this enrichment cost?" without submitting anything:
+# inputs are validated and canonicalized (same dedup keys as batch search),
+# duplicates and records already enriched by a finished job still held in the
+# job manager are counted, and credits and wall time are estimated from the
+# per-field credit costs, the fill rates of recent jobs, the current key pool
+# and the throughput of recently completed enrichment tasks.
+#
+# With check_credits, each available key's GET /v1/credits balance is read and
+# compared with the estimate (covered / covered_expected / not_covered).
+#
+# The enrichment routes send every valid row as given (no dedup, no result
+# cache), so the estimate reports what a real submission would spend and,
+# separately, how much of it is avoidable.
+
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core import job_manager
+from core.background_tasks import POLL_ATTEMPTS, POLL_INTERVAL, enrichment_throughput
+from core.batch_search import company_record_key, normalize_domain, person_record_key
+from core.bulk_validation import MAX_PEOPLE_PER_JOB, validate_people_rows
+from core.key_prober import CREDITS_ENDPOINT, credits_remaining
+from core.probes import run_probes
+from utils.api_client import ApiKeyManager, api_key_manager, _send_surfe_request
+from utils.quality_report import quality_report
+
+try:
+    from config.config import (
+        ENRICH_CREDITS_PER_EMAIL, ENRICH_CREDITS_PER_MOBILE, ENRICH_CREDITS_PER_LINKEDIN,
+        ENRICH_CREDITS_PER_COMPANY, ESTIMATE_HISTORY_JOBS
+    )
+except ImportError:
+    ENRICH_CREDITS_PER_EMAIL = 1.0
+    ENRICH_CREDITS_PER_MOBILE = 1.0
+    ENRICH_CREDITS_PER_LINKEDIN = 0.0
+    ENRICH_CREDITS_PER_COMPANY = 1.0
+    ESTIMATE_HISTORY_JOBS = 50
+
+print("Loading cost_estimator.py") # DEBUG PRINT
+
+# include flag -> (credit cost, quality_report field whose fill rate predicts a charge)
+PEOPLE_CREDIT_FIELDS = {
+    "email": (ENRICH_CREDITS_PER_EMAIL, "email"),
+    "mobile": (ENRICH_CREDITS_PER_MOBILE, "mobile_phone"),
+    "linkedInUrl": (ENRICH_CREDITS_PER_LINKEDIN, "linkedin_url"),
+}
+POLL_WINDOW_SECONDS = POLL_ATTEMPTS * POLL_INTERVAL
+
+
+def _recent_results(kind: str, max_jobs: int = ESTIMATE_HISTORY_JOBS) -> List[Dict[str, Any]]:
+    """Result records of the most recent finished jobs of one kind ("people" / "companies")."""
+    keys = ("people",) if kind == "people" else ("companies", "organizations")
+    records: List[Dict[str, Any]] = []
+    jobs_seen = 0
+    for job in reversed(list(job_manager.jobs.values())):
+        if jobs_seen >= max_jobs:
+            break
+        if job.get("status") not in ("completed", "partially_completed") or not isinstance(job.get("result"), dict):
+            continue
+        for key in keys:
+            if isinstance(job["result"].get(key), list):
+                records.extend(r for r in job["result"][key] if isinstance(r, dict))
+                jobs_seen += 1
+                break
+    return records
+
+
+def _dedup(keys: List[Optional[str]], history_keys: set) -> Dict[str, int]:
+    """Duplicate and previously-enriched counts; records without a canonical key are always unique."""
+    seen = set()
+    duplicates = previously_enriched = 0
+    for key in keys:
+        if key is None:
+            continue
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        if key in history_keys:
+            previously_enriched += 1
+    return {
+        "duplicates": duplicates,
+        "unique": len(keys) - duplicates,
+        "previously_enriched": previously_enriched
+    }
+
+
+def key_pool_status(key_manager: ApiKeyManager = None) -> Dict[str, Any]:
+    """Keys that could take a job right now, and when the next disabled one comes back."""
+    key_manager = key_manager or api_key_manager
+    now = datetime.now()
+    available, reset_times = 0, []
+    for key_info in key_manager.keys:
+        if not key_info.is_temporarily_disabled or (key_info.quota_reset_time and now > key_info.quota_reset_time):
+            available += 1
+        elif key_info.quota_reset_time:
+            reset_times.append(key_info.quota_reset_time)
+    return {
+        "total": len(key_manager.keys),
+        "available": available,
+        "disabled": len(key_manager.keys) - available,
+        "next_key_available_at": min(reset_times).isoformat() if reset_times else None
+    }
+
+
+async def check_credit_balances(key_manager: ApiKeyManager = None) -> Dict[str, Any]:
+    """Raw GET /v1/credits response per available key (read-only, no credits spent)."""
+    key_manager = key_manager or api_key_manager
+    keys = [k.key for k in key_manager.keys if not k.is_temporarily_disabled]
+    entries = await run_probes([
+        (f"...{key[-5:]}", lambda key=key: _send_surfe_request("GET", CREDITS_ENDPOINT, key, timeout=10))
+        for key in keys
+    ])
+    return {entry["name"]: entry.get("result") if entry["ok"] else {"error": entry["error"]} for entry in entries}
+
+
+def credit_coverage(balances: Dict[str, Any], required_max: float, required_expected: Optional[float]) -> Dict[str, Any]:
+    """
+    Whether the keys' remaining credits cover the estimate: covered (even the maximum),
+    covered_expected (only the expected spend), not_covered, or unknown when a balance
+    could not be read. Balances of all credit types are added up.
+    """
+    remaining = {key: credits_remaining(balance) for key, balance in balances.items()}
+    total = sum(value for value in remaining.values() if value is not None)
+    if not remaining or any(value is None for value in remaining.values()):
+        verdict = "unknown"
+    elif total >= required_max:
+        verdict = "covered"
+    elif required_expected is not None and total >= required_expected:
+        verdict = "covered_expected"
+    else:
+        verdict = "not_covered"
+    return {
+        "remaining_by_key": remaining,
+        "remaining_total": total,
+        "required_max": required_max,
+        "required_expected": required_expected,
+        "verdict": verdict
+    }
+
+
+async def add_credit_check(estimate: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the keys' credit balances and a coverage verdict to a dry-run estimate."""
+    balances = await check_credit_balances()
+    coverage = credit_coverage(balances, estimate["credits"]["max"], estimate["credits"]["expected"])
+    estimate["credit_balances"] = balances
+    estimate["credit_coverage"] = coverage
+    if coverage["verdict"] == "not_covered":
+        estimate["warnings"].append("insufficient_credits")
+    return estimate
+
+
+def _wall_time(kind: str, records: int, jobs: int, pool: Dict[str, Any]) -> Dict[str, Any]:
+    rate = enrichment_throughput.records_per_second(kind)
+    # Jobs run side by side, each on its own key
+    parallel = max(1, min(jobs, pool["available"]))
+    if not jobs:
+        seconds = 0.0  # Nothing would be submitted
+    else:
+        seconds = math.ceil(records / jobs) / rate * math.ceil(jobs / parallel) if rate else None
+    return {
+        "basis": "recent_throughput" if rate else "no_history",
+        "records_per_second": round(rate, 2) if rate else None,
+        "parallel_jobs": parallel,
+        "estimated_seconds": round(seconds, 1) if seconds is not None else None,
+        "poll_window_seconds": POLL_WINDOW_SECONDS
+    }
+
+
+def _warnings(counts: Dict[str, int], pool: Dict[str, Any], wall_time: Dict[str, Any], max_records: Optional[int] = None) -> List[str]:
+    warnings = []
+    if max_records is not None and counts["submitted"] > max_records:
+        # The real request would be rejected before anything is submitted
+        warnings.append("exceeds_request_limit")
+    if counts["rejected"]:
+        warnings.append("rejected_records")
+    if counts["valid"] == 0:
+        warnings.append("no_valid_records")
+    if pool["available"] == 0:
+        warnings.append("no_available_keys")
+    if counts["duplicates"]:
+        warnings.append("duplicate_records")
+    if counts["previously_enriched"]:
+        warnings.append("records_already_enriched")
+    if wall_time["estimated_seconds"] and wall_time["estimated_seconds"] > POLL_WINDOW_SECONDS:
+        # The background task stops polling after this; the job would be reported as failed
+        warnings.append("exceeds_poll_window")
+    return warnings
+
+
+def estimate_people_enrichment(people: List[Any], include: Dict[str, bool]) -> Dict[str, Any]:
+    """Dry run of POST /api/v2/people/enrich: validation, dedup, credits and wall time."""
+    valid, errors = validate_people_rows(people)
+    history = _recent_results("people")
+    history_keys = {key for key in map(person_record_key, history) if key}
+    counts = dict(
+        submitted=len(people),
+        valid=len(valid),
+        rejected=len(errors),
+        **_dedup([person_record_key(p) for p in valid], history_keys)
+    )
+    fill_rates = quality_report(history, "people")["fill_rates"] if history else {}
+    # Over the limit the route rejects the whole request: no jobs run and nothing is charged
+    charged = counts["valid"] if counts["submitted"] <= MAX_PEOPLE_PER_JOB else 0
+
+    credits: Dict[str, Any] = {"by_field": {}, "max": 0.0, "expected": 0.0 if history else None, "avoidable_max": 0.0}
+    avoidable = counts["duplicates"] + counts["previously_enriched"] if charged else 0
+    for flag, (cost, field) in PEOPLE_CREDIT_FIELDS.items():
+        if not include.get(flag):
+            continue
+        fill_rate = fill_rates.get(field)
+        entry = {
+            "credits_per_record": cost,
+            "max": charged * cost,
+            "historical_fill_rate": fill_rate,
+            "expected": round(charged * cost * fill_rate, 2) if fill_rate is not None else None
+        }
+        credits["by_field"][flag] = entry
+        credits["max"] += entry["max"]
+        credits["avoidable_max"] += avoidable * cost
+        if credits["expected"] is not None:
+            credits["expected"] = round(credits["expected"] + (entry["expected"] or 0.0), 2)
+
+    jobs = math.ceil(charged / MAX_PEOPLE_PER_JOB)
+    pool = key_pool_status()
+    wall_time = _wall_time("people", charged, jobs, pool)
+    return {
+        "dry_run": True,
+        "kind": "people",
+        "records": counts,
+        "rejected_rows": errors,
+        "jobs": jobs,
+        "credits": credits,
+        "history": {"records": len(history), "max_jobs": ESTIMATE_HISTORY_JOBS},
+        "key_pool": pool,
+        "wall_time": wall_time,
+        "warnings": _warnings(counts, pool, wall_time, max_records=MAX_PEOPLE_PER_JOB)
+    }
+
+
+def estimate_company_enrichment(domains: List[Any]) -> Dict[str, Any]:
+    """Dry run of POST /api/v2/companies/enrich: validation, dedup, credits and wall time."""
+    canonical = [normalize_domain(d) if isinstance(d, str) else None for d in domains]
+    errors = [
+        {"index": i, "error": "Each domain must be a non-empty string."}
+        for i, domain in enumerate(canonical) if domain is None
+    ]
+    valid = [domain for domain in canonical if domain]
+    history = _recent_results("companies")
+    history_keys = {key for key in map(company_record_key, history) if key}
+    counts = dict(
+        submitted=len(domains),
+        valid=len(valid),
+        rejected=len(errors),
+        **_dedup(valid, history_keys)
+    )
+    # A company is charged when it is found; the history's name fill rate approximates the hit rate
+    found_rate = quality_report(history, "companies")["fill_rates"].get("name") if history else None
+    credits = {
+        "credits_per_record": ENRICH_CREDITS_PER_COMPANY,
+        "max": counts["valid"] * ENRICH_CREDITS_PER_COMPANY,
+        "historical_found_rate": found_rate,
+        "expected": round(counts["valid"] * ENRICH_CREDITS_PER_COMPANY * found_rate, 2) if found_rate is not None else None,
+        "avoidable_max": (counts["duplicates"] + counts["previously_enriched"]) * ENRICH_CREDITS_PER_COMPANY
+    }
+
+    jobs = 1 if valid else 0  # The route submits all domains as a single job
+    pool = key_pool_status()
+    wall_time = _wall_time("companies", counts["valid"], jobs, pool)
+    return {
+        "dry_run": True,
+        "kind": "companies",
+        "records": counts,
+        "rejected_rows": errors,
+        "canonical_domains": sorted(set(valid)),
+        "jobs": jobs,
+        "credits": credits,
+        "history": {"records": len(history), "max_jobs": ESTIMATE_HISTORY_JOBS},
+        "key_pool": pool,
+        "wall_time": wall_time,
+        "warnings": _warnings(counts, pool, wall_time)
+    }
@@ -0,0 +1,194 @@
+# ==============================================================================
+# File: core/csv_merge.py - Merge enrichment results back into an uploaded CSV
+# ==============================================================================
+# An uploaded file is kept as-is (spooled to disk once it is large) and every
+# data row gets a stable ID, "row-<n>", which is sent upstream as externalID.
+# Merging is a hash join: the job results are indexed by externalID once, then
+# the original file is re-read in one streaming pass and each row gets its
+# enrichment columns appended with a dict lookup. Rows that were rejected or
+# not found stay in place, so the output has the input's rows in order (blank
+# lines are skipped, as they are on upload). Only people uploads are merged.
+
+import csv
+import io
+import logging
+import secrets
+import tempfile
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set
+
+from core.csv_upload import CSVRecordSplitter, row_id
+from utils.csv_export import Column, EXPORT_PRESETS, extract_value
+
+try:
+    from config.config import CSV_MERGE_TTL, CSV_MERGE_MAX_UPLOADS
+except ImportError:
+    CSV_MERGE_TTL = 24 * 3600
+    CSV_MERGE_MAX_UPLOADS = 20
+
+print("Loading csv_merge.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+ROWS_PER_CHUNK = 500
+STATUS_HEADER = "Enrichment Status"
+
+# Enrichment columns appended to the original ones (the export preset minus the echoed externalID)
+MERGE_PRESETS: Dict[str, List[Column]] = {
+    "people": [column for column in EXPORT_PRESETS["people_enrichment"] if column[1] != "externalID"]
+}
+
+
+def build_result_index(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """externalID -> result record; the first result wins if upstream returns a row twice."""
+    index: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        key = record.get("externalID") if isinstance(record, dict) else None
+        if key is not None and key not in index:
+            index[str(key)] = record
+    return index
+
+
+class MergeSource:
+    """The original bytes of one uploaded CSV plus what happened to each of its rows"""
+
+    def __init__(self, upload_id: str, kind: str, ttl: float):
+        self.id = upload_id
+        self.kind = kind
+        self.filename: Optional[str] = None
+        self.job_ids: List[str] = []
+        self.rejected_rows: Set[int] = set()
+        self.size = 0
+        self.expires_at = time.monotonic() + ttl
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+
+    def write(self, data: bytes) -> None:
+        self._file.seek(0, io.SEEK_END)
+        self._file.write(data)
+        self.size += len(data)
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        # Seek + read with no await in between, so concurrent downloads don't disturb each other
+        position = 0
+        while True:
+            self._file.seek(position)
+            chunk = self._file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            position += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "bytes": self.size,
+            "job_ids": self.job_ids,
+            "rejected_rows": len(self.rejected_rows),
+            "expires_in_seconds": max(0, round(self.expires_at - time.monotonic()))
+        }
+
+
+async def iter_merged_csv(
+    source: MergeSource,
+    index: Dict[str, Dict[str, Any]],
+    columns: Optional[List[Column]] = None,
+    rows_per_chunk: int = ROWS_PER_CHUNK
+) -> AsyncIterator[bytes]:
+    """
+    Yield the original CSV with enrichment columns and an Enrichment Status column
+    appended: enriched, not_found (sent but no result) or rejected (failed validation).
+    """
+    columns = columns or MERGE_PRESETS.get(source.kind, [])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    splitter = CSVRecordSplitter()
+    header: Optional[List[str]] = None
+    width = 0
+    row_number = 0
+    counts = {"enriched": 0, "not_found": 0, "rejected": 0}
+
+    def write_records(records: List[List[str]]) -> None:
+        nonlocal header, width, row_number
+        for record in records:
+            if header is None:
+                header = record
+                width = len(record)
+                taken = {h.strip().lower() for h in header}
+                buffer.write("\ufeff")  # BOM, as in csv_export
+                writer.writerow(header + [
+                    f"{name} (enriched)" if name.lower() in taken else name for name, _ in columns
+                ] + [STATUS_HEADER])
+                continue
+            result = index.get(row_id(row_number))
+            if result is not None:
+                status = "enriched"
+                extra = [extract_value(result, path) for _, path in columns]
+            else:
+                status = "rejected" if row_number in source.rejected_rows else "not_found"
+                extra = [""] * len(columns)
+            counts[status] += 1
+            # Pad short rows so the appended columns line up under their headers
+            writer.writerow(record + [""] * (width - len(record)) + extra + [status])
+            row_number += 1
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    for data in source.iter_bytes():
+        records = splitter.feed(data)
+        for start in range(0, len(records), rows_per_chunk):
+            write_records(records[start:start + rows_per_chunk])
+            yield drain()
+    write_records(splitter.close())
+    tail = drain()
+    if tail:
+        yield tail
+    logger.info(f"📎 Merged upload {source.id}: {row_number} rows ({counts})")
+
+
+class MergeSourceStore:
+    """Uploaded files kept for merging, expired lazily; oldest upload evicted beyond max_uploads"""
+
+    def __init__(self, ttl: float = CSV_MERGE_TTL, max_uploads: int = CSV_MERGE_MAX_UPLOADS):
+        self.ttl = ttl
+        self.max_uploads = max_uploads
+        self._sources: Dict[str, MergeSource] = {}
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for upload_id in [k for k, v in self._sources.items() if v.expires_at <= now]:
+            self._sources.pop(upload_id).close()
+
+    def create(self, kind: str) -> MergeSource:
+        self._evict_expired()
+        while len(self._sources) >= self.max_uploads:
+            oldest = min(self._sources, key=lambda k: self._sources[k].expires_at)
+            self._sources.pop(oldest).close()
+        source = MergeSource(secrets.token_urlsafe(12), kind, self.ttl)
+        self._sources[source.id] = source
+        return source
+
+    def get(self, upload_id: str) -> Optional[MergeSource]:
+        self._evict_expired()
+        return self._sources.get(upload_id)
+
+    def delete(self, upload_id: str) -> bool:
+        source = self._sources.pop(upload_id, None)
+        if source is None:
+            return False
+        source.close()
+        return True
+
+
+# Global store shared by the upload and export routes
+merge_sources = MergeSourceStore()
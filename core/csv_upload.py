@@ -0,0 +1,223 @@
+# ==============================================================================
+# File: core/csv_upload.py - Streaming CSV ingest for people enrichment
+# ==============================================================================
+# Parses a multipart/form-data upload straight off the request stream with
+# python-multipart. CSV bytes are decoded and split into records as they
+# arrive, headers are auto-mapped to enrichment fields (First Name, LinkedIn
+# URL, Company Domain, ...), and rows are validated and handed out in batches,
+# so only the current batch is ever held in memory. Each row is sent with a
+# positional externalID ("row-<n>") so results can be merged back into the
+# original file (core/csv_merge.py).
+
+import codecs
+import csv
+import io
+import logging
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from core.bulk_validation import validate_people_rows
+
+try:
+    from python_multipart import MultipartParser
+    from python_multipart.multipart import parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+print("Loading csv_upload.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+# Normalized header (lower-case, letters/digits only) -> enrichment field
+HEADER_ALIASES = {
+    "firstname": "firstName", "first": "firstName", "givenname": "firstName",
+    "lastname": "lastName", "last": "lastName", "surname": "lastName", "familyname": "lastName",
+    "companyname": "companyName", "company": "companyName", "organization": "companyName",
+    "organisation": "companyName", "accountname": "companyName", "account": "companyName",
+    "companydomain": "companyDomain", "domain": "companyDomain", "website": "companyDomain",
+    "companywebsite": "companyDomain",
+    "linkedinurl": "linkedinUrl", "linkedin": "linkedinUrl", "linkedinprofile": "linkedinUrl",
+    "linkedinprofileurl": "linkedinUrl", "personlinkedinurl": "linkedinUrl", "profileurl": "linkedinUrl",
+    "externalid": "externalID", "id": "externalID", "recordid": "externalID",
+}
+
+
+def row_id(index: int) -> str:
+    """Stable externalID for the index-th data row of an upload (0-based, header excluded)."""
+    return f"row-{index}"
+
+
+def map_headers(headers: List[str]) -> Dict[int, str]:
+    """Column index -> enrichment field; the first column matching a field wins."""
+    mapping: Dict[int, str] = {}
+    for index, header in enumerate(headers):
+        field = HEADER_ALIASES.get(re.sub(r"[^a-z0-9]", "", header.lower()))
+        if field and field not in mapping.values():
+            mapping[index] = field
+    return mapping
+
+
+class CSVRecordSplitter:
+    """Incrementally decodes CSV bytes and returns complete records (quoted newlines allowed)"""
+
+    def __init__(self, encoding: str = "utf-8-sig"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buffer = ""
+
+    def _parse(self, text: str) -> List[List[str]]:
+        return [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+
+    def feed(self, data: bytes) -> List[List[str]]:
+        self._buffer += self._decoder.decode(data)
+        end = self._buffer.rfind("\n")
+        if end == -1:
+            return []
+        complete = self._buffer[:end + 1]
+        if complete.count('"') % 2:
+            return []  # the last newline is inside a quoted field; wait for more data
+        self._buffer = self._buffer[end + 1:]
+        return self._parse(complete)
+
+    def close(self) -> List[List[str]]:
+        rest = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return self._parse(rest) if rest.strip() else []
+
+
+class PeopleCSVUpload:
+    """Streams the first file part of a multipart upload into validated batches of people"""
+
+    def __init__(self, content_type: str, batch_size: int, source: Optional[Any] = None):
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Expected a multipart/form-data upload with a CSV file.")
+        self.batch_size = batch_size
+        # Optional MergeSource: receives the raw file bytes and the rejected row indexes
+        self.source = source
+        self.filename: Optional[str] = None
+        self.headers: Optional[List[str]] = None
+        self.mapping: Dict[int, str] = {}
+        self.rows_read = 0
+        self.accepted = 0
+        self.errors: List[Dict] = []
+        self.error_count = 0
+
+        self._splitter = CSVRecordSplitter()
+        self._records: List[List[str]] = []
+        self._batch: List[Dict[str, str]] = []
+        self._part_headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file_part = False
+        self._file_done = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._append_header("_header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._append_header("_header_value", data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    # --- multipart callbacks (sync; they only buffer records) ---
+
+    def _append_header(self, name: str, data: bytes) -> None:
+        setattr(self, name, getattr(self, name) + data)
+
+    def _on_part_begin(self) -> None:
+        self._part_headers = {}
+
+    def _on_header_end(self) -> None:
+        self._part_headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, params = parse_options_header(self._part_headers.get(b"content-disposition", b""))
+        filename = params.get(b"filename")
+        self._in_file_part = filename is not None and not self._file_done
+        if self._in_file_part:
+            self.filename = filename.decode("utf-8", "replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file_part:
+            if self.source is not None:
+                self.source.write(data[start:end])
+            self._records.extend(self._splitter.feed(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._in_file_part:
+            self._records.extend(self._splitter.close())
+            self._in_file_part = False
+            self._file_done = True
+
+    # --- batching ---
+
+    def _consume_records(self) -> None:
+        records, self._records = self._records, []
+        if records and self.headers is None:
+            self.headers = [header.strip() for header in records.pop(0)]
+            self.mapping = map_headers(self.headers)
+            fields = set(self.mapping.values())
+            if "linkedinUrl" not in fields and not {"firstName", "lastName", "companyName"} <= fields:
+                raise ValueError(
+                    "CSV needs a LinkedIn URL column or First Name, Last Name and Company Name columns. "
+                    f"Found: {', '.join(self.headers)}"
+                )
+        if not records:
+            return
+        rows = [
+            {field: row[index].strip() for index, field in self.mapping.items() if index < len(row) and row[index].strip()}
+            for row in records
+        ]
+        people, errors = validate_people_rows(rows)
+        rejected = {error["index"] for error in errors}
+        valid_indexes = (i for i in range(len(rows)) if i not in rejected)
+        for person, index in zip(people, valid_indexes):
+            # Positional ID replaces any externalID column; the original value stays in the file
+            person["externalID"] = row_id(self.rows_read + index)
+        for error in errors:
+            error["index"] += self.rows_read
+            error["line"] = error["index"] + 2  # 1-based, after the header line
+            if self.source is not None:
+                self.source.rejected_rows.add(error["index"])
+        self.error_count += len(errors)
+        self.errors.extend(errors[:max(0, 1000 - len(self.errors))])
+        self.rows_read += len(rows)
+        self.accepted += len(people)
+        self._batch.extend(people)
+
+    def _take_batches(self, final: bool) -> List[List[Dict[str, str]]]:
+        batches = []
+        while len(self._batch) >= self.batch_size or (final and self._batch):
+            batches.append(self._batch[:self.batch_size])
+            self._batch = self._batch[self.batch_size:]
+        return batches
+
+    async def batches(self, stream: AsyncIterator[bytes]) -> AsyncIterator[List[Dict[str, str]]]:
+        """Feed the request body through the parser, yielding each full batch as soon as it fills."""
+        async for chunk in stream:
+            self._parser.write(chunk)
+            self._consume_records()
+            for batch in self._take_batches(final=False):
+                yield batch
+        self._parser.finalize()
+        if self.filename is None:
+            raise ValueError("No file found in the upload (send it as a multipart file field).")
+        self._consume_records()
+        for batch in self._take_batches(final=True):
+            yield batch
+
+    def summary(self) -> Dict:
+        return {
+            "filename": self.filename,
+            "rows": self.rows_read,
+            "accepted": self.accepted,
+            "rejected": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+            "column_mapping": {self.headers[index]: field for index, field in self.mapping.items()} if self.headers else {},
+            "unmapped_columns": [h for i, h in enumerate(self.headers or []) if i not in self.mapping]
+        }
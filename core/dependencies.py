@@ -4,9 +4,16 @@
 
 import json
 import random
+import secrets
+from typing import Optional
 from fastapi import Header, HTTPException
 import logging
 
+try:
+    from config.config import ADMIN_API_TOKEN
+except ImportError:
+    ADMIN_API_TOKEN = ""
+
 print("Loading dependencies.py") # DEBUG PRINT
 
 logger = logging.getLogger(__name__)
@@ -47,3 +54,14 @@ def get_api_key() -> str:
     except Exception as e:
         logger.error(f"Unexpected error in get_api_key: {e}")
         raise HTTPException(status_code=500, detail="Failed to obtain API key.")
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency for admin-only endpoints: the X-Admin-Token header must match ADMIN_API_TOKEN.
+    Unlike get_api_key (which only hands out a server-side Surfe key), this authenticates the caller.
+    Without ADMIN_API_TOKEN configured the endpoints are disabled.
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail={"error": "Admin endpoints are disabled; set ADMIN_API_TOKEN to enable them."})
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail={"error": "Missing or invalid X-Admin-Token header."})
@@ -0,0 +1,155 @@
+# ==============================================================================
+# File: core/domain_chunking.py - Company search with very large domain lists
+# ==============================================================================
+# Surfe rejects (or slows down on) searches carrying thousands of domains.
+# Inclusion lists are split into upstream-safe chunks that are searched
+# concurrently and merged. Exclusion lists beyond the upstream limit are applied
+# here against a set, fetching extra pages until `limit` companies survive.
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from core.batch_search import normalize_domain
+from utils.api_client import surfe_client
+
+try:
+    from config.config import (
+        BATCH_SEARCH_CONCURRENCY,
+        SEARCH_DOMAIN_CHUNK_SIZE,
+        SEARCH_MAX_EXCLUDED_DOMAINS,
+        SEARCH_EXCLUSION_MAX_PAGES,
+    )
+except ImportError:
+    BATCH_SEARCH_CONCURRENCY = 8
+    SEARCH_DOMAIN_CHUNK_SIZE = 500
+    SEARCH_MAX_EXCLUDED_DOMAINS = 500
+    SEARCH_EXCLUSION_MAX_PAGES = 10
+
+print("Loading domain_chunking.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = "/v2/companies/search"
+
+
+def needs_chunking(payload: Dict[str, Any]) -> bool:
+    filters = payload.get("filters") or {}
+    return (
+        len(filters.get("domains") or []) > SEARCH_DOMAIN_CHUNK_SIZE
+        or len(filters.get("domainsExcluded") or []) > SEARCH_MAX_EXCLUDED_DOMAINS
+    )
+
+
+async def _search(payload: Dict[str, Any], timeout: int) -> Dict[str, Any]:
+    return await surfe_client.make_request_with_rotation(
+        "POST", ENDPOINT, json_data=payload, timeout=timeout, max_retries=3, retry_delay=0.5
+    )
+
+
+async def _search_included_chunks(payload: Dict[str, Any], domains: List[str], timeout: int) -> Dict[str, Any]:
+    """Search each chunk of the inclusion list concurrently and merge by domain."""
+    chunks = [domains[i:i + SEARCH_DOMAIN_CHUNK_SIZE] for i in range(0, len(domains), SEARCH_DOMAIN_CHUNK_SIZE)]
+    semaphore = asyncio.Semaphore(max(1, BATCH_SEARCH_CONCURRENCY))
+
+    async def run_chunk(chunk: List[str]) -> Dict[str, Any]:
+        chunk_payload = dict(payload, pageToken="", filters=dict(payload["filters"], domains=chunk))
+        async with semaphore:
+            return await _search(chunk_payload, timeout)
+
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+    failed = [result for result in results if "error" in result]
+    if len(failed) == len(results):
+        return failed[0]
+
+    limit = payload.get("limit") or 10
+    companies: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        for company in result.get("companies") or []:
+            key = normalize_domain(company.get("domain")) or id(company)
+            companies.setdefault(key, company)
+
+    logger.info(f"🧩 Chunked search: {len(domains)} domains in {len(chunks)} chunks, {len(failed)} failed, {len(companies)} companies")
+    return {
+        "companies": list(companies.values())[:limit],
+        "nextPageToken": None,
+        "totalCount": len(companies),
+        "chunking": {
+            "mode": "included_domains",
+            "domains": len(domains),
+            "chunks": len(chunks),
+            "failed_chunks": len(failed),
+            "errors": [result.get("error") for result in failed]
+        }
+    }
+
+
+async def _search_with_local_exclusion(payload: Dict[str, Any], excluded: List[str], timeout: int) -> Dict[str, Any]:
+    """
+    Send the first SEARCH_MAX_EXCLUDED_DOMAINS exclusions upstream and drop the rest
+    here, following nextPageToken (each page sized to the shortfall so the token stays
+    valid) until `limit` companies survive or SEARCH_EXCLUSION_MAX_PAGES is reached.
+    """
+    excluded_set = {domain for domain in (normalize_domain(d) for d in excluded) if domain}
+    limit = payload.get("limit") or 10
+    filters = dict(payload["filters"], domainsExcluded=excluded[:SEARCH_MAX_EXCLUDED_DOMAINS])
+
+    companies: List[Dict[str, Any]] = []
+    page_token = payload.get("pageToken") or ""
+    pages = 0
+    dropped = 0
+    while len(companies) < limit and pages < SEARCH_EXCLUSION_MAX_PAGES:
+        result = await _search(dict(payload, filters=filters, pageToken=page_token, limit=limit - len(companies)), timeout)
+        if "error" in result:
+            if not companies:
+                return result
+            logger.warning(f"⚠️ Exclusion over-fetch stopped on page {pages + 1}: {result.get('error')}")
+            break
+        pages += 1
+        page = result.get("companies") or []
+        for company in page:
+            if normalize_domain(company.get("domain")) in excluded_set:
+                dropped += 1
+            else:
+                companies.append(company)
+        page_token = result.get("nextPageToken")
+        if not page_token or not page:
+            page_token = None
+            break
+
+    logger.info(f"🧩 Local exclusion: {len(excluded_set)} domains, {pages} pages fetched, {dropped} companies dropped")
+    return {
+        "companies": companies,
+        "nextPageToken": page_token,
+        "chunking": {
+            "mode": "excluded_domains",
+            "excluded_domains": len(excluded_set),
+            "sent_upstream": len(filters["domainsExcluded"]),
+            "pages_fetched": pages,
+            "dropped": dropped
+        }
+    }
+
+
+async def chunked_company_search(payload: Dict[str, Any], timeout: int = 20) -> Dict[str, Any]:
+    """
+    Run a company search whose domain lists exceed upstream limits. Returns a result
+    shaped like the Surfe response (companies, nextPageToken) plus a "chunking" summary.
+    """
+    filters = payload.get("filters") or {}
+    domains: Optional[List[str]] = filters.get("domains")
+    excluded: List[str] = filters.get("domainsExcluded") or []
+
+    if domains:
+        # With an inclusion list, exclusions are just a set difference
+        if excluded:
+            excluded_set = {normalize_domain(d) for d in excluded}
+            domains = [d for d in domains if normalize_domain(d) not in excluded_set]
+            payload = dict(payload, filters={k: v for k, v in filters.items() if k != "domainsExcluded"})
+            if not domains:
+                return {"companies": [], "nextPageToken": None, "totalCount": 0}
+        if len(domains) > SEARCH_DOMAIN_CHUNK_SIZE:
+            return await _search_included_chunks(payload, domains, timeout)
+        return await _search(dict(payload, filters=dict(payload["filters"], domains=domains)), timeout)
+
+    return await _search_with_local_exclusion(payload, excluded, timeout)
@@ -0,0 +1,133 @@
+# ==============================================================================
+# File: core/domain_lists.py - Uploaded domain suppression lists
+# ==============================================================================
+# A suppression list is uploaded once, normalized into a hash set (or a Bloom
+# filter when it is very large) and kept for a TTL under a random ID, so many
+# searches can be filtered server-side against it without re-sending it.
+
+import hashlib
+import logging
+import math
+import secrets
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from core.batch_search import normalize_domain
+
+try:
+    from config.config import DOMAIN_LIST_TTL, DOMAIN_LIST_BLOOM_THRESHOLD, DOMAIN_LIST_MAX_LISTS
+except ImportError:
+    DOMAIN_LIST_TTL = 24 * 3600
+    DOMAIN_LIST_BLOOM_THRESHOLD = 200000
+    DOMAIN_LIST_MAX_LISTS = 50
+
+print("Loading domain_lists.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+# Domain fields checked on a person record (same as people_search.js)
+PERSON_DOMAIN_FIELDS = ("companyDomain", "domain", "company_domain", "website")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.error_rate = error_rate
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class DomainList:
+    """One normalized suppression list"""
+
+    def __init__(self, list_id: str, domains: Iterable[str], ttl: float, name: Optional[str] = None):
+        normalized = {domain for domain in (normalize_domain(d) for d in domains) if domain}
+        self.id = list_id
+        self.name = name
+        self.size = len(normalized)
+        self.created_at = time.time()
+        self.expires_at = time.monotonic() + ttl
+        self.ttl = ttl
+        if self.size > DOMAIN_LIST_BLOOM_THRESHOLD:
+            self.kind = "bloom"
+            self._members = BloomFilter(self.size)
+            for domain in normalized:
+                self._members.add(domain)
+        else:
+            self.kind = "set"
+            self._members = frozenset(normalized)
+
+    def contains(self, domain: Optional[str]) -> bool:
+        domain = normalize_domain(domain)
+        return bool(domain) and domain in self._members
+
+    def matches_person(self, person: Dict[str, Any]) -> bool:
+        return any(self.contains(person.get(field)) for field in PERSON_DOMAIN_FIELDS if person.get(field))
+
+    def info(self) -> Dict[str, Any]:
+        info = {
+            "id": self.id,
+            "name": self.name,
+            "size": self.size,
+            "kind": self.kind,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.created_at)),
+            "expires_in_seconds": max(0, round(self.expires_at - time.monotonic()))
+        }
+        if self.kind == "bloom":
+            info["false_positive_rate"] = self._members.error_rate
+            info["memory_bytes"] = self._members.memory_bytes
+        return info
+
+
+class DomainListStore:
+    """In-memory lists keyed by ID, expired lazily; oldest list evicted beyond max_lists"""
+
+    def __init__(self, ttl: float = DOMAIN_LIST_TTL, max_lists: int = DOMAIN_LIST_MAX_LISTS):
+        self.ttl = ttl
+        self.max_lists = max_lists
+        self._lists: Dict[str, DomainList] = {}
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for list_id in [k for k, v in self._lists.items() if v.expires_at <= now]:
+            del self._lists[list_id]
+
+    def create(self, domains: Iterable[str], name: Optional[str] = None, ttl: Optional[float] = None) -> DomainList:
+        self._evict_expired()
+        while len(self._lists) >= self.max_lists:
+            del self._lists[min(self._lists, key=lambda k: self._lists[k].expires_at)]
+        domain_list = DomainList(secrets.token_urlsafe(16), domains, ttl or self.ttl, name)
+        self._lists[domain_list.id] = domain_list
+        logger.info(f"📋 Domain list {domain_list.id} stored: {domain_list.size} domains ({domain_list.kind})")
+        return domain_list
+
+    def get(self, list_id: str) -> Optional[DomainList]:
+        self._evict_expired()
+        return self._lists.get(list_id)
+
+    def delete(self, list_id: str) -> bool:
+        return self._lists.pop(list_id, None) is not None
+
+
+# Global store shared by the people search routes
+domain_lists = DomainListStore()
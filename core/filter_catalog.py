@@ -0,0 +1,178 @@
+# ==============================================================================
+# File: core/filter_catalog.py - Cached, indexed Surfe filter catalog
+# ==============================================================================
+# Fetches /v1/people/search/filters once, serves it from memory and refreshes
+# it in the background after a TTL (stale-while-revalidate). Each facet
+# (industries, departments, seniorities, countries, ...) gets a sorted index
+# of lower-cased whole values and word suffixes, so prefix suggestions are a
+# binary search instead of a scan.
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.api_client import surfe_client
+
+try:
+    from config.config import FILTER_CATALOG_TTL
+except ImportError:
+    FILTER_CATALOG_TTL = 6 * 3600
+
+print("Loading filter_catalog.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+FILTERS_ENDPOINT = "/v1/people/search/filters"
+RETRY_AFTER_FAILURE = 60.0
+VALUE_KEYS = ("name", "Name", "value", "label", "title")
+CODE_KEYS = ("code", "Code", "id", "isoCode")
+
+
+class FacetIndex:
+    """Sorted (key, rank, item index) entries for one facet"""
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+        entries: List[Tuple[str, int, int]] = []
+        for index, item in enumerate(items):
+            value = item["value"].lower()
+            entries.append((value, 0, index))  # rank 0: whole value starts with the query
+            position = value.find(" ")
+            while position != -1:
+                entries.append((value[position + 1:], 1, index))  # rank 1: a later word does
+                position = value.find(" ", position + 1)
+            if item.get("code"):
+                entries.append((str(item["code"]).lower(), 0, index))
+        entries.sort()
+        self._keys = [entry[0] for entry in entries]
+        self._entries = entries
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        query = query.strip().lower()
+        if not query:
+            return []
+        start = bisect.bisect_left(self._keys, query)
+        matches: Dict[int, int] = {}
+        for position in range(start, len(self._entries)):
+            key, rank, index = self._entries[position]
+            if not key.startswith(query):
+                break
+            if rank < matches.get(index, 2):
+                matches[index] = rank
+        # Whole-value prefix matches first, then shorter values, then alphabetical
+        ranked = sorted(matches, key=lambda i: (matches[i], len(self.items[i]["value"]), self.items[i]["value"]))
+        return [self.items[i] for i in ranked[:limit]]
+
+
+def _normalize_item(raw: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(raw, str):
+        return {"value": raw} if raw.strip() else None
+    if isinstance(raw, dict):
+        value = next((raw[k] for k in VALUE_KEYS if raw.get(k)), None)
+        if value is None:
+            return None
+        item = {"value": str(value)}
+        code = next((raw[k] for k in CODE_KEYS if raw.get(k)), None)
+        if code is not None:
+            item["code"] = str(code)
+        return item
+    return None
+
+
+def extract_facets(payload: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """Collect every list of filter values in the upstream response, keyed by its field name."""
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+
+    def walk(node: Any) -> None:
+        if not isinstance(node, dict):
+            return
+        for key, value in node.items():
+            if isinstance(value, list):
+                items = [item for item in (_normalize_item(raw) for raw in value) if item]
+                if items:
+                    facets.setdefault(key, []).extend(items)
+            elif isinstance(value, dict):
+                walk(value)
+
+    walk(payload)
+    return facets
+
+
+class FilterCatalog:
+    """Stale-while-revalidate cache of the upstream filter catalog"""
+
+    def __init__(self, ttl: float = FILTER_CATALOG_TTL):
+        self.ttl = ttl
+        self.raw: Optional[Dict[str, Any]] = None
+        self.indexes: Dict[str, FacetIndex] = {}
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[Any] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl
+
+    async def refresh(self) -> bool:
+        result = await surfe_client.make_request_with_rotation("GET", FILTERS_ENDPOINT, timeout=30, max_retries=3)
+        if "error" in result:
+            self.last_error = result.get("error")
+            self._retry_at = time.monotonic() + RETRY_AFTER_FAILURE
+            logger.warning(f"⚠️ Filter catalog refresh failed: {self.last_error}")
+            return False
+
+        facets = extract_facets(result)
+        self.indexes = {name: FacetIndex(items) for name, items in facets.items()}
+        self.raw = result
+        self.loaded_at = time.monotonic()
+        self.last_error = None
+        logger.info(f"✅ Filter catalog loaded: {', '.join(f'{k}={len(v.items)}' for k, v in self.indexes.items())}")
+        return True
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+            self._refresh_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return self._refresh_task
+
+    async def ensure_loaded(self) -> bool:
+        """
+        Wait for the first load only; afterwards stale data is served while a refresh runs.
+        After a failed load, callers don't wait on upstream again for RETRY_AFTER_FAILURE seconds.
+        """
+        if time.monotonic() < self._retry_at:
+            return self.loaded_at is not None
+        if self.loaded_at is None:
+            try:
+                await asyncio.shield(self._start_refresh())
+            except Exception as e:
+                self.last_error = str(e)
+                self._retry_at = time.monotonic() + RETRY_AFTER_FAILURE
+                logger.error(f"❌ Filter catalog load failed: {e}")
+        elif self.is_stale:
+            self._start_refresh()
+        return self.loaded_at is not None
+
+    async def suggest(self, facet: str, query: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Top matches for `query` in `facet`, or None if the facet is unknown."""
+        await self.ensure_loaded()
+        index = self.indexes.get(facet)
+        return index.suggest(query, limit) if index else None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded_at is not None,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at is not None else None,
+            "ttl_seconds": self.ttl,
+            "stale": self.is_stale,
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "facets": {name: len(index.items) for name, index in self.indexes.items()},
+            "last_error": self.last_error
+        }
+
+
+# Global catalog shared by the filters and diagnostics routes
+filter_catalog = FilterCatalog()
@@ -0,0 +1,310 @@
+# ==============================================================================
+# File: core/key_prober.py - Background API key health prober
+# ==============================================================================
+# Probes every configured API key with the cheapest upstream call (GET of the
+# people search filter catalog, no credits used) and feeds the outcome straight
+# into the key manager: a key that recovers is re-enabled on the next probe
+# instead of sitting out its fixed cooldown, and a key that starts failing is
+# taken out of rotation before user requests run into it.
+#
+# The probe uses no credits, so it still succeeds once a key's quota is used up.
+# A key disabled for quota is therefore only re-enabled early when GET /v1/credits
+# also reports credits left; otherwise its cooldown runs out as set.
+#
+# The interval adapts per key: healthy keys are probed every
+# KEY_PROBE_HEALTHY_INTERVAL seconds, disabled or suspect keys every
+# KEY_PROBE_SUSPECT_INTERVAL seconds, backing off exponentially (up to the
+# healthy interval) while they keep failing.
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from utils.api_client import ApiKeyManager, ApiKeyInfo, api_key_manager, _send_surfe_request
+
+try:
+    from config.config import (
+        KEY_PROBE_ENABLED, KEY_PROBE_HEALTHY_INTERVAL, KEY_PROBE_SUSPECT_INTERVAL,
+        KEY_PROBE_FAILURE_THRESHOLD, KEY_PROBE_TIMEOUT
+    )
+except ImportError:
+    KEY_PROBE_ENABLED = True
+    KEY_PROBE_HEALTHY_INTERVAL = 600.0
+    KEY_PROBE_SUSPECT_INTERVAL = 30.0
+    KEY_PROBE_FAILURE_THRESHOLD = 2
+    KEY_PROBE_TIMEOUT = 10
+
+print("Loading key_prober.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+PROBE_ENDPOINT = "/v1/people/search/filters"
+CREDITS_ENDPOINT = "/v1/credits"
+QUOTA_KEYWORDS = ("quota", "limit", "exceeded", "rate", "throttle", "usage")
+CREDIT_BALANCE_WORDS = ("remaining", "available", "balance", "left")
+
+# Cooldowns (minutes) used when the prober disables a key. They only matter if the
+# prober stops: while it runs, the key is re-enabled as soon as a probe succeeds.
+INVALID_COOLDOWN_MINUTES = 99999
+QUOTA_COOLDOWN_MINUTES = 60
+RATE_LIMIT_COOLDOWN_MINUTES = 5
+FAILURE_COOLDOWN_MINUTES = 5
+
+
+def credits_remaining(result: Dict[str, Any]) -> Optional[float]:
+    """
+    Credits left according to a /v1/credits response: the sum of the numeric fields named
+    like remaining/available/balance/left (or exactly "credits"), nested objects included.
+    None if the call failed or no such field was found.
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return None
+    found = []
+
+    def walk(value: Any) -> None:
+        if isinstance(value, dict):
+            for name, item in value.items():
+                lowered = str(name).lower()
+                if isinstance(item, (int, float)) and not isinstance(item, bool):
+                    if lowered == "credits" or any(word in lowered for word in CREDIT_BALANCE_WORDS):
+                        found.append(float(item))
+                else:
+                    walk(item)
+
+    walk(result)
+    return sum(found) if found else None
+
+
+def classify_probe_result(result: Dict[str, Any]) -> str:
+    """healthy, invalid (401), quota (403 quota / 429), suspect (timeouts, 5xx, ...) or inconclusive."""
+    # probe_key adds no_credits: healthy, but a quota-disabled key whose credit check shows nothing left
+    if "error" not in result:
+        return "healthy"
+    status_code = result.get("status_code")
+    message = str(result.get("error", "")).lower()
+    if status_code == 401:
+        return "invalid"
+    if status_code == 429 or (status_code == 403 and any(k in message for k in QUOTA_KEYWORDS)):
+        return "quota"
+    if status_code in (400, 404, 405):
+        # The probe request itself was rejected; says nothing about the key
+        return "inconclusive"
+    return "suspect"
+
+
+class _ProbeState:
+    def __init__(self):
+        self.next_probe_at = 0.0  # monotonic; 0 = probe on the first pass
+        self.probed_at = 0.0
+        self.consecutive_failures = 0
+        self.last_outcome: Optional[str] = None
+        self.last_status_code: Optional[int] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_probed: Optional[datetime] = None
+        self.probes = 0
+
+
+class KeyHealthProber:
+    """Periodically probes each API key and enables/disables it in the key manager"""
+
+    def __init__(
+        self,
+        key_manager: ApiKeyManager = None,
+        healthy_interval: float = KEY_PROBE_HEALTHY_INTERVAL,
+        suspect_interval: float = KEY_PROBE_SUSPECT_INTERVAL,
+        failure_threshold: int = KEY_PROBE_FAILURE_THRESHOLD,
+        timeout: int = KEY_PROBE_TIMEOUT,
+        enabled: bool = KEY_PROBE_ENABLED
+    ):
+        self._key_manager = key_manager or api_key_manager
+        self.healthy_interval = healthy_interval
+        self.suspect_interval = min(suspect_interval, healthy_interval)
+        self.failure_threshold = max(1, failure_threshold)
+        self.timeout = timeout
+        self.enabled = enabled
+        self._states: Dict[str, _ProbeState] = {}
+        self._recoveries = 0
+        self._preemptive_disables = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _state(self, key: str) -> _ProbeState:
+        if key not in self._states:
+            self._states[key] = _ProbeState()
+        return self._states[key]
+
+    def _interval(self, key_info: ApiKeyInfo, state: _ProbeState) -> float:
+        if not key_info.is_temporarily_disabled and state.consecutive_failures == 0:
+            interval = self.healthy_interval
+        else:
+            backoff = 2 ** max(0, state.consecutive_failures - 1)
+            interval = min(self.suspect_interval * backoff, self.healthy_interval)
+        # Jitter so keys added together don't stay in lockstep
+        return interval * random.uniform(0.9, 1.1)
+
+    async def probe_key(self, key_info: ApiKeyInfo) -> str:
+        """Probe one key, update the key manager and schedule its next probe. Returns the outcome."""
+        key = key_info.key
+        state = self._state(key)
+        started = time.monotonic()
+        # Sent directly (not via make_surfe_request) so probes stay out of the dashboard's upstream metrics
+        result = await _send_surfe_request("GET", PROBE_ENDPOINT, key, timeout=self.timeout)
+        outcome = classify_probe_result(result)
+        if outcome == "healthy" and key_info.is_temporarily_disabled and key_info.quota_exhausted:
+            # The probe is free, so it passes even with no quota left; check the balance too
+            credits = credits_remaining(await _send_surfe_request("GET", CREDITS_ENDPOINT, key, timeout=self.timeout))
+            if not credits or credits <= 0:
+                outcome = "no_credits"
+
+        state.probes += 1
+        state.last_outcome = outcome
+        state.last_status_code = result.get("status_code") if "error" in result else 200
+        state.last_latency_ms = round((time.monotonic() - started) * 1000, 2)
+        state.last_probed = datetime.now()
+        state.probed_at = time.monotonic()
+        key_info.probe_status = outcome
+        key_info.last_probed = state.last_probed
+
+        was_disabled = key_info.is_temporarily_disabled
+        if outcome == "healthy":
+            state.consecutive_failures = 0
+            if was_disabled:
+                self._recoveries += 1
+                self._key_manager.enable_key(key, reason="health probe succeeded")
+        elif outcome == "no_credits":
+            # Authenticates but still out of quota: leave its cooldown alone, probe less often
+            state.consecutive_failures += 1
+        elif outcome != "inconclusive":
+            state.consecutive_failures += 1
+            if outcome == "invalid":
+                self._disable(key_info, INVALID_COOLDOWN_MINUTES, "health probe: unauthorized")
+            elif outcome == "quota":
+                rate_limited = state.last_status_code == 429
+                cooldown = RATE_LIMIT_COOLDOWN_MINUTES if rate_limited else QUOTA_COOLDOWN_MINUTES
+                self._disable(key_info, cooldown, f"health probe: {state.last_status_code}", quota=not rate_limited)
+            elif state.consecutive_failures >= self.failure_threshold:
+                # One blip is not enough; repeated failures take the key out before users hit it
+                self._disable(key_info, FAILURE_COOLDOWN_MINUTES, f"health probe failed {state.consecutive_failures}x")
+
+        state.next_probe_at = time.monotonic() + self._interval(key_info, state)
+        logger.debug(f"🩺 Key ...{key[-5:]}: {outcome} ({state.last_latency_ms}ms)")
+        return outcome
+
+    def _disable(self, key_info: ApiKeyInfo, cooldown_minutes: float, reason: str, quota: bool = False) -> None:
+        if not key_info.is_temporarily_disabled:
+            self._preemptive_disables += 1
+        self._key_manager.disable_key(key_info.key, cooldown_minutes, reason, quota=quota)
+
+    def _due_keys(self, now: float):
+        due = []
+        for key_info in self._key_manager.keys:
+            state = self._state(key_info.key)
+            next_probe_at = state.next_probe_at
+            if key_info.is_temporarily_disabled and state.consecutive_failures == 0:
+                # Disabled by user traffic since the last probe: check it soon instead of waiting out a healthy interval
+                next_probe_at = min(next_probe_at, state.probed_at + self.suspect_interval)
+            if next_probe_at <= now:
+                due.append(key_info)
+        return due
+
+    async def probe_due(self) -> Dict[str, str]:
+        """Probe every key whose next probe time has come, concurrently."""
+        due = self._due_keys(time.monotonic())
+        outcomes = await asyncio.gather(*(self.probe_key(key_info) for key_info in due), return_exceptions=True)
+        results = {}
+        for key_info, outcome in zip(due, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"🩺 Probe of key ...{key_info.key[-5:]} raised: {outcome}")
+                self._state(key_info.key).next_probe_at = time.monotonic() + self.suspect_interval
+                outcome = "error"
+            results[f"...{key_info.key[-5:]}"] = outcome
+        return results
+
+    async def probe_all(self) -> Dict[str, str]:
+        """Probe every key now, regardless of schedule."""
+        for state in self._states.values():
+            state.next_probe_at = 0.0
+        return await self.probe_due()
+
+    def _seconds_until_next(self) -> float:
+        if not self._key_manager.keys:
+            return self.healthy_interval
+        now = time.monotonic()
+        soonest = min(self._state(k.key).next_probe_at for k in self._key_manager.keys)
+        # Re-check at least every suspect interval so keys disabled by user traffic are noticed
+        return max(1.0, min(soonest - now, self.suspect_interval))
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                results = await self.probe_due()
+                if results:
+                    logger.info(f"🩺 Key probes: {results}")
+            except Exception as e:
+                logger.error(f"🩺 Key prober pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._seconds_until_next())
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Start the background prober on the running event loop."""
+        if self.is_running or not self.enabled or self.healthy_interval <= 0 or not self._key_manager.keys:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"🩺 Key prober: Started for {len(self._key_manager.keys)} keys "
+                    f"(healthy every {self.healthy_interval}s, suspect every {self.suspect_interval}s)")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._stopping = True
+            # Don't wait out an in-flight probe's timeout on shutdown
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"🩺 Key prober exited with error: {e}")
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        keys = {}
+        for key_info in self._key_manager.keys:
+            state = self._state(key_info.key)
+            keys[f"...{key_info.key[-5:]}"] = {
+                "last_outcome": state.last_outcome,
+                "last_status_code": state.last_status_code,
+                "last_latency_ms": state.last_latency_ms,
+                "last_probed": state.last_probed.isoformat() if state.last_probed else None,
+                "consecutive_failures": state.consecutive_failures,
+                "probes": state.probes,
+                "next_probe_in_seconds": max(0, round(state.next_probe_at - now)) if state.last_probed else 0,
+                "is_disabled": key_info.is_temporarily_disabled
+            }
+        return {
+            "running": self.is_running,
+            "enabled": self.enabled,
+            "healthy_interval": self.healthy_interval,
+            "suspect_interval": self.suspect_interval,
+            "failure_threshold": self.failure_threshold,
+            "recoveries": self._recoveries,
+            "preemptive_disables": self._preemptive_disables,
+            "keys": keys
+        }
+
+
+# Global prober, started and stopped with the app
+key_prober = KeyHealthProber()
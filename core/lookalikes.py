@@ -0,0 +1,285 @@
+# ==============================================================================
+# File: core/lookalikes.py - Cached, concurrent multi-seed lookalike search
+# ==============================================================================
+# Each seed domain's /v1/organizations/look-alikes response is cached for
+# LOOKALIKE_CACHE_TTL seconds (identical in-flight requests share one call),
+# seeds are queried concurrently through the rotating client, and results are
+# merged into one list ranked by how many seeds produced each company. The
+# breadth-first expansion feeds each level's results back in as the next
+# level's seeds, within a depth limit and an upstream request budget.
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.batch_search import company_record_key, normalize_domain
+from utils.api_client import surfe_client
+
+try:
+    from config.config import BATCH_SEARCH_CONCURRENCY, LOOKALIKE_CACHE_TTL, LOOKALIKE_CACHE_MAX_ENTRIES
+except ImportError:
+    BATCH_SEARCH_CONCURRENCY = 8
+    LOOKALIKE_CACHE_TTL = 6 * 3600
+    LOOKALIKE_CACHE_MAX_ENTRIES = 5000
+
+print("Loading lookalikes.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+LOOKALIKES_ENDPOINT = "/v1/organizations/look-alikes"
+
+
+class LookalikeCache:
+    """Upstream lookalike responses keyed by (seed domain, limit), with shared in-flight requests"""
+
+    def __init__(self, ttl: float = LOOKALIKE_CACHE_TTL, max_entries: int = LOOKALIKE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get_fresh(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def _store(self, key: Tuple[str, int], result: Dict[str, Any]) -> None:
+        if len(self._entries) >= self.max_entries:
+            # Entries share one TTL, so the first inserted expires first
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+
+    def is_cached(self, domain: str, limit: int) -> bool:
+        return self._get_fresh((domain, limit)) is not None
+
+    async def _fetch(self, key: Tuple[str, int]) -> Dict[str, Any]:
+        domain, limit = key
+        try:
+            result = await surfe_client.make_request_with_rotation(
+                "POST", LOOKALIKES_ENDPOINT, json_data={"domain": domain, "limit": limit},
+                timeout=30, max_retries=3, retry_delay=0.5
+            )
+        except Exception as e:
+            logger.error(f"❌ Lookalikes for {domain} raised: {e}")
+            result = {"error": str(e), "status_code": 500}
+        if "error" not in result:
+            self._store(key, result)
+        return result
+
+    async def get(self, domain: str, limit: int) -> Tuple[Dict[str, Any], bool]:
+        """(upstream response, served from cache). Errors are returned, never cached."""
+        key = (domain, limit)
+        cached = self._get_fresh(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl
+        }
+
+
+# Global cache shared by the lookalike routes
+lookalike_cache = LookalikeCache()
+
+
+def _unique_seeds(domains: List[str]) -> List[str]:
+    seen = set()
+    seeds = []
+    for domain in domains:
+        normalized = normalize_domain(domain)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            seeds.append(normalized)
+    return seeds
+
+
+async def _query_seeds(
+    seeds: List[str],
+    limit: int,
+    concurrency: int,
+    depth: int = 0
+) -> List[Dict[str, Any]]:
+    """Query every seed concurrently; one result entry per seed, in seed order."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(seed: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.monotonic()
+            result, cached = await lookalike_cache.get(seed, limit)
+            elapsed_ms = round((time.monotonic() - started) * 1000, 2)
+        entry = {"seed": seed, "depth": depth, "cached": cached, "elapsed_ms": elapsed_ms}
+        if "error" in result:
+            return dict(entry, success=False, error=result.get("error"), status_code=result.get("status_code", 500))
+        return dict(entry, success=True, companies=result.get("companies") or [])
+
+    return await asyncio.gather(*(run_one(seed) for seed in seeds))
+
+
+class _RankedMerge:
+    """Union of lookalike results keyed by company, counting the seeds that produced each"""
+
+    def __init__(self, exclude: set):
+        self.exclude = exclude
+        self.companies: Dict[str, Dict[str, Any]] = {}
+        self.total_records = 0
+
+    def add(self, query: Dict[str, Any]) -> None:
+        for position, company in enumerate(query.get("companies") or []):
+            self.total_records += 1
+            key = company_record_key(company)
+            if key is None or key in self.exclude:
+                continue
+            merged = self.companies.get(key)
+            if merged is None:
+                merged = dict(company, seedCount=0, seeds=[], bestPosition=position, depth=query["depth"] + 1)
+                self.companies[key] = merged
+            if query["seed"] not in merged["seeds"]:
+                merged["seeds"].append(query["seed"])
+                merged["seedCount"] += 1
+            merged["bestPosition"] = min(merged["bestPosition"], position)
+
+    def ranked(self, max_companies: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Most seeds first, then the closest hop, then the best upstream position
+        ranked = sorted(self.companies.values(), key=lambda c: (-c["seedCount"], c["depth"], c["bestPosition"]))
+        return ranked[:max_companies] if max_companies else ranked
+
+
+def _seed_report(query: Dict[str, Any]) -> Dict[str, Any]:
+    report = {k: v for k, v in query.items() if k != "companies"}
+    if query["success"]:
+        report["count"] = len(query["companies"])
+    return report
+
+
+def _summary(queries: List[Dict[str, Any]], merge: _RankedMerge, started: float) -> Dict[str, Any]:
+    succeeded = [q for q in queries if q["success"]]
+    return {
+        "seed_queries": len(queries),
+        "succeeded": len(succeeded),
+        "failed": len(queries) - len(succeeded),
+        "cache_hits": sum(1 for q in queries if q["cached"]),
+        "upstream_requests": sum(1 for q in queries if not q["cached"]),
+        "total_records": merge.total_records,
+        "unique_companies": len(merge.companies),
+        "wall_time_ms": round((time.monotonic() - started) * 1000, 2),
+        "api_key_used": surfe_client.get_last_api_key_masked()
+    }
+
+
+async def multi_seed_lookalikes(
+    domains: List[str],
+    limit: int = 10,
+    concurrency: int = BATCH_SEARCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """Lookalikes for every seed, merged and ranked by the number of seeds that returned each company."""
+    started = time.monotonic()
+    seeds = _unique_seeds(domains)
+    queries = await _query_seeds(seeds, limit, concurrency)
+
+    merge = _RankedMerge(exclude=set(seeds))
+    for query in queries:
+        merge.add(query)
+
+    summary = _summary(queries, merge, started)
+    logger.info(f"🎯 Multi-seed lookalikes: {len(seeds)} seeds -> {summary['unique_companies']} companies in {summary['wall_time_ms']}ms")
+    return {
+        "companies": merge.ranked(),
+        "seeds": [_seed_report(query) for query in queries],
+        "summary": summary
+    }
+
+
+async def expand_lookalikes(
+    domains: List[str],
+    limit: int = 10,
+    depth: int = 2,
+    max_requests: int = 50,
+    max_companies: Optional[int] = None,
+    concurrency: int = BATCH_SEARCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Breadth-first expansion: level 0 queries the seeds, each later level queries the
+    companies discovered by the previous one. Every domain is queried at most once
+    (visited set); cache hits are free, uncached queries count against max_requests.
+    Stops at `depth` levels, when the budget runs out or when max_companies are found.
+    """
+    started = time.monotonic()
+    frontier = _unique_seeds(domains)
+    visited = set(frontier)
+    merge = _RankedMerge(exclude=set(frontier))
+    queries: List[Dict[str, Any]] = []
+    budget = max_requests
+    stop_reason = "depth_reached"
+    skipped = 0
+
+    for level in range(depth):
+        if not frontier:
+            stop_reason = "exhausted"
+            break
+        # Cached domains cost nothing; the rest are taken in frontier order while budget lasts
+        to_query = []
+        for domain in frontier:
+            if lookalike_cache.is_cached(domain, limit):
+                to_query.append(domain)
+            elif budget > 0:
+                budget -= 1
+                to_query.append(domain)
+        skipped = len(frontier) - len(to_query)
+
+        level_queries = await _query_seeds(to_query, limit, concurrency, depth=level)
+        queries.extend(level_queries)
+        next_frontier = []
+        for query in level_queries:
+            merge.add(query)
+            for company in query.get("companies") or []:
+                domain = normalize_domain(company.get("domain"))
+                if domain and domain not in visited:
+                    visited.add(domain)
+                    next_frontier.append(domain)
+        frontier = next_frontier
+
+        if skipped:
+            stop_reason = "budget_exhausted"
+            break
+        if max_companies and len(merge.companies) >= max_companies:
+            stop_reason = "max_companies_reached"
+            break
+
+    if not frontier and stop_reason == "depth_reached":
+        stop_reason = "exhausted"
+
+    summary = _summary(queries, merge, started)
+    summary.update({
+        "levels_run": len({q["depth"] for q in queries}),
+        "max_depth": depth,
+        "request_budget": max_requests,
+        "budget_remaining": budget,
+        "unqueried_domains": len(frontier) + skipped,
+        "stop_reason": stop_reason
+    })
+    logger.info(f"🎯 Lookalike expansion: {summary['unique_companies']} companies, {summary['upstream_requests']} requests, stopped: {stop_reason}")
+    return {
+        "companies": merge.ranked(max_companies),
+        "seeds": [_seed_report(query) for query in queries],
+        "summary": summary
+    }
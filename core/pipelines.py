@@ -0,0 +1,290 @@
+# ==============================================================================
+# File: core/pipelines.py - Multi-stage search pipelines run server-side
+# ==============================================================================
+# Search -> enrich: pages through /v2/people/search and hands the people to
+# /v2/people/enrich in chunks as the pages arrive, so enrichment of the first
+# chunk starts while later pages are still being fetched. Every chunk is an
+# ordinary enrichment job (run_enrichment_task); the pipeline job ID reports
+# unified progress and ends with all enriched people in search order.
+#
+# Company -> people fan-out: pages through /v2/companies/search, groups the
+# domains found into batches and runs one paginated people search per batch
+# (companies.domains), concurrently under a semaphore. People are streamed out
+# de-duplicated as soon as any batch returns them.
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from core import background_tasks, job_manager
+from core.batch_search import normalize_domain, person_record_key
+from core.bulk_validation import build_enrichment_payloads, validate_people_rows
+from core.csv_upload import row_id
+from core.search_pagination import SearchPaginator
+
+try:
+    from config.config import BATCH_SEARCH_CONCURRENCY, PIPELINE_ENRICH_CONCURRENCY
+except ImportError:
+    BATCH_SEARCH_CONCURRENCY = 8
+    PIPELINE_ENRICH_CONCURRENCY = 4
+
+print("Loading pipelines.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+PEOPLE_SEARCH_PAGE_SIZE = 100
+COMPANY_SEARCH_PAGE_SIZE = 200
+MAX_REPORTED_ERRORS = 20
+
+
+def search_person_to_enrichment_input(person: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """A /v2/people/search result as a /v2/people/enrich input, tagged with its search position."""
+    return {
+        "firstName": person.get("firstName"),
+        "lastName": person.get("lastName"),
+        "companyName": person.get("companyName"),
+        "companyDomain": person.get("companyDomain"),
+        "linkedinUrl": person.get("linkedInUrl") or person.get("linkedinUrl"),
+        "externalID": row_id(index)
+    }
+
+
+async def run_search_enrich_pipeline(
+    job_id: str,
+    search_payload: Dict[str, Any],
+    include: Dict[str, bool],
+    max_records: int,
+    chunk_size: int,
+    notification_options: Optional[Dict[str, Any]] = None,
+    concurrency: int = PIPELINE_ENRICH_CONCURRENCY
+) -> None:
+    """Background task: search and enrichment overlapped under one job ID."""
+    started = time.monotonic()
+    progress: Dict[str, Any] = {
+        "stage": "searching",
+        "search": {"pages": 0, "people_found": 0, "stop_reason": None, "error": None},
+        "enrichment": {
+            "chunks_submitted": 0, "chunks_completed": 0, "chunks_failed": 0,
+            "people_submitted": 0, "people_skipped": 0, "people_enriched": 0
+        },
+        "chunk_job_ids": [],
+        "elapsed_ms": 0
+    }
+    job_manager.update_job_status(job_id, "running", {"pipeline": progress})
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    chunk_tasks: List[asyncio.Task] = []
+
+    async def enrich_chunk(chunk_job_id: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            await background_tasks.run_enrichment_task(
+                chunk_job_id, "/v2/people/enrich", "/v2/people/enrich/{id}", payload
+            )
+        chunk_job = job_manager.get_job(chunk_job_id)
+        if chunk_job["status"] in ("completed", "partially_completed"):
+            progress["enrichment"]["chunks_completed"] += 1
+            people = (chunk_job.get("result") or {}).get("people") or []
+            progress["enrichment"]["people_enriched"] += len(people)
+            return chunk_job["result"]
+        progress["enrichment"]["chunks_failed"] += 1
+        logger.warning(f"⚠️ Pipeline {job_id}: chunk job {chunk_job_id} ended as {chunk_job['status']}")
+        return None
+
+    def submit(people: List[Dict[str, Any]]) -> None:
+        valid, errors = validate_people_rows(people)
+        progress["enrichment"]["people_skipped"] += len(errors)
+        if not valid:
+            return
+        payload = build_enrichment_payloads(valid, include, notification_options)[0]
+        chunk_job_id = str(uuid4())
+        job_manager.create_job(chunk_job_id)
+        chunk_tasks.append(asyncio.create_task(enrich_chunk(chunk_job_id, payload)))
+        progress["chunk_job_ids"].append(chunk_job_id)
+        progress["enrichment"]["chunks_submitted"] += 1
+        progress["enrichment"]["people_submitted"] += len(valid)
+        logger.info(f"🔗 Pipeline {job_id}: chunk {len(chunk_tasks)} submitted ({len(valid)} people)")
+
+    try:
+        page_size = min(int(search_payload.get("limit") or PEOPLE_SEARCH_PAGE_SIZE), PEOPLE_SEARCH_PAGE_SIZE)
+        paginator = SearchPaginator("/v2/people/search", search_payload, "people", max_records, page_size)
+        pending: List[Dict[str, Any]] = []
+        async for page in paginator.pages():
+            for person in page:
+                pending.append(search_person_to_enrichment_input(person, progress["search"]["people_found"]))
+                progress["search"]["people_found"] += 1
+            progress["search"]["pages"] = paginator.pages_fetched
+            progress["elapsed_ms"] = round((time.monotonic() - started) * 1000, 2)
+            while len(pending) >= chunk_size:
+                submit(pending[:chunk_size])
+                pending = pending[chunk_size:]
+        if pending:
+            submit(pending)
+        progress["search"]["stop_reason"] = paginator.stop_reason
+        progress["search"]["error"] = paginator.error
+
+        progress["stage"] = "enriching"
+        chunk_results = await asyncio.gather(*chunk_tasks)
+    except Exception as e:
+        logger.error(f"❌ Pipeline {job_id} failed: {e}")
+        for task in chunk_tasks:
+            task.cancel()
+        progress["stage"] = "failed"
+        job_manager.update_job_status(job_id, "failed", {"error": str(e), "pipeline": progress})
+        return
+
+    people: List[Dict[str, Any]] = []
+    for result in chunk_results:
+        if result:
+            people.extend(result.get("people") or [])
+
+    progress["stage"] = "done"
+    progress["elapsed_ms"] = round((time.monotonic() - started) * 1000, 2)
+    enrichment = progress["enrichment"]
+    if enrichment["chunks_submitted"] and not enrichment["chunks_completed"]:
+        status = "failed"
+    elif enrichment["chunks_failed"] or progress["search"]["error"]:
+        status = "partially_completed"
+    else:
+        status = "completed"
+    logger.info(f"✅ Pipeline {job_id} {status}: {progress['search']['people_found']} found, {len(people)} enriched in {progress['elapsed_ms']}ms")
+    job_manager.update_job_status(job_id, status, {"people": people, "pipeline": progress})
+
+
+class CompanyPeopleFanout:
+    """Company search feeding concurrent, domain-batched people searches; people streamed out once each"""
+
+    def __init__(
+        self,
+        company_payload: Dict[str, Any],
+        people_payload: Dict[str, Any],
+        max_companies: int,
+        max_people: int,
+        domain_batch_size: int,
+        concurrency: int = BATCH_SEARCH_CONCURRENCY,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ):
+        self.people_payload = people_payload
+        self.people_per_company = int(people_payload.get("peoplePerCompany") or 1)
+        self.max_people = max_people
+        self.domain_batch_size = domain_batch_size
+        self.concurrency = max(1, concurrency)
+        self.companies = SearchPaginator(
+            "/v2/companies/search", company_payload, "companies",
+            max_records=max_companies, page_size=COMPANY_SEARCH_PAGE_SIZE,
+            is_disconnected=is_disconnected, timeout=20
+        )
+        self._is_disconnected = is_disconnected
+
+        self.started = time.monotonic()
+        self.domains_seen = set()
+        self.people_seen = set()
+        self.batches_submitted = 0
+        self.batches_completed = 0
+        self.batches_failed = 0
+        self.people_found = 0
+        self.people_yielded = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.stop_reason: Optional[str] = None
+
+    async def _search_batch(self, domains: List[str], queue: asyncio.Queue, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            payload = dict(self.people_payload, companies={"domains": domains}, pageToken="")
+            paginator = SearchPaginator(
+                "/v2/people/search", payload, "people",
+                max_records=len(domains) * self.people_per_company, page_size=PEOPLE_SEARCH_PAGE_SIZE
+            )
+            async for page in paginator.pages():
+                await queue.put(page)
+        if paginator.error:
+            self.batches_failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(dict(paginator.error, domains=len(domains), first_domain=domains[0]))
+        else:
+            self.batches_completed += 1
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks: List[asyncio.Task] = []
+
+        def submit(domains: List[str]) -> None:
+            self.batches_submitted += 1
+            tasks.append(asyncio.create_task(self._search_batch(domains, queue, semaphore)))
+
+        try:
+            batch: List[str] = []
+            async for companies in self.companies.pages():
+                for company in companies:
+                    domain = normalize_domain(company.get("domain"))
+                    if domain and domain not in self.domains_seen:
+                        self.domains_seen.add(domain)
+                        batch.append(domain)
+                while len(batch) >= self.domain_batch_size:
+                    submit(batch[:self.domain_batch_size])
+                    batch = batch[self.domain_batch_size:]
+            if batch:
+                submit(batch)
+            if self.companies.error and len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append(dict(self.companies.error, stage="company_search"))
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    self.batches_failed += 1
+                    logger.error(f"❌ Fan-out people batch raised: {result}")
+        except asyncio.CancelledError:
+            # The consumer stopped early; nobody reads the queue any more
+            for task in tasks:
+                task.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"❌ Fan-out company stage failed: {e}")
+            self.errors.append({"error": str(e), "stage": "company_search"})
+            for task in tasks:
+                task.cancel()
+        await queue.put(None)
+
+    async def people(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each unique person (by LinkedIn URL, else name + company) as soon as it is found."""
+        # Bounded queue: batches wait for the consumer instead of piling pages up in memory
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        producer = asyncio.create_task(self._produce(queue))
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    self.stop_reason = self.companies.stop_reason
+                    return
+                for person in page:
+                    self.people_found += 1
+                    key = person_record_key(person)
+                    if key is not None:
+                        if key in self.people_seen:
+                            continue
+                        self.people_seen.add(key)
+                    self.people_yielded += 1
+                    yield person
+                    if self.people_yielded >= self.max_people:
+                        self.stop_reason = "max_people"
+                        return
+                if self._is_disconnected and await self._is_disconnected():
+                    self.stop_reason = "client_disconnected"
+                    return
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "companies_fetched": self.companies.records_yielded,
+            "company_pages": self.companies.pages_fetched,
+            "unique_domains": len(self.domains_seen),
+            "domain_batches": self.batches_submitted,
+            "batches_completed": self.batches_completed,
+            "batches_failed": self.batches_failed,
+            "people_found": self.people_found,
+            "unique_people": self.people_yielded,
+            "duplicates_removed": self.people_found - self.people_yielded,
+            "stop_reason": self.stop_reason,
+            "errors": self.errors,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 2)
+        }
@@ -0,0 +1,143 @@
+# ==============================================================================
+# File: core/prefetch_cache.py - Speculative next-page prefetch
+# ==============================================================================
+# When a search page comes back with a nextPageToken, the next page can be
+# fetched in the background and parked in a short-lived cache keyed by the
+# search filters + token. A later request for that page is then served from
+# the cache. A per-minute budget and a cap on in-flight prefetches keep
+# abandoned sessions from burning quota.
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    from config.config import PREFETCH_TTL, PREFETCH_BUDGET_PER_MINUTE, PREFETCH_MAX_INFLIGHT
+except ImportError:
+    PREFETCH_TTL = 120.0
+    PREFETCH_BUDGET_PER_MINUTE = 30
+    PREFETCH_MAX_INFLIGHT = 4
+
+print("Loading prefetch_cache.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+PageFetcher = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def page_cache_key(payload: Dict[str, Any], page_token: str) -> str:
+    """Key a page by its search filters (everything except pageToken) plus the token."""
+    filters = {k: v for k, v in payload.items() if k != "pageToken"}
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{digest}:{page_token}"
+
+
+class PagePrefetcher:
+    """Budgeted background fetch of the next search page into a TTL cache"""
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        ttl: float = PREFETCH_TTL,
+        budget_per_minute: int = PREFETCH_BUDGET_PER_MINUTE,
+        max_inflight: int = PREFETCH_MAX_INFLIGHT,
+        max_entries: int = 100
+    ):
+        self._fetch_page = fetch_page
+        self.ttl = ttl
+        self.budget_per_minute = budget_per_minute
+        self.max_inflight = max_inflight
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, task)
+        self._budget_window_start = time.monotonic()
+        self._budget_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.skipped_over_budget = 0
+
+    def _inflight_count(self) -> int:
+        return sum(1 for _, task in self._entries.values() if not task.done())
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            self._discard(key)
+
+    def _discard(self, key: str) -> None:
+        _, task = self._entries.pop(key)
+        self.wasted += 1
+        if not task.done():
+            task.cancel()
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        if now - self._budget_window_start >= 60:
+            self._budget_window_start = now
+            self._budget_used = 0
+        if self._budget_used >= self.budget_per_minute or self._inflight_count() >= self.max_inflight:
+            return False
+        self._budget_used += 1
+        return True
+
+    def schedule(self, payload: Dict[str, Any], next_page_token: str) -> bool:
+        """Start fetching the page after `payload` in the background, if the budget allows."""
+        if not next_page_token:
+            return False
+        key = page_cache_key(payload, next_page_token)
+        self._evict_expired()
+        if key in self._entries:
+            return True
+        if not self._take_budget():
+            self.skipped_over_budget += 1
+            logger.debug("Prefetch: budget exhausted, not prefetching next page")
+            return False
+
+        while len(self._entries) >= self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+        next_payload = dict(payload, pageToken=next_page_token)
+        task = asyncio.create_task(self._fetch_page(next_payload))
+        # Don't let an unused failed prefetch log "exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._entries[key] = (time.monotonic() + self.ttl, task)
+        logger.info(f"Prefetch: started background fetch for next page ({len(self._entries)} cached)")
+        return True
+
+    async def take(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the prefetched page for this payload's pageToken, or None on a miss."""
+        page_token = payload.get("pageToken")
+        if not page_token:
+            return None
+        self._evict_expired()
+        entry = self._entries.pop(page_cache_key(payload, page_token), None)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        try:
+            result = await asyncio.shield(entry[1])
+        except Exception as e:
+            logger.warning(f"Prefetch: background fetch failed, fetching page normally: {e}")
+            self.misses += 1
+            return None
+        if not isinstance(result, dict) or "error" in result:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached_pages": len(self._entries),
+            "inflight": self._inflight_count(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "wasted": self.wasted,
+            "skipped_over_budget": self.skipped_over_budget,
+            "budget_per_minute": self.budget_per_minute
+        }
@@ -0,0 +1,90 @@
+# ==============================================================================
+# File: core/probes.py - Concurrent diagnostic probes with timeouts
+# ==============================================================================
+# Runs many independent checks (endpoint probes, key checks, ...) at the same
+# time under a concurrency limit. Each probe has its own timeout and the whole
+# sweep has a deadline; results are handed out as soon as each probe finishes,
+# so a full sweep takes about as long as its slowest probe.
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+try:
+    from config.config import DIAGNOSTICS_PROBE_CONCURRENCY, DIAGNOSTICS_PROBE_TIMEOUT, DIAGNOSTICS_DEADLINE
+except ImportError:
+    DIAGNOSTICS_PROBE_CONCURRENCY = 8
+    DIAGNOSTICS_PROBE_TIMEOUT = 15.0
+    DIAGNOSTICS_DEADLINE = 25.0
+
+print("Loading probes.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+# (name, zero-argument coroutine factory); the factory is only called once a slot is free
+Probe = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+async def iter_probes(
+    probes: List[Probe],
+    concurrency: int = DIAGNOSTICS_PROBE_CONCURRENCY,
+    probe_timeout: float = DIAGNOSTICS_PROBE_TIMEOUT,
+    deadline: float = DIAGNOSTICS_DEADLINE
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield one {"index", "name", "ok", "elapsed_ms", "result" | "error"} entry per probe,
+    in completion order. Probes still running at the deadline are cancelled and reported
+    with "deadline_exceeded".
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.monotonic()
+
+    async def run_one(index: int, name: str, factory: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        async with semaphore:
+            probe_started = time.monotonic()
+            entry: Dict[str, Any] = {"index": index, "name": name}
+            try:
+                entry["result"] = await asyncio.wait_for(factory(), timeout=probe_timeout)
+                entry["ok"] = True
+            except asyncio.TimeoutError:
+                entry.update(ok=False, error=f"Probe timed out after {probe_timeout}s", error_type="timeout")
+            except Exception as e:
+                entry.update(ok=False, error=str(e), error_type=type(e).__name__)
+            entry["elapsed_ms"] = round((time.monotonic() - probe_started) * 1000, 2)
+            return entry
+
+    tasks = {asyncio.create_task(run_one(i, name, factory)): (i, name) for i, (name, factory) in enumerate(probes)}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+        for task in pending:
+            task.cancel()
+            index, name = tasks[task]
+            yield {
+                "index": index,
+                "name": name,
+                "ok": False,
+                "error": f"Diagnosis deadline of {deadline}s reached",
+                "error_type": "deadline_exceeded",
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 2)
+            }
+        if pending:
+            logger.warning(f"⏱️ {len(pending)} of {len(tasks)} probes cancelled at the {deadline}s deadline")
+    finally:
+        # Consumer stopped early (e.g. client disconnected from a stream)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def run_probes(probes: List[Probe], **kwargs) -> List[Dict[str, Any]]:
+    """All probe entries, in input order."""
+    entries = [entry async for entry in iter_probes(probes, **kwargs)]
+    return sorted(entries, key=lambda entry: entry["index"])
@@ -0,0 +1,330 @@
+# ==============================================================================
+# File: core/quality_study.py - Batch data-quality comparison of enrichment flows
+# ==============================================================================
+# Compares two company enrichment variants (v1 bulk vs. v2, or LinkedIn URL vs.
+# domain input) over many items at once. Each variant's items are sent as bulk
+# jobs of QUALITY_STUDY_CHUNK_SIZE companies (externalID "row-<n>" = n-th item),
+# every chunk of both variants runs concurrently through the key rotation, and
+# each job is polled with a growing delay instead of a fixed sleep. The results
+# are joined back per item and aggregated into per-field fill rates, agreement
+# rates between the variants and job latency.
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core import job_manager
+from core.batch_search import normalize_domain
+from core.benchmark import percentile
+from core.csv_merge import build_result_index
+from core.csv_upload import row_id
+from utils import api_client
+from utils.api_client import surfe_client
+
+try:
+    from config.config import (
+        QUALITY_STUDY_CHUNK_SIZE, QUALITY_STUDY_CONCURRENCY,
+        QUALITY_POLL_INITIAL_DELAY, QUALITY_POLL_MAX_DELAY, QUALITY_POLL_TIMEOUT
+    )
+except ImportError:
+    QUALITY_STUDY_CHUNK_SIZE = 100
+    QUALITY_STUDY_CONCURRENCY = 4
+    QUALITY_POLL_INITIAL_DELAY = 1.0
+    QUALITY_POLL_MAX_DELAY = 10.0
+    QUALITY_POLL_TIMEOUT = 300.0
+
+print("Loading quality_study.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS_STATUSES = ("IN_PROGRESS", "PENDING")
+
+
+def _v2_payload(field: str) -> Callable[[List[Tuple[int, str]]], Dict[str, Any]]:
+    return lambda chunk: {"companies": [{field: value, "externalID": row_id(i)} for i, value in chunk]}
+
+
+def _v1_payload(chunk: List[Tuple[int, str]]) -> Dict[str, Any]:
+    return {
+        "domains": [domain for _, domain in chunk],
+        "organizations": [{"domain": domain, "externalID": row_id(i)} for i, domain in chunk],
+        "name": "Data Quality Study V1"
+    }
+
+
+V2_COMPANY_ENRICH = {
+    "start": "/v2/companies/enrich",
+    "status": "/v2/companies/enrich/{id}",
+    "id_field": "enrichmentID",
+    "results": "companies",
+    "schema": "v2"
+}
+
+# Variant -> how to submit, poll and read it; "input" is the item field it is given
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    "v1": {
+        "start": "/v1/organizations/enrichments/bulk",
+        "status": "/v1/organizations/enrichments/bulk/{id}",
+        "id_field": "id",
+        "results": "organizations",
+        "schema": "v1",
+        "input": "domain",
+        "payload": _v1_payload
+    },
+    "v2": dict(V2_COMPANY_ENRICH, input="domain", payload=_v2_payload("domain")),
+    "linkedin": dict(V2_COMPANY_ENRICH, input="linkedinUrl", payload=_v2_payload("linkedinUrl")),
+    "domain": dict(V2_COMPANY_ENRICH, input="domain", payload=_v2_payload("domain")),
+}
+
+# Compared field -> record key in each response schema
+FIELDS: Dict[str, Dict[str, str]] = {
+    "name": {"v1": "name", "v2": "name"},
+    "employee_count": {"v1": "size", "v2": "employeeCount"},
+    "description": {"v1": "description", "v2": "description"},
+    "industry": {"v1": "industries", "v2": "industry"},
+    "website": {"v1": "website", "v2": "websites"},
+}
+# Same weights as determine_better_quality: a name counts double
+FIELD_WEIGHTS = {"name": 2}
+
+
+def is_filled(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, (list, dict, set, tuple)):
+        return bool(value)
+    return True
+
+
+def _comparable(field: str, value: Any) -> set:
+    """Normalized values for agreement checks; lists compare by overlap."""
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    normalized = set()
+    for item in values:
+        if not is_filled(item):
+            continue
+        if field == "website":
+            item = normalize_domain(str(item))
+        elif field == "employee_count":
+            item = str(item).replace(",", "").strip()
+        else:
+            item = " ".join(str(item).casefold().split())
+        if item:
+            normalized.add(item)
+    return normalized
+
+
+def quality_score(record: Optional[Dict[str, Any]], schema: str) -> int:
+    if not record:
+        return 0
+    return sum(
+        FIELD_WEIGHTS.get(field, 1)
+        for field, keys in FIELDS.items()
+        if is_filled(record.get(keys[schema]))
+    )
+
+
+async def _poll(status_endpoint: str, key: str, results_field: str, timeout: float) -> Dict[str, Any]:
+    """Poll until the job is finished: short delays first, growing up to QUALITY_POLL_MAX_DELAY."""
+    delay = QUALITY_POLL_INITIAL_DELAY
+    deadline = time.monotonic() + timeout
+    while True:
+        await asyncio.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        response = await api_client.make_surfe_request("GET", status_endpoint, key)
+        if "error" in response:
+            status_code = response.get("status_code") or 500
+            if status_code not in (408, 429) and status_code < 500:
+                return response
+        else:
+            status = str(response.get("status") or "").upper()
+            if status not in IN_PROGRESS_STATUSES and (results_field in response or status):
+                return response
+        if time.monotonic() >= deadline:
+            return {"error": f"Enrichment not finished after {timeout}s", "status_code": 408}
+        delay = min(delay * 1.5, QUALITY_POLL_MAX_DELAY)
+
+
+async def run_variant_chunk(
+    variant: str,
+    chunk: List[Tuple[int, str]],
+    poll_timeout: float = QUALITY_POLL_TIMEOUT
+) -> Dict[str, Any]:
+    """
+    One bulk enrichment job for (item index, input value) pairs. Returns the raw final
+    response, the record found for each item index and the job latency.
+    """
+    spec = VARIANTS[variant]
+    started = time.monotonic()
+    # Same rotation as every other enrichment; the job must be polled with the key that created it
+    response, key = await surfe_client.make_request_with_key("POST", spec["start"], json_data=spec["payload"](chunk))
+    if "error" in response:
+        key = None
+    upstream_id = response.get(spec["id_field"]) if key else None
+    if key and not upstream_id:
+        response = {"error": f"No {spec['id_field']} in response: {response}", "status_code": 502}
+    elif upstream_id:
+        response = await _poll(spec["status"].format(id=upstream_id), key, spec["results"], poll_timeout)
+
+    records = [] if "error" in response else (response.get(spec["results"]) or [])
+    index = build_result_index(records)
+    found = {i: index.get(row_id(i)) for i, _ in chunk}
+    if len(chunk) == 1 and found[chunk[0][0]] is None and records:
+        # Single-item jobs: take the only record even if upstream dropped the externalID
+        found[chunk[0][0]] = records[0]
+    return {
+        "variant": variant,
+        "response": response,
+        "records": found,
+        "error": response.get("error") if "error" in response else None,
+        "latency_ms": round((time.monotonic() - started) * 1000, 2)
+    }
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": percentile(ordered, 50),
+        "p90_ms": percentile(ordered, 90),
+        "max_ms": round(ordered[-1], 2) if ordered else None
+    }
+
+
+def _compact(record: Optional[Dict[str, Any]], schema: str) -> Optional[Dict[str, Any]]:
+    if record is None:
+        return None
+    return {field: record.get(keys[schema]) for field, keys in FIELDS.items()}
+
+
+def aggregate_study(
+    items: List[Dict[str, str]],
+    variants: Tuple[str, str],
+    chunk_results: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Per-variant fill rates and latency, per-field agreement and a per-item verdict."""
+    first, second = variants
+    records: Dict[str, Dict[int, Optional[Dict[str, Any]]]] = {first: {}, second: {}}
+    stats: Dict[str, Dict[str, Any]] = {
+        variant: {"items_sent": 0, "records_returned": 0, "jobs": 0, "failed_jobs": 0, "errors": [], "latencies": []}
+        for variant in variants
+    }
+    for chunk in chunk_results:
+        variant_stats = stats[chunk["variant"]]
+        variant_stats["jobs"] += 1
+        variant_stats["items_sent"] += len(chunk["records"])
+        variant_stats["latencies"].append(chunk["latency_ms"])
+        if chunk["error"] is not None:
+            variant_stats["failed_jobs"] += 1
+            if len(variant_stats["errors"]) < 10:
+                variant_stats["errors"].append(chunk["error"])
+        records[chunk["variant"]].update(chunk["records"])
+
+    fill_counts = {variant: {field: 0 for field in FIELDS} for variant in variants}
+    agreement = {field: {"both_filled": 0, "agree": 0} for field in FIELDS}
+    verdicts = {first: 0, second: 0, "equal": 0, "neither": 0}
+    rows = []
+    for index, item in enumerate(items):
+        pair = {variant: records[variant].get(index) for variant in variants}
+        schemas = {variant: VARIANTS[variant]["schema"] for variant in variants}
+        for variant in variants:
+            record = pair[variant]
+            if record is None:
+                continue
+            stats[variant]["records_returned"] += 1
+            for field, keys in FIELDS.items():
+                if is_filled(record.get(keys[schemas[variant]])):
+                    fill_counts[variant][field] += 1
+        if pair[first] is not None and pair[second] is not None:
+            for field, keys in FIELDS.items():
+                a = _comparable(field, pair[first].get(keys[schemas[first]]))
+                b = _comparable(field, pair[second].get(keys[schemas[second]]))
+                if a and b:
+                    agreement[field]["both_filled"] += 1
+                    agreement[field]["agree"] += bool(a & b)
+
+        scores = {variant: quality_score(pair[variant], schemas[variant]) for variant in variants}
+        if not scores[first] and not scores[second]:
+            verdict = "neither"
+        elif scores[first] == scores[second]:
+            verdict = "equal"
+        else:
+            verdict = first if scores[first] > scores[second] else second
+        verdicts[verdict] += 1
+        rows.append(dict(
+            {"input": item, "better": verdict},
+            **{variant: _compact(pair[variant], schemas[variant]) for variant in variants}
+        ))
+
+    summary = {}
+    for variant in variants:
+        variant_stats = stats[variant]
+        sent = variant_stats["items_sent"]
+        summary[variant] = {
+            "items_sent": sent,
+            "records_returned": variant_stats["records_returned"],
+            "jobs": variant_stats["jobs"],
+            "failed_jobs": variant_stats["failed_jobs"],
+            "errors": variant_stats["errors"],
+            "fill_rates": {field: round(count / sent, 4) if sent else None for field, count in fill_counts[variant].items()},
+            "job_latency": _latency_summary(variant_stats["latencies"])
+        }
+    return {
+        "items": len(items),
+        "variants": summary,
+        "agreement": {
+            field: dict(counts, rate=round(counts["agree"] / counts["both_filled"], 4) if counts["both_filled"] else None)
+            for field, counts in agreement.items()
+        },
+        "better_counts": verdicts,
+        "results": rows
+    }
+
+
+def _chunks(items: List[Dict[str, str]], field: str, chunk_size: int) -> List[List[Tuple[int, str]]]:
+    pairs = [(i, item[field]) for i, item in enumerate(items) if item.get(field)]
+    return [pairs[start:start + chunk_size] for start in range(0, len(pairs), chunk_size)]
+
+
+async def run_quality_study(
+    items: List[Dict[str, str]],
+    variants: Tuple[str, str],
+    chunk_size: int = QUALITY_STUDY_CHUNK_SIZE,
+    concurrency: int = QUALITY_STUDY_CONCURRENCY,
+    poll_timeout: float = QUALITY_POLL_TIMEOUT,
+    progress: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Run both variants over every item (items lacking a variant's input are skipped for it)."""
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    progress = progress if progress is not None else {}
+    jobs = [(variant, chunk) for variant in variants for chunk in _chunks(items, VARIANTS[variant]["input"], chunk_size)]
+    progress.update(jobs_total=len(jobs), jobs_done=0)
+
+    async def run_one(variant: str, chunk: List[Tuple[int, str]]) -> Dict[str, Any]:
+        async with semaphore:
+            result = await run_variant_chunk(variant, chunk, poll_timeout)
+        progress["jobs_done"] += 1
+        return result
+
+    chunk_results = await asyncio.gather(*(run_one(variant, chunk) for variant, chunk in jobs))
+    report = aggregate_study(items, variants, chunk_results)
+    report["wall_time_ms"] = round((time.monotonic() - started) * 1000, 2)
+    logger.info(f"🔬 Quality study {variants[0]} vs {variants[1]}: {len(items)} items, {len(jobs)} jobs in {report['wall_time_ms']}ms")
+    return report
+
+
+async def run_quality_study_job(job_id: str, items: List[Dict[str, str]], variants: Tuple[str, str], chunk_size: int) -> None:
+    """Background task: run_quality_study under a job ID, with live job progress."""
+    progress: Dict[str, Any] = {"variants": list(variants), "items": len(items)}
+    job_manager.update_job_status(job_id, "running", {"progress": progress})
+    try:
+        report = await run_quality_study(items, variants, chunk_size=chunk_size, progress=progress)
+    except Exception as e:
+        logger.error(f"❌ Quality study {job_id} failed: {e}")
+        job_manager.update_job_status(job_id, "failed", {"error": str(e), "progress": progress})
+        return
+    failed = sum(report["variants"][v]["failed_jobs"] for v in variants)
+    status = "completed" if not failed else "partially_completed" if failed < progress["jobs_total"] else "failed"
+    job_manager.update_job_status(job_id, status, report)
@@ -0,0 +1,101 @@
+# ==============================================================================
+# File: core/search_pagination.py - Server-side nextPageToken following
+# ==============================================================================
+# Walks a Surfe search endpoint page by page through the rotating client and
+# hands each page's records to the caller as soon as it arrives, so callers can
+# stream results without ever holding more than one page in memory.
+
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from utils.api_client import surfe_client
+
+print("Loading search_pagination.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPaginator:
+    """Follows nextPageToken for one search until exhausted, capped, failed or the client goes away"""
+
+    def __init__(
+        self,
+        endpoint: str,
+        payload: Dict[str, Any],
+        result_key: str,
+        max_records: int,
+        page_size: int,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        timeout: int = 30
+    ):
+        self.endpoint = endpoint
+        self.payload = payload
+        self.result_key = result_key
+        self.max_records = max_records
+        self.page_size = page_size
+        self._is_disconnected = is_disconnected
+        self.timeout = timeout
+
+        self.next_page_token: Optional[str] = payload.get("pageToken") or ""
+        self.pages_fetched = 0
+        self.records_yielded = 0
+        self.stop_reason: Optional[str] = None  # exhausted | max_records | upstream_error | client_disconnected
+        self.error: Optional[Dict[str, Any]] = None
+
+    async def pages(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield one list of records per upstream page."""
+        while self.records_yielded < self.max_records:
+            if self._is_disconnected and await self._is_disconnected():
+                self.stop_reason = "client_disconnected"
+                logger.info(f"Pagination: client disconnected after {self.records_yielded} records from {self.endpoint}")
+                return
+
+            remaining = self.max_records - self.records_yielded
+            page_payload = dict(self.payload, pageToken=self.next_page_token, limit=min(self.page_size, remaining))
+            result = await surfe_client.make_request_with_rotation(
+                "POST",
+                self.endpoint,
+                json_data=page_payload,
+                timeout=self.timeout,
+                max_retries=3,
+                retry_delay=0.5
+            )
+
+            if "error" in result:
+                self.stop_reason = "upstream_error"
+                self.error = {
+                    "error": result.get("error"),
+                    "status_code": result.get("status_code", 500),
+                    "page": self.pages_fetched + 1
+                }
+                return
+
+            self.pages_fetched += 1
+            records = (result.get(self.result_key) or [])[:remaining]
+            self.records_yielded += len(records)
+            self.next_page_token = result.get("nextPageToken")
+
+            if records:
+                yield records
+
+            if not self.next_page_token or not records:
+                self.stop_reason = "exhausted"
+                self.next_page_token = None
+                return
+
+        self.stop_reason = "max_records"
+
+    async def records(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield records one at a time."""
+        async for page in self.pages():
+            for record in page:
+                yield record
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_streamed": self.records_yielded,
+            "pages_fetched": self.pages_fetched,
+            "stop_reason": self.stop_reason,
+            "next_page_token": self.next_page_token,
+            "api_key_used": surfe_client.get_last_api_key_masked()
+        }
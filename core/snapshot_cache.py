@@ -0,0 +1,58 @@
+# ==============================================================================
+# File: core/snapshot_cache.py - Short-TTL, single-flight snapshot cache
+# ==============================================================================
+# Holds one pre-serialized response body. Concurrent readers during a refresh
+# all await the same load, and writers call invalidate() so the next read
+# rebuilds instead of waiting out the TTL.
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+print("Loading snapshot_cache.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """Caches the bytes produced by an async loader for `ttl` seconds"""
+
+    def __init__(self, loader: Callable[[], Awaitable[bytes]], ttl: float):
+        self._loader = loader
+        self.ttl = ttl
+        self._body: Optional[bytes] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._inflight: Optional[asyncio.Future] = None
+        self.hits = 0
+        self.loads = 0
+
+    def invalidate(self) -> None:
+        """Drop the snapshot. Safe to call from worker threads (plain attribute writes)."""
+        self._generation += 1
+        self._expires_at = 0.0
+
+    async def get(self) -> bytes:
+        if self._body is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return self._body
+
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        inflight = self._inflight
+        # shield: one cancelled client must not cancel the load the others are waiting on
+        return await asyncio.shield(inflight)
+
+    async def _refresh(self) -> bytes:
+        generation = self._generation
+        try:
+            self.loads += 1
+            body = await self._loader()
+            if generation == self._generation:
+                # Only cache if nothing was written while we were loading
+                self._body = body
+                self._expires_at = time.monotonic() + self.ttl
+            return body
+        finally:
+            self._inflight = None
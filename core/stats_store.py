@@ -0,0 +1,307 @@
+# ==============================================================================
+# File: core/stats_store.py - Dashboard statistics storage
+# ==============================================================================
+# Counters live in a Redis hash (updated with HINCRBY) and recent activity in a
+# capped list (LPUSH + LTRIM). Every update is sent as a single pipeline, so
+# concurrent writers never overwrite each other and logging one activity costs
+# one round-trip.
+#
+# Without KV_URL, LocalStatsStore keeps the authoritative copy in memory and a
+# background task snapshots it atomically to DASHBOARD_STATS_FILE, so single-node
+# deployments keep their history without Redis or per-request file I/O.
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import redis
+
+try:
+    from config.config import DASHBOARD_STATS_FILE, STATS_SNAPSHOT_INTERVAL
+except ImportError:
+    DASHBOARD_STATS_FILE = os.path.join("data", "dashboard_stats.json")
+    STATS_SNAPSHOT_INTERVAL = 30.0
+
+print("Loading stats_store.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+# Redis keys
+DASHBOARD_COUNTERS_KEY = "surfe_dashboard_counters"
+DASHBOARD_ACTIVITY_KEY = "surfe_dashboard_activity"
+LEGACY_STATS_KEY = "surfe_dashboard_stats"  # Old single JSON blob, migrated on startup
+
+RECENT_ACTIVITY_LIMIT = 10
+
+COUNTER_FIELDS = [
+    "company_searches",
+    "people_searches",
+    "company_enrichments",
+    "people_enrichments",
+    "companies_found",
+    "people_enriched",
+    "searches_performed",
+    "total_jobs",
+    "successful_jobs",
+    "failed_jobs",
+]
+
+# Counters touched by each activity type. A value of None means "add the
+# activity's count", any integer is added as-is.
+ACTIVITY_COUNTERS: Dict[str, Dict[str, Optional[int]]] = {
+    "company_search": {"company_searches": 1, "companies_found": None},
+    "people_search": {"people_searches": 1},
+    "company_enrichment": {"company_enrichments": 1},
+    "people_enrichment": {"people_enrichments": 1, "people_enriched": None},
+    "job_completed": {"total_jobs": 1, "successful_jobs": 1},
+    "job_failed": {"total_jobs": 1, "failed_jobs": 1},
+}
+
+
+def counter_increments(activity_type: str, count: int = 1) -> Dict[str, int]:
+    """Return the counter deltas produced by a single activity."""
+    increments = {}
+    for field_name, amount in ACTIVITY_COUNTERS.get(activity_type, {}).items():
+        increments[field_name] = int(count) if amount is None else amount
+    return increments
+
+
+def build_activity(activity_type: str, description: str, details: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Build a recent-activity entry in the format the dashboard expects."""
+    return {
+        "type": activity_type,
+        "description": description,
+        "timestamp": datetime.now().isoformat(),
+        "details": details or {}
+    }
+
+
+def default_stats() -> Dict[str, Any]:
+    """Zeroed statistics, used when nothing has been stored yet."""
+    stats: Dict[str, Any] = {name: 0 for name in COUNTER_FIELDS}
+    stats["recent_activity"] = []
+    stats["last_updated"] = datetime.now().isoformat()
+    return stats
+
+
+class RedisStatsStore:
+    """Dashboard statistics kept in a Redis hash plus a capped activity list"""
+
+    def __init__(self, client: "redis.Redis"):
+        self._client = client
+
+    def apply(self, increments: Dict[str, int], activities: List[Dict[str, Any]]) -> None:
+        """Apply counter increments and push activities in one pipeline (one round-trip)."""
+        pipe = self._client.pipeline(transaction=True)
+        for field_name, amount in increments.items():
+            if amount:
+                pipe.hincrby(DASHBOARD_COUNTERS_KEY, field_name, amount)
+        pipe.hset(DASHBOARD_COUNTERS_KEY, "last_updated", datetime.now().isoformat())
+        if activities:
+            # LPUSH prepends each value in turn, so the newest activity must come last
+            pipe.lpush(DASHBOARD_ACTIVITY_KEY, *[json.dumps(a) for a in activities])
+            pipe.ltrim(DASHBOARD_ACTIVITY_KEY, 0, RECENT_ACTIVITY_LIMIT - 1)
+        pipe.execute()
+
+    def load(self) -> Dict[str, Any]:
+        """Read counters and recent activity in one round-trip."""
+        pipe = self._client.pipeline(transaction=False)
+        pipe.hgetall(DASHBOARD_COUNTERS_KEY)
+        pipe.lrange(DASHBOARD_ACTIVITY_KEY, 0, RECENT_ACTIVITY_LIMIT - 1)
+        counters, raw_activity = pipe.execute()
+
+        stats = default_stats()
+        for field_name, value in (counters or {}).items():
+            if field_name == "last_updated":
+                stats["last_updated"] = value
+            else:
+                try:
+                    stats[field_name] = int(value)
+                except (TypeError, ValueError):
+                    logger.warning(f"Ignoring non-integer dashboard counter {field_name}={value!r}")
+
+        activity = []
+        for item in raw_activity or []:
+            try:
+                activity.append(json.loads(item))
+            except (TypeError, ValueError):
+                logger.warning("Skipping malformed dashboard activity entry")
+        stats["recent_activity"] = activity
+        return stats
+
+    def reset(self) -> None:
+        """Drop all counters and activity."""
+        pipe = self._client.pipeline(transaction=True)
+        pipe.delete(DASHBOARD_COUNTERS_KEY, DASHBOARD_ACTIVITY_KEY, LEGACY_STATS_KEY)
+        pipe.hset(DASHBOARD_COUNTERS_KEY, "last_updated", datetime.now().isoformat())
+        pipe.execute()
+
+    def migrate_legacy_blob(self) -> None:
+        """Seed the hash/list layout from the old JSON blob, if only the blob exists."""
+        if self._client.exists(DASHBOARD_COUNTERS_KEY):
+            return
+        legacy_json = self._client.get(LEGACY_STATS_KEY)
+        if not legacy_json:
+            return
+
+        legacy = json.loads(legacy_json)
+        counters = {name: int(legacy.get(name, 0) or 0) for name in COUNTER_FIELDS}
+        activities = list(reversed(legacy.get("recent_activity") or []))[-RECENT_ACTIVITY_LIMIT:]
+
+        self.apply(counters, activities)
+        self._client.delete(LEGACY_STATS_KEY)
+        logger.info("Migrated legacy dashboard stats blob to counter hash layout.")
+
+
+class LocalStatsStore:
+    """Dashboard statistics kept in process memory, snapshotted to a JSON file in the background"""
+
+    def __init__(self, path: Optional[str], snapshot_interval: float = STATS_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {name: 0 for name in COUNTER_FIELDS}
+        self._activity: deque = deque(maxlen=RECENT_ACTIVITY_LIMIT)  # newest first
+        self._last_updated = datetime.now().isoformat()
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        if path:
+            self._load_from_disk()
+
+    def apply(self, increments: Dict[str, int], activities: List[Dict[str, Any]]) -> None:
+        """Apply counter increments and activities in memory. Never touches disk."""
+        with self._lock:
+            for field_name, amount in increments.items():
+                self._counters[field_name] = self._counters.get(field_name, 0) + amount
+            for activity in activities:
+                self._activity.appendleft(activity)
+            self._last_updated = datetime.now().isoformat()
+            self._dirty = True
+
+    def load(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._to_dict()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = {name: 0 for name in COUNTER_FIELDS}
+            self._activity.clear()
+            self._last_updated = datetime.now().isoformat()
+            self._dirty = True
+
+    def _to_dict(self) -> Dict[str, Any]:
+        # Same layout as the legacy surfe_dashboard_stats blob / dashboard_stats.json
+        stats: Dict[str, Any] = dict(self._counters)
+        stats["recent_activity"] = list(self._activity)
+        stats["last_updated"] = self._last_updated
+        return stats
+
+    def _load_from_disk(self) -> None:
+        if not os.path.exists(self.path):
+            logger.info(f"No dashboard stats snapshot at {self.path}; starting from zero.")
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for name, value in data.items():
+                if isinstance(value, int):
+                    self._counters[name] = value
+            self._activity.extend((data.get("recent_activity") or [])[:RECENT_ACTIVITY_LIMIT])
+            self._last_updated = data.get("last_updated") or self._last_updated
+            logger.info(f"Loaded dashboard stats snapshot from {self.path}")
+        except Exception as e:
+            logger.error(f"Could not load dashboard stats snapshot from {self.path}: {e}")
+
+    def snapshot_to_disk(self) -> bool:
+        """Atomically write the current stats: temp file, fsync, rename. Returns True if written."""
+        if not self.path:
+            return False
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = json.dumps(self._to_dict(), indent=2)
+            self._dirty = False
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".dashboard_stats.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return True
+        except Exception as e:
+            with self._lock:
+                self._dirty = True  # try again next interval
+            logger.error(f"Could not write dashboard stats snapshot to {self.path}: {e}")
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.snapshot_interval)
+                return
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.snapshot_to_disk)
+
+    def start(self) -> None:
+        """Start periodic snapshots on the running event loop."""
+        if not self.path or self.snapshot_interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Local stats store: snapshotting to {self.path} every {self.snapshot_interval}s")
+
+    async def stop(self) -> None:
+        """Stop periodic snapshots and write a final one."""
+        if self._task:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self.snapshot_to_disk)
+
+
+def create_stats_store():
+    """Connect to Vercel KV (Redis) if KV_URL is configured, otherwise keep stats locally."""
+    # Vercel KV typically exposes this as KV_URL or REDIS_URL.
+    redis_url = os.getenv("KV_URL")
+    if not redis_url:
+        if DASHBOARD_STATS_FILE:
+            logger.warning(f"KV_URL environment variable not found. Dashboard stats will be kept locally in {DASHBOARD_STATS_FILE}.")
+        else:
+            logger.warning("KV_URL and DASHBOARD_STATS_FILE not set. Dashboard stats will NOT be persistent.")
+        return LocalStatsStore(DASHBOARD_STATS_FILE or None)
+
+    try:
+        # decode_responses=True ensures strings are returned instead of bytes.
+        client = redis.from_url(redis_url, decode_responses=True)
+        # Ping the server to test the connection immediately
+        client.ping()
+        logger.info("Successfully connected to Vercel KV (Redis).")
+    except Exception as e:
+        logger.error(f"Failed to connect to Vercel KV (Redis): {e}")
+        return None
+
+    store = RedisStatsStore(client)
+    try:
+        store.migrate_legacy_blob()
+    except Exception as e:
+        logger.error(f"Error migrating legacy dashboard stats: {e}")
+    return store
+
+
+stats_store = create_stats_store()
@@ -5,7 +5,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, FileResponse, RedirectResponse
 from core.dependencies import get_api_key
-from api.routes import company_lookalikes, company_search, company_enrichment, people_search, people_enrichment, diagnostics, dashboard, data_quality_test, settings
+from core.key_prober import key_prober
+from api.routes import company_lookalikes, company_search, company_enrichment, people_search, people_enrichment, diagnostics, dashboard, data_quality_test, settings, export, filters, pipelines
 
 print(f"DEBUG: main.py started. Current working directory: {os.getcwd()}")
 print(f"DEBUG: Value of SURFE_API_KEY_1: {os.getenv('SURFE_API_KEY_1')}")
@@ -87,6 +88,19 @@ app.include_router(diagnostics.router)
 app.include_router(dashboard.router)
 app.include_router(data_quality_test.router)
 app.include_router(settings.router)
+app.include_router(export.router)
+app.include_router(filters.router)
+app.include_router(pipelines.router)
+
+@app.on_event("startup")
+async def start_background_services():
+    await dashboard.start_dashboard_services()
+    key_prober.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await key_prober.stop()
+    await dashboard.stop_dashboard_services()
 
 # main.py - Updated root route with API key check
 @app.get("/", response_class=HTMLResponse)
@@ -3,12 +3,13 @@ document.addEventListener('DOMContentLoaded', () => {
     if (form) {
         form.addEventListener('submit', async (e) => {
             e.preventDefault();
-            const payload = {
-                domain: document.getElementById('domain').value,
-                limit: parseInt(document.getElementById('limit').value)
-            };
+            // Several seeds (comma or newline separated) go to the concurrent multi-seed endpoint
+            const domains = document.getElementById('domain').value.split(/[\s,;]+/).filter(d => d);
+            const limit = parseInt(document.getElementById('limit').value);
+            const multi = domains.length > 1;
+            const payload = multi ? { domains, limit } : { domain: domains[0] || '', limit };
             showLoading();
-            const response = await makeRequest('/api/v1/companies/lookalikes', 'POST', payload);
+            const response = await makeRequest(multi ? '/api/v1/companies/lookalikes/multi' : '/api/v1/companies/lookalikes', 'POST', payload);
             hideLoading();
             if (response.success) {
                 displayResults(response.data);
@@ -25,5 +26,5 @@ function displayResults(data) {
         container.innerHTML = '<p class="text-gray-500">No lookalikes found for the given domain.</p>';
         return;
     }
-    container.innerHTML = `<h2 class="text-xl font-semibold mb-4">Results (${data.companies.length})</h2><div class="results-grid">${data.companies.map(c => `<div class="result-card"><h3 class="font-bold text-lg text-gray-800">${c.name||'N/A'}</h3><p class="text-sm text-indigo-600 font-medium">${c.domain||''}</p><p class="mt-4 text-xs text-gray-500">Employees: <span class="font-semibold text-gray-700">${c.employeeCount||'N/A'}</span></p><p class="text-xs text-gray-500">Industries: <span class="font-semibold text-gray-700">${c.industries?.join(', ')||'N/A'}</span></p></div>`).join('')}</div>`;
+    container.innerHTML = `<h2 class="text-xl font-semibold mb-4">Results (${data.companies.length})</h2><div class="results-grid">${data.companies.map(c => `<div class="result-card"><h3 class="font-bold text-lg text-gray-800">${c.name||'N/A'}</h3><p class="text-sm text-indigo-600 font-medium">${c.domain||''}</p>${c.seedCount ? `<p class="text-xs text-gray-500">Matched by <span class="font-semibold text-gray-700">${c.seedCount}</span> seed(s): ${c.seeds.join(', ')}</p>` : ''}<p class="mt-4 text-xs text-gray-500">Employees: <span class="font-semibold text-gray-700">${c.employeeCount||'N/A'}</span></p><p class="text-xs text-gray-500">Industries: <span class="font-semibold text-gray-700">${c.industries?.join(', ')||'N/A'}</span></p></div>`).join('')}</div>`;
 }
\ No newline at end of file
@@ -2,7 +2,10 @@
 
 let pollInterval;
 let csvPeople = []; // To store people data parsed from CSV
+let csvFile = null; // The selected CSV file, uploaded as-is and parsed server-side
 let manualPeopleList = []; // To store people added via manual form input
+let lastEnrichmentJobId = null; // Finished job, exported server-side by downloadEnrichmentCSV
+let lastUploadId = null; // Uploaded CSV kept server-side; downloaded with enrichment columns merged in
 
 // Function to create the HTML content for the enrichment page
 function createEnrichmentPage() {
@@ -333,6 +336,7 @@ function initEnrichment() {
         hideError();
         document.getElementById('status-container').classList.add('hidden');
         document.getElementById('results-container').innerHTML = '';
+        lastUploadId = null;
         
         let peopleDataForAPI = [];
         const selectedMethod = document.querySelector('input[name="input-method"]:checked').value;
@@ -345,6 +349,12 @@ function initEnrichment() {
                 peopleDataForAPI = [...csvPeople]; // Use data parsed from CSV
                 break;
         }
+
+        if (selectedMethod === 'csv' && csvFile) {
+            // Let the server stream-parse the file; jobs start while it is still uploading
+            await uploadCSVForEnrichment(csvFile);
+            return;
+        }
             
         if (peopleDataForAPI.length === 0) {
             showError("Please add people using the form or upload a CSV file for enrichment.");
@@ -420,6 +430,7 @@ function handleCSVUpload(input) {
             const people = parseCSVForPeople(content); 
             if (people.length > 0) {
                 csvPeople = people;
+                csvFile = file;
                 showCSVPreview(people, file.name);
                 showTemporaryMessage(`✅ Loaded ${people.length} people from CSV.`, 'success');
             } else {
@@ -630,6 +641,7 @@ function showCSVPreview(people, filename) {
 
 function clearCSV() {
     csvPeople = [];
+    csvFile = null;
     // Reset the file input itself
     document.getElementById('csv-file').value = ''; 
     
@@ -637,6 +649,50 @@ function clearCSV() {
     showTemporaryMessage('🗑️ Cleared CSV data', 'info');
 }
 
+// Upload the CSV file to /api/v2/people/enrich/upload (column mapping and validation happen server-side)
+async function uploadCSVForEnrichment(file) {
+    const params = new URLSearchParams({
+        email: document.getElementById('include-email').checked,
+        mobile: document.getElementById('include-mobile').checked,
+        linkedInUrl: document.getElementById('include-linkedin').checked,
+        batch_size: 10000
+    });
+    const webhookUrl = document.getElementById('webhook-url').value.trim();
+    if (webhookUrl) params.set('webhookUrl', webhookUrl);
+
+    const formData = new FormData();
+    formData.append('file', file, file.name);
+
+    showLoading('loading-indicator');
+    lastUploadId = null;
+    let result;
+    try {
+        const response = await fetch(`/api/v2/people/enrich/upload?${params}`, { method: 'POST', body: formData });
+        result = await response.json();
+    } catch (error) {
+        result = { detail: { error: `Upload failed: ${error.message}` } };
+    }
+    hideLoading('loading-indicator');
+
+    if (!result.success || !result.data?.job_ids?.length) {
+        showError(result.detail?.error || 'Failed to start enrichment job from CSV. Check console for details.');
+        console.error('CSV upload error:', result);
+        return;
+    }
+
+    const data = result.data;
+    lastUploadId = data.upload_id || null;
+    if (data.rejected > 0) {
+        showTemporaryMessage(`⚠️ ${data.rejected} of ${data.rows} rows skipped (first: line ${data.errors[0]?.line}: ${data.errors[0]?.error})`, 'info');
+    }
+    if (data.job_ids.length > 1) {
+        console.log('📋 CSV split into enrichment jobs:', data.job_ids);
+        showTemporaryMessage(`✅ ${data.accepted} people submitted in ${data.job_ids.length} jobs; showing the first.`, 'success');
+    }
+    document.getElementById('status-container').classList.remove('hidden');
+    pollForStatus(data.job_ids[0]);
+}
+
 // Poll for job status - FIXED to use correct V2 endpoint
 async function pollForStatus(jobId) {
     const statusDiv = document.getElementById('job-status');
@@ -681,6 +737,7 @@ async function pollForStatus(jobId) {
             clearInterval(pollInterval);
             
             if (['COMPLETED', 'PARTIALLY_COMPLETED'].includes(jobStatus)) {
+                lastEnrichmentJobId = jobId;
                 displayResults(jobResult); // Pass jobResult (which is the actual Surfe API response)
             } else {
                 showError(`Job failed or timed out. Status: ${jobStatus}`);
@@ -788,6 +845,17 @@ function displayResults(data) {
 
 // Download enriched people data as CSV
 function downloadEnrichmentCSV() {
+    if (lastUploadId) {
+        // The uploaded file itself, every row in place, with the enrichment columns appended
+        window.location.href = `/api/export/uploads/${encodeURIComponent(lastUploadId)}/merged`;
+        return;
+    }
+    if (lastEnrichmentJobId) {
+        // Stream the CSV from the server instead of building it in the browser
+        window.location.href = `/api/export/jobs/${encodeURIComponent(lastEnrichmentJobId)}?preset=people_enrichment`;
+        return;
+    }
+
     if (csvPeople.length === 0) { // csvPeople is now used to store both manual and CSV parsed data for download
         alert('No data to download.');
         return;
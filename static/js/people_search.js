@@ -14,6 +14,8 @@ let peopleIncludeDomains = [];
 
 let peopleExcludeDomains = [];
 
+let peopleExcludeListId = null; // Server-side copy of peopleExcludeDomains (see registerPeopleExcludeList)
+
 
 
 // Utility function to clean and normalize domain strings
@@ -773,7 +775,7 @@ function buildApiPayload() {
 
     const allExcludeDomains = [...manualExcludeDomains];
 
-    if (peopleExcludeDomains.length > 0) {
+    if (peopleExcludeDomains.length > 0 && !peopleExcludeListId) {
 
         allExcludeDomains.push(...peopleExcludeDomains);
 
@@ -1411,7 +1413,31 @@ function initPeopleSearch() {
 
                 // FIXED: Use shared.js makeRequest function
 
-                let response = await makeRequest('/api/v2/people/search', 'POST', payload);
+                let searchUrl = '/api/v2/people/search?prefetch=true';
+
+                if (peopleExcludeListId) {
+
+                    searchUrl += `&exclude_list=${encodeURIComponent(peopleExcludeListId)}`;
+
+                }
+
+                let response = await makeRequest(searchUrl, 'POST', payload);
+
+                if (!response.success && peopleExcludeListId && String(response.detail || '').includes('not found or expired')) {
+
+                    // Exclusion list expired on the server: upload it again and retry once
+
+                    peopleExcludeListId = null;
+
+                    if (await registerPeopleExcludeList()) {
+
+                        searchUrl = `/api/v2/people/search?prefetch=true&exclude_list=${encodeURIComponent(peopleExcludeListId)}`;
+
+                        response = await makeRequest(searchUrl, 'POST', buildApiPayload());
+
+                    }
+
+                }
 
                 
 
@@ -1720,11 +1746,14 @@ createCSVUploadComponent('people-exclude-domains-upload', function(csvData, file
         }
     }
     
-    // Update the manual exclude domains input field to reflect full exclude domains list
-    const excludeInput = document.getElementById('company-domains-excluded');
-    if (excludeInput) {
-        excludeInput.value = peopleExcludeDomains.join(', ');
-    }
+    // Filter server-side against an uploaded list; if that fails, send the domains upstream
+    // through the manual exclude domains field as before
+    registerPeopleExcludeList().then(listId => {
+        const excludeInput = document.getElementById('company-domains-excluded');
+        if (!listId && excludeInput) {
+            excludeInput.value = peopleExcludeDomains.join(', ');
+        }
+    });
     
     updatePeopleFilterDisplay();
     console.log('✅ Exclude domains loaded:', peopleExcludeDomains.length);
@@ -1749,6 +1778,27 @@ createCSVUploadComponent('people-exclude-domains-upload', function(csvData, file
 
 
 
+// Upload peopleExcludeDomains as a server-side suppression list so searches are filtered
+// before the response is sent. Resolves to the list ID, or null on failure.
+async function registerPeopleExcludeList() {
+    peopleExcludeListId = null;
+    if (peopleExcludeDomains.length === 0) return null;
+
+    const response = await makeRequest('/api/v2/people/domain-lists', 'POST', {
+        domains: peopleExcludeDomains,
+        name: 'People search exclusions'
+    });
+    if (response.success && response.data && response.data.id) {
+        peopleExcludeListId = response.data.id;
+        console.log(`✅ Exclude list stored server-side: ${peopleExcludeListId} (${response.data.size} domains, ${response.data.kind})`);
+    } else {
+        console.warn('⚠️ Could not store exclude list server-side, filtering in the browser instead:', response);
+    }
+    return peopleExcludeListId;
+}
+
+
+
 // FIXED: Enhanced filter display update
 
 function updatePeopleFilterDisplay() {
@@ -1851,7 +1901,7 @@ function applyDomainFiltersToResults(results) {
 
     // Apply exclude filter
 
-    if (peopleExcludeDomains.length > 0) {
+    if (peopleExcludeDomains.length > 0 && !peopleExcludeListId) {
 
         const beforeExclude = filtered.length;
 
@@ -2003,6 +2053,14 @@ window.clearPeopleExcludeDomains = function() {
 
     peopleExcludeDomains = [];
 
+    if (peopleExcludeListId) {
+
+        makeRequest(`/api/v2/people/domain-lists/${encodeURIComponent(peopleExcludeListId)}`, 'DELETE');
+
+        peopleExcludeListId = null;
+
+    }
+
     updatePeopleFilterDisplay();
 
     console.log('🧹 Exclude domains cleared');
@@ -201,6 +201,30 @@ function searchSeniorities(query, limit = 10) {
     ).slice(0, limit);
 }
 
+// Server-side autocomplete (GET /api/filters/suggest) backed by the cached Surfe filter
+// catalog. Falls back to the local arrays above when the server or the facet is unavailable.
+const serverSuggestUnavailable = new Set();
+
+function withServerSuggest(facet, localSearch, isCountry = false) {
+    return async function(query, limit = 10) {
+        if (!query.trim() || serverSuggestUnavailable.has(facet)) return localSearch(query, limit);
+        try {
+            const url = `/api/filters/suggest?facet=${encodeURIComponent(facet)}&q=${encodeURIComponent(query)}&limit=${limit}`;
+            const response = await fetch(url);
+            if (!response.ok) {
+                serverSuggestUnavailable.add(facet);
+                return localSearch(query, limit);
+            }
+            const matches = (await response.json()).data || [];
+            return isCountry
+                ? matches.map(match => ({ Name: match.value, Code: match.code || match.value }))
+                : matches.map(match => match.value);
+        } catch (error) {
+            return localSearch(query, limit);
+        }
+    };
+}
+
 // Universal autocomplete setup function
 function setupAutocomplete(inputElement, dataArray, searchFunction, isCountryAutocomplete = false) {
     let currentFocus = -1;
@@ -211,13 +235,16 @@ function setupAutocomplete(inputElement, dataArray, searchFunction, isCountryAut
         inputElement.parentNode.classList.add('autocomplete-container');
     }
     
-    inputElement.addEventListener('input', function() {
+    inputElement.addEventListener('input', async function() {
         const val = this.value.split(',').pop().trim();
         closeAllLists();
         
         if (!val) return false;
         
-        const matches = searchFunction(val, 10);
+        const matches = await searchFunction(val, 10);
+        // Ignore answers for an older keystroke
+        if (this.value.split(',').pop().trim() !== val) return false;
+        closeAllLists();
         if (matches.length === 0) return false;
         
         // Create dropdown
@@ -321,21 +348,21 @@ function initializeAutocompleteForPage(pageType = 'auto') {
         {
             inputId: 'industries',
             dataArray: SURFE_INDUSTRIES,
-            searchFunction: searchIndustries,
+            searchFunction: withServerSuggest('industries', searchIndustries),
             isCountry: false,
             name: 'Company Industries'
         },
         {
             inputId: 'company-countries',
             dataArray: COUNTRIES,
-            searchFunction: searchCountries,
+            searchFunction: withServerSuggest('countries', searchCountries, true),
             isCountry: true,
             name: 'Company Countries'
         },
         {
             inputId: 'countries',
             dataArray: COUNTRIES,
-            searchFunction: searchCountries,
+            searchFunction: withServerSuggest('countries', searchCountries, true),
             isCountry: true,
             name: 'Countries'
         },
@@ -344,21 +371,21 @@ function initializeAutocompleteForPage(pageType = 'auto') {
         {
             inputId: 'people-countries',
             dataArray: COUNTRIES,
-            searchFunction: searchCountries,
+            searchFunction: withServerSuggest('countries', searchCountries, true),
             isCountry: true,
             name: 'People Countries'
         },
         {
             inputId: 'people-departments',
             dataArray: SURFE_DEPARTMENTS,
-            searchFunction: searchDepartments,
+            searchFunction: withServerSuggest('departments', searchDepartments),
             isCountry: false,
             name: 'People Departments'
         },
         {
             inputId: 'people-seniorities',
             dataArray: SURFE_SENIORITIES,
-            searchFunction: searchSeniorities,
+            searchFunction: withServerSuggest('seniorities', searchSeniorities),
             isCountry: false,
             name: 'People Seniorities'
         }
@@ -995,14 +1022,22 @@ function filterCSVData(csvData, filterFunction) {
 }
 
 // Merge CSV data with API results
-function mergeCSVWithResults(csvData, results, keyColumn = 'email') {
+// Rows are joined to results through a Map (one pass each), on keyColumn or, when
+// rowIdFor is given, on the externalID that was sent for each row (e.g. i => `row-${i}`).
+function mergeCSVWithResults(csvData, results, keyColumn = 'email', rowIdFor = null) {
     if (!csvData || !csvData.data || !results) {
         throw new Error('Invalid data for merging');
     }
     
-    const mergedData = csvData.data.map(row => {
-        const key = row[keyColumn];
-        const result = results.find(r => r[keyColumn] === key);
+    const resultKey = rowIdFor ? 'externalID' : keyColumn;
+    const index = new Map();
+    results.forEach(r => {
+        if (r[resultKey] != null && !index.has(r[resultKey])) index.set(r[resultKey], r);
+    });
+    
+    const mergedData = csvData.data.map((row, i) => {
+        const key = rowIdFor ? rowIdFor(i) : row[keyColumn];
+        const result = index.get(key);
         
         return {
             ...row,
@@ -5,13 +5,14 @@
 import aiohttp
 import json
 import logging
-from typing import Optional, Dict, Any, List, Set
+from typing import Optional, Dict, Any, List, Set, Tuple
 import itertools
 import os
 import time
 from datetime import datetime, timedelta
 import asyncio
 from dataclasses import dataclass, field
+from utils.metrics import metrics
 
 print("Loading enhanced api_client.py") # DEBUG PRINT
 
@@ -31,6 +32,9 @@ class ApiKeyInfo:
     is_temporarily_disabled: bool = False
     total_requests: int = 0
     successful_requests: int = 0
+    probe_status: Optional[str] = None  # Set by the background key prober (core/key_prober.py)
+    last_probed: Optional[datetime] = None
+    quota_exhausted: bool = False  # Disabled for quota; only a credit check (not a probe) may end the cooldown early
 
 @dataclass
 class ApiKeyManager:
@@ -64,6 +68,7 @@ class ApiKeyManager:
                 if key_info.quota_reset_time and datetime.now() > key_info.quota_reset_time:
                     key_info.is_temporarily_disabled = False
                     key_info.quota_reset_time = None
+                    key_info.quota_exhausted = False
                     logger.info(f"Key Manager: Re-enabled API key ...{key_info.key[-5:]} after cooldown.")
                 else:
                     logger.debug(f"Key Manager: Key ...{key_info.key[-5:]} is still disabled. Cooldown until: {key_info.quota_reset_time}")
@@ -88,6 +93,7 @@ class ApiKeyManager:
             if key_info.key == key:
                 key_info.is_temporarily_disabled = True
                 key_info.quota_reset_time = datetime.now() + timedelta(minutes=cooldown_minutes)
+                key_info.quota_exhausted = True
                 key_info.failed_attempts += 1
                 logger.warning(f"Key Manager: Disabled API key ...{key[-5:]} for {cooldown_minutes} minutes due to quota.")
                 break
@@ -110,9 +116,31 @@ class ApiKeyManager:
                 if key_info.is_temporarily_disabled:
                     key_info.is_temporarily_disabled = False
                     key_info.quota_reset_time = None
+                    key_info.quota_exhausted = False
                     logger.info(f"Key Manager: Re-enabled API key ...{key[-5:]} due to success.")
                 break
     
+    def enable_key(self, key: str, reason: str = "probe succeeded"):
+        """Re-enable a key right away, ending any cooldown (does not count as a user request)."""
+        for key_info in self.keys:
+            if key_info.key == key:
+                if key_info.is_temporarily_disabled:
+                    key_info.is_temporarily_disabled = False
+                    key_info.quota_reset_time = None
+                    key_info.quota_exhausted = False
+                    logger.info(f"Key Manager: Re-enabled API key ...{key[-5:]} ({reason}).")
+                break
+
+    def disable_key(self, key: str, cooldown_minutes: float, reason: str = "probe failed", quota: bool = False):
+        """Take a key out of rotation before user traffic reaches it (does not count as a failed request)."""
+        for key_info in self.keys:
+            if key_info.key == key:
+                key_info.is_temporarily_disabled = True
+                key_info.quota_reset_time = datetime.now() + timedelta(minutes=cooldown_minutes)
+                key_info.quota_exhausted = key_info.quota_exhausted or quota
+                logger.warning(f"Key Manager: Disabled API key ...{key[-5:]} for {cooldown_minutes} minutes ({reason}).")
+                break
+
     def get_key_stats(self) -> Dict[str, Dict[str, Any]]:
         """Get statistics for all keys"""
         stats = {}
@@ -125,7 +153,10 @@ class ApiKeyManager:
                 "success_rate": (key_info.successful_requests / key_info.total_requests * 100) if key_info.total_requests > 0 else 0,
                 "is_disabled": key_info.is_temporarily_disabled,
                 "last_used": key_info.last_used.isoformat() if key_info.last_used else None,
-                "quota_reset_time": key_info.quota_reset_time.isoformat() if key_info.quota_reset_time else None
+                "quota_reset_time": key_info.quota_reset_time.isoformat() if key_info.quota_reset_time else None,
+                "probe_status": key_info.probe_status,
+                "quota_exhausted": key_info.quota_exhausted,
+                "last_probed": key_info.last_probed.isoformat() if key_info.last_probed else None
             }
         return stats
 
@@ -226,7 +257,23 @@ async def make_surfe_request(
 ) -> Dict[str, Any]:
     """
     Handles making requests to the external Surfe API with enhanced error handling and logging.
+    Every call's latency and outcome is rolled up into the dashboard metrics.
     """
+    start_time = time.monotonic()
+    result = await _send_surfe_request(method, endpoint, api_key, json_data, params, timeout)
+    status_code = result.get("status_code")
+    is_error = "error" in result or (status_code is not None and not 200 <= status_code < 300)
+    metrics.record_upstream((time.monotonic() - start_time) * 1000, is_error)
+    return result
+
+async def _send_surfe_request(
+    method: str,
+    endpoint: str,
+    api_key: str,
+    json_data: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: int = 30
+) -> Dict[str, Any]:
     url = f"{SURFE_API_BASE_URL}{endpoint}"
 
     headers = {
@@ -306,12 +353,34 @@ class SurfeClient:
             """
             Makes a request to the Surfe API with intelligent key rotation and exponential backoff.
             """
+            response_data, _ = await self.make_request_with_key(
+                method, endpoint, json_data=json_data, params=params,
+                max_retries=max_retries, timeout=timeout, retry_delay=retry_delay
+            )
+            return response_data
+
+    async def make_request_with_key(
+            self,
+            method: str,
+            endpoint: str,
+            json_data: Optional[Dict[str, Any]] = None,
+            params: Optional[Dict[str, Any]] = None,
+            max_retries: Optional[int] = None,
+            timeout: int = 30,
+            retry_delay: float = 1.0
+        ) -> Tuple[Dict[str, Any], Optional[str]]:
+            """
+            Same as make_request_with_rotation, but also returns the key that served the
+            request (None if no key was tried). Use it when follow-up calls must go out with
+            the same key, e.g. polling an enrichment job: _last_api_key_used is shared by all
+            concurrent requests and may already belong to another one.
+            """
             if max_retries is None:
                 max_retries = len(self._key_manager.keys) * 2
                 
             if not self._key_manager.keys:
                 logger.critical("No API keys are available for making requests.")
-                return {"error": "No API keys loaded to make request.", "status_code": 500}
+                return {"error": "No API keys loaded to make request.", "status_code": 500}, None
 
             self._request_count += 1
             
@@ -345,13 +414,13 @@ class SurfeClient:
                     if 200 <= status_code < 300:
                         self._key_manager.mark_key_successful(key_info.key)
                         logger.info(f"Rotation: ✅ Request successful with key ...{key_info.key[-5:]}. Status: {status_code}")
-                        return response_data
+                        return response_data, key_info.key
                     # Handle specific errors that should disable keys
                     elif status_code == 401: # Unauthorized - definitely a bad key
                         logger.error(f"Rotation: ❌ Unauthorized (401) for key ...{key_info.key[-5:]}. Disabling key permanently.")
                         # Mark as permanently disabled by setting very long cooldown
                         self._key_manager.mark_key_quota_exceeded(key_info.key, cooldown_minutes=99999) 
-                        return response_data # Return immediately, this key is useless
+                        return response_data, key_info.key # Return immediately, this key is useless
                     elif status_code == 403:
                         if self._is_quota_exceeded_error(error_info):
                             logger.warning(f"Rotation: Quota exceeded (403) for key ...{key_info.key[-5:]}. Rotating to next key.")
@@ -361,7 +430,7 @@ class SurfeClient:
                         else:
                             logger.error(f"Rotation: 403 Forbidden (not quota-related) from Surfe API for key ...{key_info.key[-5:]}: {error_info}. Marking failed.")
                             self._key_manager.mark_key_failed(key_info.key) # Mark failed for a short cooldown
-                            return response_data # Might return the error
+                            return response_data, key_info.key # Might return the error
                     # Handle server errors (5xx)
                     elif status_code in [500, 502, 503, 504]:
                         logger.warning(f"Rotation: Server error ({status_code}) from Surfe API with key ...{key_info.key[-5:]}. Retrying with backoff.")
@@ -378,22 +447,22 @@ class SurfeClient:
                     else:
                         logger.error(f"Rotation: Non-retryable error ({status_code}) from Surfe API for key ...{key_info.key[-5:]}: {error_info}. Marking failed.")
                         self._key_manager.mark_key_failed(key_info.key) # Mark failed for short cooldown
-                        return response_data
+                        return response_data, key_info.key
                 else: # No status code - means underlying request error
                     # If response_data has actual business data (not just error), it's successful
                     if not error_info and self._has_business_data(response_data):
                         self._key_manager.mark_key_successful(key_info.key)
                         logger.info(f"Rotation: ✅ Request successful with key ...{key_info.key[-5:]} (no status code, but has data).")
-                        return response_data
+                        return response_data, key_info.key
                     else:
                         # No status code and no business data = error
                         logger.error(f"Rotation: Request failed with no status code for key ...{key_info.key[-5:]}: {error_info}. Marking failed.")
                         self._key_manager.mark_key_failed(key_info.key) # Mark failed for short cooldown
-                        return response_data
+                        return response_data, key_info.key
 
             # All retries exhausted
             logger.error(f"Rotation: Failed to complete API request after {max_retries} attempts. All keys might be disabled.")
-            return {"error": "All API keys failed or max retries reached.", "status_code": 500}
+            return {"error": "All API keys failed or max retries reached.", "status_code": 500}, None
 
     def _has_business_data(self, response_data: Dict[str, Any]) -> bool:
         """Check if response contains actual business data (indicates success)"""
@@ -459,38 +528,48 @@ class SurfeClient:
         for key_info in self._key_manager.keys:
             key_info.is_temporarily_disabled = False
             key_info.quota_reset_time = None
+            key_info.quota_exhausted = False
         logger.info("All API key cooldowns have been reset.")
 
-    async def health_check(self, endpoint: str = "/health") -> Dict[str, Any]:
-        """Perform a health check using available keys"""
-        results = []
-        for key_info in self._key_manager.keys:
-            if not key_info.is_temporarily_disabled:
-                # Use a specific health check endpoint if available, otherwise a lightweight one
-                test_endpoint = endpoint if endpoint != "/health" else "/v2/companies/search"
-                test_json_data = {"filters": {"domain": {"operator": "eq", "value": "google.com"}}, "limit": 1} if test_endpoint == "/v2/companies/search" else None
-
-                result = await make_surfe_request("POST" if test_endpoint == "/v2/companies/search" else "GET", 
-                                                test_endpoint, 
-                                                key_info.key, 
-                                                json_data=test_json_data, 
-                                                timeout=10)
-                
-                status_code = result.get("status_code", 0)
-                is_healthy = 200 <= status_code < 300 or self._has_business_data(result) # Check for 2xx or actual data
-                
-                results.append({
-                    "key": f"...{key_info.key[-5:]}",
-                    "status": "healthy" if is_healthy else "unhealthy",
-                    "response": result
-                })
-            else:
-                results.append({
-                    "key": f"...{key_info.key[-5:]}",
+    async def health_check(self, endpoint: str = "/health", concurrency: int = 10, probe_timeout: float = 15.0) -> Dict[str, Any]:
+        """Perform a health check using available keys (all keys are probed concurrently)"""
+        # Use a specific health check endpoint if available, otherwise a lightweight one
+        test_endpoint = endpoint if endpoint != "/health" else "/v2/companies/search"
+        test_json_data = {"filters": {"domain": {"operator": "eq", "value": "google.com"}}, "limit": 1} if test_endpoint == "/v2/companies/search" else None
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def probe_key(key_info: ApiKeyInfo) -> Dict[str, Any]:
+            masked = f"...{key_info.key[-5:]}"
+            if key_info.is_temporarily_disabled:
+                return {
+                    "key": masked,
                     "status": "disabled",
                     "response": {"error": "Key temporarily disabled"}
-                })
-        return {"health_check_results": results}
+                }
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        make_surfe_request("POST" if test_endpoint == "/v2/companies/search" else "GET",
+                                           test_endpoint,
+                                           key_info.key,
+                                           json_data=test_json_data,
+                                           timeout=10),
+                        timeout=probe_timeout
+                    )
+                except asyncio.TimeoutError:
+                    result = {"error": f"Health check timed out after {probe_timeout}s", "status_code": 0}
+
+            status_code = result.get("status_code", 0)
+            is_healthy = 200 <= status_code < 300 or self._has_business_data(result) # Check for 2xx or actual data
+
+            return {
+                "key": masked,
+                "status": "healthy" if is_healthy else "unhealthy",
+                "response": result
+            }
+
+        results = await asyncio.gather(*(probe_key(key_info) for key_info in self._key_manager.keys))
+        return {"health_check_results": list(results)}
 
 # Create a globally accessible instance of the enhanced SurfeClient
 surfe_client = SurfeClient()
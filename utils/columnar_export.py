@@ -0,0 +1,153 @@
+# ==============================================================================
+# File: utils/columnar_export.py - Parquet / Arrow IPC export of job results
+# ==============================================================================
+# Builds a fixed Arrow schema from the EnrichedPerson / EnrichedCompany response
+# models and writes records in record batches, coercing each value to its
+# column type so every export of the same kind has an identical schema.
+# pyarrow is optional: without it, is_available() is False and callers should
+# reject parquet/arrow requests.
+
+import io
+import logging
+import tempfile
+import typing
+from typing import Any, AsyncIterator, Dict, Iterable, List, Type
+
+from pydantic import BaseModel
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pa_ipc = None
+    pq = None
+
+print("Loading columnar_export.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+COLUMNAR_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def is_available() -> bool:
+    return pa is not None
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _arrow_type(annotation: Any):
+    annotation = _unwrap_optional(annotation)
+    if typing.get_origin(annotation) in (list, List):
+        (item,) = typing.get_args(annotation)
+        return pa.list_(_arrow_type(item))
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return pa.struct([pa.field(name, _arrow_type(f.annotation)) for name, f in annotation.model_fields.items()])
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    return pa.string()
+
+
+def schema_for(model: Type[BaseModel]):
+    """Arrow schema with one nullable column per model field, in declaration order."""
+    return pa.schema([pa.field(name, _arrow_type(f.annotation)) for name, f in model.model_fields.items()])
+
+
+def _coerce(value: Any, arrow_type) -> Any:
+    """Coerce a JSON value to the column type; values that don't fit become null."""
+    if value is None:
+        return None
+    try:
+        if pa.types.is_list(arrow_type):
+            if not isinstance(value, list):
+                value = [value]
+            return [_coerce(item, arrow_type.value_type) for item in value]
+        if pa.types.is_struct(arrow_type):
+            if not isinstance(value, dict):
+                return None
+            return {field.name: _coerce(value.get(field.name), field.type) for field in arrow_type}
+        if pa.types.is_boolean(arrow_type):
+            return bool(value)
+        if pa.types.is_integer(arrow_type):
+            if isinstance(value, dict):
+                return None
+            return int(float(value))
+        if pa.types.is_floating(arrow_type):
+            return float(value)
+        if isinstance(value, (dict, list)):
+            return None
+        return str(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_batches(records: Iterable[Dict[str, Any]], schema, batch_size: int):
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append({field.name: _coerce(record.get(field.name), field.type) for field in schema})
+        if len(batch) >= batch_size:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+            batch = []
+    if batch:
+        yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+
+async def iter_arrow_stream(
+    records: Iterable[Dict[str, Any]],
+    model: Type[BaseModel],
+    batch_size: int = BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """Yield an Arrow IPC stream one record batch at a time."""
+    schema = schema_for(model)
+    sink = io.BytesIO()
+    writer = pa_ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate(0)
+        return chunk
+
+    for batch in _to_batches(records, schema, batch_size):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+async def iter_parquet(
+    records: Iterable[Dict[str, Any]],
+    model: Type[BaseModel],
+    batch_size: int = BATCH_SIZE,
+    read_chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """
+    Write a Parquet file (one row group per batch) and yield it in chunks. Parquet's
+    footer is only known at the end, so the file is spooled (to disk once it's large).
+    """
+    schema = schema_for(model)
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        with pq.ParquetWriter(spool, schema, compression="snappy") as writer:
+            for batch in _to_batches(records, schema, batch_size):
+                writer.write_batch(batch)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(read_chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,213 @@
+# ==============================================================================
+# File: utils/csv_export.py - Streaming CSV export helpers
+# ==============================================================================
+# Turns an (async) iterator of result records into CSV byte chunks with a
+# configurable column set, optionally gzip-compressed, without ever building
+# the whole file in memory.
+
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+print("Loading csv_export.py") # DEBUG PRINT
+
+# (header, source path). Paths are dotted ("emails.0.email"); "a|b" tries a then b.
+Column = Tuple[str, str]
+
+EXPORT_PRESETS: Dict[str, List[Column]] = {
+    # Matches 2025-peoples-hotel.csv (and the people search page's CSV download)
+    "peoples_hotel": [
+        ("First Name", "firstName"),
+        ("Last Name", "lastName"),
+        ("Email", "email|emails.0.email"),
+        ("Job Title", "jobTitle"),
+        ("Seniorities", "seniorities"),
+        ("Departments", "departments"),
+        ("Company Name", "companyName"),
+        ("Company Domain", "companyDomain"),
+        ("Company Industries", "companyIndustries|industries"),
+        ("Employee Count", "companyEmployeeCount|employeeCount"),
+        ("Country", "country"),
+        ("Location", "location"),
+        ("LinkedIn URL", "linkedInUrl|linkedinUrl"),
+        ("Phone", "phone|mobilePhone|mobilePhones.0.mobilePhone"),
+    ],
+    # Same columns as the people enrichment page's CSV download
+    "people_enrichment": [
+        ("External ID", "externalID"),
+        ("First Name", "firstName"),
+        ("Last Name", "lastName"),
+        ("Email", "emails.0.email|email"),
+        ("Mobile Phone", "mobilePhones.0.mobilePhone|mobilePhone"),
+        ("Job Title", "jobTitle"),
+        ("Seniorities", "seniorities"),
+        ("Departments", "departments"),
+        ("Company Name", "companyName"),
+        ("Company Domain", "companyDomain"),
+        ("Country", "country"),
+        ("Location", "location"),
+        ("LinkedIn URL", "linkedInUrl|linkedinUrl"),
+    ],
+    # Same columns as the company search page's CSV download
+    "companies": [
+        ("Company Name", "name"),
+        ("Domain", "domain"),
+        ("Employees", "employeeCount"),
+        ("Countries", "countries|country"),
+        ("Revenue", "revenue|annualRevenue"),
+        ("Industries", "industries|industry"),
+    ],
+    "company_enrichment": [
+        ("External ID", "externalID"),
+        ("Company Name", "name"),
+        ("Domain", "domain"),
+        ("Website", "websites|website"),
+        ("Description", "description"),
+        ("Employees", "employeeCount|size"),
+        ("Revenue", "revenue|annualRevenue"),
+        ("Founded", "founded|foundedYear"),
+        ("Country", "hqCountry|country"),
+        ("Industries", "industry|industries"),
+        ("LinkedIn", "linkedInURL|linkedinUrl|linkedInUrl"),
+    ],
+}
+
+ROWS_PER_CHUNK = 500
+
+
+def parse_columns(columns: Optional[Union[str, List[str]]]) -> Optional[List[Column]]:
+    """
+    Parse a column spec: a list (or comma-separated string) of "Header=path" or plain
+    "path" entries. Returns None when no columns were requested.
+    """
+    if not columns:
+        return None
+    entries = columns.split(",") if isinstance(columns, str) else columns
+    parsed = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        if "=" in entry:
+            header, path = entry.split("=", 1)
+            parsed.append((header.strip(), path.strip()))
+        else:
+            parsed.append((entry, entry))
+    return parsed or None
+
+
+def resolve_columns(columns: Optional[Union[str, List[str]]], preset: Optional[str]) -> Optional[List[Column]]:
+    """Explicit columns win over a preset. Raises ValueError for an unknown preset."""
+    parsed = parse_columns(columns)
+    if parsed:
+        return parsed
+    if preset:
+        if preset not in EXPORT_PRESETS:
+            raise ValueError(f"Unknown export preset '{preset}'. Available: {', '.join(EXPORT_PRESETS)}")
+        return EXPORT_PRESETS[preset]
+    return None
+
+
+def _lookup(record: Any, path: str) -> Any:
+    value = record
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part)
+        elif isinstance(value, list) and part.isdigit():
+            index = int(part)
+            value = value[index] if index < len(value) else None
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def extract_value(record: Dict[str, Any], path: str) -> str:
+    """Resolve a column path against a record and format it as a CSV cell."""
+    for candidate in path.split("|"):
+        value = _lookup(record, candidate.strip())
+        if value not in (None, "", []):
+            break
+    else:
+        return ""
+
+    if isinstance(value, list):
+        return "; ".join(_format_scalar(v) for v in value)
+    return _format_scalar(value)
+
+
+def _format_scalar(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, dict):
+        # e.g. {"from": 10, "to": 50} ranges, or {"email": ...} objects
+        if "from" in value or "to" in value:
+            return f"{value.get('from', '')}-{value.get('to', '')}"
+        return "; ".join(f"{k}: {v}" for k, v in value.items())
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def infer_columns(record: Dict[str, Any]) -> List[Column]:
+    """Default columns: the first record's top-level keys."""
+    return [(key, key) for key in record.keys()]
+
+
+async def _aiter(records: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]) -> AsyncIterator[Dict[str, Any]]:
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+async def iter_csv(
+    records: Union[Iterable[Dict[str, Any]], AsyncIterator[Dict[str, Any]]],
+    columns: Optional[List[Column]] = None,
+    rows_per_chunk: int = ROWS_PER_CHUNK
+) -> AsyncIterator[bytes]:
+    """Yield UTF-8 CSV chunks (header first) for the given records."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    pending_rows = 0
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    async for record in _aiter(records):
+        if not header_written:
+            columns = columns or infer_columns(record)
+            # BOM so Excel opens UTF-8 names correctly
+            buffer.write("\ufeff")
+            writer.writerow([header for header, _ in columns])
+            header_written = True
+        writer.writerow([extract_value(record, path) for _, path in columns])
+        pending_rows += 1
+        if pending_rows >= rows_per_chunk:
+            yield drain()
+            pending_rows = 0
+
+    if not header_written and columns:
+        buffer.write("\ufeff")
+        writer.writerow([header for header, _ in columns])
+    chunk = drain()
+    if chunk:
+        yield chunk
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream incrementally into gzip format."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
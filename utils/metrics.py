@@ -0,0 +1,204 @@
+# ==============================================================================
+# File: utils/metrics.py - Time-bucketed metrics rollups
+# ==============================================================================
+# Fixed-size ring buffers of per-minute, per-hour and per-day buckets. Every
+# event is rolled up into all three resolutions at write time, so reads never
+# have to aggregate raw events and memory use is constant regardless of traffic.
+
+import bisect
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+print("Loading metrics.py") # DEBUG PRINT
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram upper bounds (ms); the last bucket catches everything slower
+LATENCY_BOUNDS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+COUNTER_FIELDS = [
+    "searches",
+    "enrichments",
+    "records_processed",
+    "upstream_requests",
+    "upstream_errors",
+    "failed_jobs",
+    "latency_count",
+    "latency_sum_ms",
+]
+
+# Activity types logged by the UI and the counters they roll up into
+ACTIVITY_METRICS = {
+    "company_search": "searches",
+    "people_search": "searches",
+    "company_enrichment": "enrichments",
+    "people_enrichment": "enrichments",
+}
+
+# name -> (bucket width in seconds, number of buckets kept)
+RESOLUTIONS = {
+    "minute": (60, 360),       # 6 hours
+    "hour": (3600, 24 * 14),   # 14 days
+    "day": (86400, 90),        # 90 days
+}
+
+
+def _new_bucket() -> Dict[str, Any]:
+    bucket: Dict[str, Any] = {name: 0 for name in COUNTER_FIELDS}
+    bucket["latency_max_ms"] = 0.0
+    bucket["latency_histogram"] = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+    return bucket
+
+
+class RingBuffer:
+    """Fixed number of time buckets; a slot is recycled once its bucket falls out of retention"""
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self._starts: List[Optional[int]] = [None] * size
+        self._buckets: List[Optional[Dict[str, Any]]] = [None] * size
+
+    def bucket_for(self, timestamp: float) -> Dict[str, Any]:
+        start = int(timestamp // self.width) * self.width
+        slot = (start // self.width) % self.size
+        if self._starts[slot] != start:
+            self._starts[slot] = start
+            self._buckets[slot] = _new_bucket()
+        return self._buckets[slot]
+
+    def get(self, start: int) -> Optional[Dict[str, Any]]:
+        slot = (start // self.width) % self.size
+        return self._buckets[slot] if self._starts[slot] == start else None
+
+    def reset(self) -> None:
+        self._starts = [None] * self.size
+        self._buckets = [None] * self.size
+
+
+def _percentile_from_histogram(histogram: List[int], total: int, percentile: float, ceiling: float) -> Optional[float]:
+    """Approximate a latency percentile as the upper bound of the histogram bucket it falls in."""
+    if not total:
+        return None
+    rank = total * percentile / 100.0
+    running = 0
+    for index, count in enumerate(histogram):
+        running += count
+        if running >= rank:
+            return float(LATENCY_BOUNDS_MS[index]) if index < len(LATENCY_BOUNDS_MS) else round(ceiling, 2)
+    return round(ceiling, 2)
+
+
+def parse_window(window: str) -> int:
+    """Parse a window like '90m', '24h' or '7d' into seconds."""
+    match = re.fullmatch(r"\s*(\d+)\s*([mhd])\s*", window or "")
+    if not match:
+        raise ValueError(f"Invalid window '{window}'. Use a number followed by m, h or d (e.g. 60m, 24h, 7d).")
+    amount, unit = int(match.group(1)), match.group(2)
+    if amount <= 0:
+        raise ValueError("Window must be greater than zero.")
+    return amount * {"m": 60, "h": 3600, "d": 86400}[unit]
+
+
+class MetricsRollup:
+    """Collects throughput, latency and error metrics at minute/hour/day resolution"""
+
+    def __init__(self):
+        self._rings = {name: RingBuffer(width, size) for name, (width, size) in RESOLUTIONS.items()}
+
+    def _buckets(self, timestamp: Optional[float] = None):
+        now = timestamp if timestamp is not None else time.time()
+        return [ring.bucket_for(now) for ring in self._rings.values()]
+
+    def increment(self, field_name: str, amount: int = 1, timestamp: Optional[float] = None) -> None:
+        for bucket in self._buckets(timestamp):
+            bucket[field_name] += amount
+
+    def record_activity(self, activity_type: str, count: int = 1, timestamp: Optional[float] = None) -> None:
+        """Roll up a dashboard activity (searches, enrichments, records, job failures)."""
+        field_name = ACTIVITY_METRICS.get(activity_type)
+        for bucket in self._buckets(timestamp):
+            if field_name:
+                bucket[field_name] += 1
+                bucket["records_processed"] += count
+            elif activity_type == "job_failed":
+                bucket["failed_jobs"] += 1
+
+    def record_upstream(self, latency_ms: float, is_error: bool, timestamp: Optional[float] = None) -> None:
+        """Roll up one upstream Surfe API call."""
+        histogram_index = bisect.bisect_left(LATENCY_BOUNDS_MS, latency_ms)
+        for bucket in self._buckets(timestamp):
+            bucket["upstream_requests"] += 1
+            if is_error:
+                bucket["upstream_errors"] += 1
+            bucket["latency_count"] += 1
+            bucket["latency_sum_ms"] += latency_ms
+            bucket["latency_histogram"][histogram_index] += 1
+            if latency_ms > bucket["latency_max_ms"]:
+                bucket["latency_max_ms"] = latency_ms
+
+    @staticmethod
+    def choose_resolution(window_seconds: int) -> str:
+        """Pick the finest resolution whose retention covers the window."""
+        for name, (width, size) in RESOLUTIONS.items():
+            if window_seconds <= width * size and window_seconds // width <= 360:
+                return name
+        return "day"
+
+    def series(self, window_seconds: int, resolution: Optional[str] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return one point per bucket for the last `window_seconds`, oldest first."""
+        resolution = resolution or self.choose_resolution(window_seconds)
+        if resolution not in self._rings:
+            raise ValueError(f"Invalid resolution '{resolution}'. Use one of: {', '.join(RESOLUTIONS)}.")
+
+        ring = self._rings[resolution]
+        now = now if now is not None else time.time()
+        current_start = int(now // ring.width) * ring.width
+        bucket_count = min(ring.size, max(1, -(-window_seconds // ring.width)))
+
+        points = []
+        totals = _new_bucket()
+        for offset in range(bucket_count - 1, -1, -1):
+            start = current_start - offset * ring.width
+            bucket = ring.get(start) or _new_bucket()
+            points.append(self._to_point(start, bucket))
+            for name in COUNTER_FIELDS:
+                totals[name] += bucket[name]
+            totals["latency_max_ms"] = max(totals["latency_max_ms"], bucket["latency_max_ms"])
+            totals["latency_histogram"] = [a + b for a, b in zip(totals["latency_histogram"], bucket["latency_histogram"])]
+
+        return {
+            "resolution": resolution,
+            "bucket_seconds": ring.width,
+            "window_seconds": bucket_count * ring.width,
+            "points": points,
+            "totals": self._to_point(current_start - (bucket_count - 1) * ring.width, totals)
+        }
+
+    @staticmethod
+    def _to_point(start: int, bucket: Dict[str, Any]) -> Dict[str, Any]:
+        requests = bucket["upstream_requests"]
+        latency_count = bucket["latency_count"]
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start)),
+            "searches": bucket["searches"],
+            "enrichments": bucket["enrichments"],
+            "records_processed": bucket["records_processed"],
+            "failed_jobs": bucket["failed_jobs"],
+            "upstream_requests": requests,
+            "upstream_errors": bucket["upstream_errors"],
+            "error_rate": round(bucket["upstream_errors"] / requests * 100, 2) if requests else 0,
+            "avg_latency_ms": round(bucket["latency_sum_ms"] / latency_count, 2) if latency_count else None,
+            "p95_latency_ms": _percentile_from_histogram(bucket["latency_histogram"], latency_count, 95, bucket["latency_max_ms"]),
+            "max_latency_ms": round(bucket["latency_max_ms"], 2) if latency_count else None,
+        }
+
+    def reset(self) -> None:
+        for ring in self._rings.values():
+            ring.reset()
+
+
+# Global rollup instance shared by the API client and the dashboard
+metrics = MetricsRollup()
@@ -0,0 +1,275 @@
+# ==============================================================================
+# File: utils/quality_report.py - Field-completeness and quality report for jobs
+# ==============================================================================
+# Turns enrichment job results into columns (one pass over the records: a 0/1
+# presence column per field, a float column of employee counts, the industry
+# labels) and computes every metric over whole columns: fill rate per field,
+# email/phone presence, a weighted completeness score per record and the
+# employee count and industry distributions.
+# Columns are stdlib arrays; with numpy installed they are wrapped zero-copy and
+# the metrics run as numpy vector operations, otherwise as plain column loops.
+
+import bisect
+import math
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+print("Loading quality_report.py") # DEBUG PRINT
+
+# Field -> source path ("a|b" tries a then b, dotted paths index into lists), as in csv_export
+QUALITY_FIELDS: Dict[str, List[Tuple[str, str]]] = {
+    "people": [
+        ("first_name", "firstName"),
+        ("last_name", "lastName"),
+        ("email", "emails.0.email|email"),
+        ("mobile_phone", "mobilePhones.0.mobilePhone|mobilePhone|phone"),
+        ("job_title", "jobTitle"),
+        ("seniority", "seniorities"),
+        ("department", "departments"),
+        ("company_name", "companyName"),
+        ("company_domain", "companyDomain"),
+        ("country", "country"),
+        ("location", "location"),
+        ("linkedin_url", "linkedInUrl|linkedinUrl"),
+    ],
+    "companies": [
+        ("name", "name"),
+        ("domain", "domain"),
+        ("website", "websites|website"),
+        ("description", "description"),
+        ("employee_count", "employeeCount|size"),
+        ("revenue", "revenue|annualRevenue"),
+        ("founded", "founded|foundedYear"),
+        ("country", "hqCountry|country"),
+        ("industry", "industry|industries"),
+        ("linkedin_url", "linkedInURL|linkedinUrl|linkedInUrl"),
+    ],
+}
+EMPLOYEE_COUNT_PATHS = {"people": "companyEmployeeCount|employeeCount", "companies": "employeeCount|size"}
+INDUSTRY_PATHS = {"people": "companyIndustries|industries|industry", "companies": "industry|industries"}
+
+# Weight of each field in the completeness score (others count 1): contact data matters most
+FIELD_WEIGHTS = {
+    "people": {"email": 3, "mobile_phone": 2, "linkedin_url": 2},
+    "companies": {"name": 2, "domain": 2},
+}
+
+# Lower bounds of the employee count bands
+EMPLOYEE_BANDS = [1, 11, 51, 201, 501, 1001, 5001, 10001]
+EMPLOYEE_BAND_LABELS = ["1-10", "11-50", "51-200", "201-500", "501-1000", "1001-5000", "5001-10000", "10001+"]
+SCORE_BINS = 10
+TOP_INDUSTRIES = 20
+EMPTY_VALUES = (None, "", [], {})
+
+
+def _compile(path: str) -> List[Tuple[Any, ...]]:
+    """Path candidates as tuples of dict keys (str) and list indexes (int)."""
+    return [
+        tuple(int(part) if part.isdigit() else part for part in candidate.strip().split("."))
+        for candidate in path.split("|")
+    ]
+
+
+def _walk(record: Dict[str, Any], parts: Tuple[Any, ...]) -> Any:
+    value: Any = record
+    for part in parts:
+        if type(part) is int:
+            value = value[part] if type(value) is list and part < len(value) else None
+        else:
+            value = value.get(part) if type(value) is dict else None
+        if value is None:
+            return None
+    return value
+
+
+def _column(records: List[Dict[str, Any]], candidates: List[Tuple[Any, ...]]) -> List[Any]:
+    """
+    One value per record: the first non-empty candidate path, else None. Built one whole
+    column per candidate (plain key lookups run as a single comprehension).
+    """
+    result: Optional[List[Any]] = None
+    for parts in candidates:
+        if len(parts) == 1:
+            key = parts[0]
+            values = [r.get(key) for r in records]
+        else:
+            values = [_walk(r, parts) for r in records]
+        values = [v if v is not None and v not in EMPTY_VALUES and (type(v) is not str or v.strip()) else None for v in values]
+        result = values if result is None else [a if a is not None else b for a, b in zip(result, values)]
+    return result if result is not None else [None] * len(records)
+
+
+def _employee_count(value: Any) -> float:
+    """Numeric employee count; ranges ({"from", "to"} or "51-200") use their lower bound."""
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return _employee_count(value.get("from"))
+    digits = ""
+    for char in str(value).replace(",", ""):
+        if char.isdigit():
+            digits += char
+        elif digits:
+            break
+    return float(digits) if digits else math.nan
+
+
+def _industries(value: Any) -> List[str]:
+    """Every industry of one record (a name, a {"name": ...} dict or a list of either), once each"""
+    names: List[str] = []
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, dict):
+            item = item.get("name")
+        name = str(item).strip() if item is not None else ""
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class JobColumns:
+    """One job's results as columns: presence flags per field, employee counts, industries"""
+
+    def __init__(self, records: List[Dict[str, Any]], kind: str):
+        self.kind = kind
+        self.size = len(records)
+        self.fields = [name for name, _ in QUALITY_FIELDS[kind]]
+        self.presence: Dict[str, array] = {}
+        for name, path in QUALITY_FIELDS[kind]:
+            self.presence[name] = array("B", [v is not None for v in _column(records, _compile(path))])
+        employee_counts = _column(records, _compile(EMPLOYEE_COUNT_PATHS[kind]))
+        self.employee_counts = array("d", [_employee_count(v) if v is not None else math.nan for v in employee_counts])
+        self.industries = [_industries(v) for v in _column(records, _compile(INDUSTRY_PATHS[kind]))]
+
+
+def _percentiles(sorted_values: List[float]) -> Dict[str, Optional[float]]:
+    if not sorted_values:
+        return {"min": None, "p25": None, "median": None, "p75": None, "max": None}
+
+    def at(q: float) -> float:
+        # Linear interpolation, same as numpy's default percentile method
+        position = (len(sorted_values) - 1) * q
+        low = int(position)
+        high = min(low + 1, len(sorted_values) - 1)
+        return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+    return {
+        "min": round(sorted_values[0], 2), "p25": round(at(0.25), 2), "median": round(at(0.5), 2),
+        "p75": round(at(0.75), 2), "max": round(sorted_values[-1], 2)
+    }
+
+
+def _numpy_metrics(columns: JobColumns, weights: List[int]) -> Dict[str, Any]:
+    n = columns.size
+    # (fields x records) uint8 matrix, one zero-copy view per presence column
+    matrix = np.stack([np.frombuffer(columns.presence[f], dtype=np.uint8) for f in columns.fields])
+    filled = matrix.sum(axis=1)
+    scores = np.asarray(weights, dtype=np.float64) @ matrix / sum(weights)
+    counts = np.frombuffer(columns.employee_counts, dtype=np.float64)
+    counts = np.sort(counts[~np.isnan(counts)])
+    bands = np.bincount(np.searchsorted(EMPLOYEE_BANDS, counts, side="right"), minlength=len(EMPLOYEE_BANDS) + 1)
+    return {
+        "filled": dict(zip(columns.fields, filled.tolist())),
+        "scores_sorted": np.sort(scores).tolist(),
+        "score_histogram": np.bincount(np.minimum((scores * SCORE_BINS).astype(np.int64), SCORE_BINS - 1), minlength=SCORE_BINS).tolist() if n else [0] * SCORE_BINS,
+        "score_mean": float(scores.mean()) if n else None,
+        "employee_counts_sorted": counts.tolist(),
+        "employee_bands": bands.tolist(),
+        "contact": _numpy_contact(columns) if columns.kind == "people" else None
+    }
+
+
+def _numpy_contact(columns: JobColumns) -> Dict[str, int]:
+    email = np.frombuffer(columns.presence["email"], dtype=np.uint8).astype(bool)
+    phone = np.frombuffer(columns.presence["mobile_phone"], dtype=np.uint8).astype(bool)
+    return {
+        "email": int(email.sum()), "phone": int(phone.sum()),
+        "both": int((email & phone).sum()), "either": int((email | phone).sum())
+    }
+
+
+def _array_metrics(columns: JobColumns, weights: List[int]) -> Dict[str, Any]:
+    n = columns.size
+    presence = [columns.presence[f] for f in columns.fields]
+    total_weight = sum(weights)
+    scores = [0.0] * n
+    for weight, column in zip(weights, presence):
+        if weight:
+            scores = [s + weight * v for s, v in zip(scores, column)]
+    scores = [s / total_weight for s in scores]
+    histogram = [0] * SCORE_BINS
+    for s in scores:
+        histogram[min(int(s * SCORE_BINS), SCORE_BINS - 1)] += 1
+    counts = sorted(c for c in columns.employee_counts if not math.isnan(c))
+    bands = [0] * (len(EMPLOYEE_BANDS) + 1)
+    for c in counts:
+        bands[bisect.bisect_right(EMPLOYEE_BANDS, c)] += 1
+    contact = None
+    if columns.kind == "people":
+        email, phone = columns.presence["email"], columns.presence["mobile_phone"]
+        contact = {
+            "email": sum(email), "phone": sum(phone),
+            "both": sum(e & p for e, p in zip(email, phone)),
+            "either": sum(e | p for e, p in zip(email, phone))
+        }
+    return {
+        "filled": {f: sum(column) for f, column in zip(columns.fields, presence)},
+        "scores_sorted": sorted(scores),
+        "score_histogram": histogram,
+        "score_mean": sum(scores) / n if n else None,
+        "employee_counts_sorted": counts,
+        "employee_bands": bands,
+        "contact": contact
+    }
+
+
+def _rate(count: int, total: int) -> Optional[float]:
+    return round(count / total, 4) if total else None
+
+
+def quality_report(records: List[Dict[str, Any]], kind: str) -> Dict[str, Any]:
+    """Field completeness and quality metrics for one job's results ("people" or "companies")."""
+    columns = JobColumns([r for r in records if isinstance(r, dict)], kind)
+    n = columns.size
+    weights = [FIELD_WEIGHTS[kind].get(f, 1) for f in columns.fields]
+    metrics = _numpy_metrics(columns, weights) if np is not None else _array_metrics(columns, weights)
+
+    # Band 0 holds counts below 1 (e.g. 0), reported with the smallest band
+    bands = metrics["employee_bands"]
+    bands = [bands[0] + bands[1]] + bands[2:]
+    # Records listing several industries count towards each; share is per record
+    industries = Counter(name for names in columns.industries for name in names)
+    report = {
+        "kind": kind,
+        "records": n,
+        "engine": "numpy" if np is not None else "array",
+        "fill_rates": {f: _rate(count, n) for f, count in metrics["filled"].items()},
+        "completeness": {
+            "weights": dict(zip(columns.fields, weights)),
+            "mean": round(metrics["score_mean"], 4) if metrics["score_mean"] is not None else None,
+            "distribution": _percentiles(metrics["scores_sorted"]),
+            "histogram": {f"{i / SCORE_BINS:.1f}-{(i + 1) / SCORE_BINS:.1f}": c for i, c in enumerate(metrics["score_histogram"])}
+        },
+        "employee_count": dict(
+            _percentiles(metrics["employee_counts_sorted"]),
+            known=len(metrics["employee_counts_sorted"]),
+            bands=dict(zip(EMPLOYEE_BAND_LABELS, bands))
+        ),
+        "industries": {
+            "known": sum(1 for names in columns.industries if names),
+            "distinct": len(industries),
+            "top": [{"industry": name, "count": count, "share": _rate(count, n)} for name, count in industries.most_common(TOP_INDUSTRIES)]
+        }
+    }
+    if metrics["contact"] is not None:
+        report["contact"] = {
+            key: {"count": count, "rate": _rate(count, n)} for key, count in metrics["contact"].items()
+        }
+    return report